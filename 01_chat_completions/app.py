@@ -1,7 +1,44 @@
 import streamlit as st
-from langchain_upstage import ChatUpstage
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from shared.completion_cache import invoke_cached, make_completion_key, render_completion_cache_sidebar, stream_cached
+from shared.instrumentation import render_metrics_sidebar
+from shared.llm import get_chat_model
+from shared.rate_limit import RateLimiter
+from shared.streaming import StreamAccumulator, StreamRenderer, render_stream_stats
+from conversation import MODEL_CONTEXT, Conversation, estimate_tokens
+from tools import default_registry
+from compare import COMPARE_VARIANTS, DEFAULT_VARIANTS, stream_comparison
+from config import build_request, get_output_validator, render_code
+from json_stream import StructuredOutputMonitor
+from batch_eval import (
+    DEFAULT_RESULTS_DIR, BatchResults, batch_run_key, load_prompts, results_to_csv, results_to_jsonl, run_batch,
+    summarize_results,
+)
 
 st.set_page_config(page_title="Chat Completions", page_icon="💬", layout="wide")
+
+
+@st.cache_resource
+def get_tool_registry():
+    # 스레드 풀과 함수 결과 캐시를 재실행 간에 공유
+    return default_registry()
+
+
+def render_json_validation(monitor, aborted=False):
+    """구조화 출력(JSON) 검증 결과 표시"""
+    if aborted:
+        st.error(f"⛔ 형식 위반이 확정되어 {monitor.parser.chars:,}자에서 생성을 중단했습니다. {monitor.violation}")
+    elif monitor.finish():
+        st.error(f"❌ {monitor.violation}")
+    else:
+        st.success("✅ 스키마 검증 통과" if monitor.validator else "✅ JSON 형식 확인")
+
+
 st.title("💬 Chat Completions (LangChain)")
 
 api_key = st.sidebar.text_input("Upstage API Key", type="password")
@@ -16,6 +53,16 @@ else:
             del st.session_state[key]
         st.rerun()
     
+    # temperature 0이거나 '항상 사용'이면 같은 요청의 응답을 재생
+    cache_always, completion_cache = render_completion_cache_sidebar()
+    # 호출별 지연 시간 / TTFT / 토큰 사용량 (ChatUpstage 콜백으로 자동 기록)
+    render_metrics_sidebar()
+    
+    # 멀티턴 대화 기록 (대화마다 고정된 prompt_cache_key 사용)
+    if "conversation" not in st.session_state:
+        st.session_state.conversation = Conversation()
+    conversation = st.session_state.conversation
+    
     col_left, col_right = st.columns([1, 1])
     
     with col_left:
@@ -32,6 +79,27 @@ else:
             """
         )
         
+        compare_mode = st.checkbox(
+            "🆚 모델 비교 모드",
+            value=False,
+            help="같은 메시지를 여러 모델 / Reasoning Effort 조합에 동시에 보내 나란히 스트리밍하고 TTFT, 전체 시간, 토큰/초, reasoning_tokens를 비교합니다"
+        )
+        compare_variants = []
+        if compare_mode:
+            compare_variants = st.multiselect(
+                "비교할 모델",
+                list(COMPARE_VARIANTS),
+                default=DEFAULT_VARIANTS,
+                help="비교 모드에서는 위의 모델 / Reasoning Effort 선택 대신 여기서 고른 조합을 사용하며, 항상 스트리밍합니다 (Function Calling 제외)"
+            )
+        
+        batch_mode = st.checkbox(
+            "📦 일괄 평가 모드",
+            value=False,
+            disabled=compare_mode,
+            help="JSONL / CSV 파일의 (system, user) 쌍을 현재 모델 / 파라미터로 동시에 실행하고 행별 지연 시간, 토큰 사용량, 출력을 표로 모아 내보냅니다"
+        ) and not compare_mode
+        
         # Reasoning Effort 설정 (모델별 옵션 다름)
         reasoning_effort = None
         if model in ["solar-pro3", "solar-pro2"]:
@@ -153,6 +221,43 @@ else:
                 기본값: false
                 """
             )
+            
+            render_fps = st.slider(
+                "스트리밍 화면 갱신 (fps)",
+                1, 30, 10,
+                disabled=not streaming,
+                help="스트리밍 중 초당 화면 갱신 횟수. 토큰마다 다시 그리지 않고 모아서 그리므로 긴 응답도 네트워크 속도로 표시됩니다"
+            )
+            
+            keep_history = st.checkbox(
+                "대화 이어가기",
+                value=True,
+                help="이전 질문과 응답을 함께 전송합니다. 대화마다 고정된 Prompt Cache Key를 자동으로 사용해 반복되는 앞부분이 캐시됩니다"
+            )
+            
+            # 컨텍스트 길이에서 응답용 max_tokens를 뺀 만큼이 입력 예산의 상한
+            max_budget = max(1024, MODEL_CONTEXT.get(model, 32768) - max_tokens)
+            context_budget = st.number_input(
+                "컨텍스트 토큰 예산",
+                min_value=256,
+                max_value=max_budget,
+                value=min(8192, max_budget),
+                step=1024,
+                disabled=not keep_history,
+                help=f"""
+                시스템 프롬프트 + 대화 기록 + 이번 메시지의 최대 토큰 수 (근사치)
+                
+                • 초과하면 오래된 턴을 한 번에 예산의 절반까지 정리
+                • 최대값: 모델 컨텍스트 - Max Tokens ({max_budget:,})
+                """
+            )
+            
+            summarize_history = st.checkbox(
+                "정리한 턴 요약",
+                value=False,
+                disabled=not keep_history,
+                help="예산을 넘어 정리하는 오래된 턴을 버리지 않고 요약해 시스템 메시지로 유지합니다 (요약 시 요청 1회 추가)"
+            )
         
         with st.expander("📋 고급 설정", expanded=False):
             response_format_type = st.selectbox(
@@ -177,6 +282,14 @@ else:
                     help="출력 구조를 정의하는 JSON 스키마 (name 필드 필수)"
                 )
             
+            abort_on_invalid = False
+            if response_format_type != "text":
+                abort_on_invalid = st.checkbox(
+                    "형식 위반 시 스트리밍 중단",
+                    value=True,
+                    help="스트리밍 중 JSON을 받는 대로 파싱하고, 문법 오류나 스키마 위반(json_schema)이 확정되면 바로 생성을 멈춰 토큰과 시간을 아낍니다"
+                )
+            
             st.divider()
             
             use_tools = st.checkbox(
@@ -188,6 +301,7 @@ else:
             tools_input = None
             tool_choice = "auto"
             parallel_tool_calls = True
+            max_tool_rounds = 5
             
             if use_tools:
                 st.info("💡 편의상 mock function을 사용합니다. 실제 환경에서는 API 호출이나 DB 쿼리로 대체하세요.")
@@ -205,34 +319,12 @@ else:
                         st.rerun()
                 
                 if st.session_state.get('tools_example') == 'weather':
-                    tools_input = '''[
-  {
-    "type": "function",
-    "function": {
-      "name": "get_current_weather",
-      "description": "Get the current weather in a given location",
-      "parameters": {
-        "type": "object",
-        "properties": {
-          "location": {
-            "type": "string",
-            "description": "The city and state, e.g. San Francisco, CA"
-          },
-          "unit": {
-            "type": "string",
-            "enum": ["celsius", "fahrenheit"]
-          }
-        },
-        "required": ["location"]
-      }
-    }
-  }
-]'''
+                    tool_registry = get_tool_registry()
+                    tools_input = json.dumps(tool_registry.schemas(), indent=2, ensure_ascii=False)
                     with st.expander("📝 Tools 정의 (JSON)", expanded=True):
                         st.code(tools_input, language='json')
-                        st.caption("🔹 함수: get_current_weather")
-                        st.caption("🔹 파라미터: location (필수), unit (선택)")
-                        st.caption("💡 추천 메시지: What's the weather like in Seoul?")
+                        st.caption("🔹 함수: get_current_weather (location 필수, unit 선택), get_local_time (location 필수)")
+                        st.caption("💡 추천 메시지: What's the weather and local time in Seoul and Paris?")
                 else:
                     tools_input = None
                     st.warning("⬆️ 위에서 예시를 로드하세요.")
@@ -260,6 +352,18 @@ else:
                             st.warning("⚠️ LangChain에서 parallel_tool_calls 파라미터를 지원하지 않습니다.")
                     else:
                         st.info("Parallel tool calls: solar-pro3 전용")
+                
+                max_tool_rounds = st.number_input(
+                    "최대 함수 호출 라운드",
+                    min_value=1,
+                    max_value=10,
+                    value=5,
+                    help="모델이 함수 호출을 멈출 때까지 실행 → 결과 전달을 반복하는 최대 횟수. 한 라운드의 함수들은 동시에 실행됩니다"
+                )
+                
+                if st.session_state.get('tools_example') == 'weather':
+                    tool_cache = get_tool_registry().cache_stats()
+                    st.caption(f"💾 함수 결과 캐시: {tool_cache['entries']}개 · 적중 {tool_cache['hits']} / 미스 {tool_cache['misses']}")
             
             prompt_cache_key = st.text_input(
                 "Prompt Cache Key",
@@ -268,9 +372,16 @@ else:
                 프롬프트 캐싱을 위한 고유 키
                 
                 대화 컨텍스트별로 고유 키 사용 권장
+                비워 두면 '대화 이어가기' 사용 시 대화별 키를 자동으로 사용
                 기본값: null
                 """
             )
+            if not prompt_cache_key and keep_history:
+                prompt_cache_key = conversation.cache_key
+                st.caption(f"자동 Prompt Cache Key: `{prompt_cache_key}`")
+        
+        # 대화 기록은 이번 응답까지 반영한 뒤 아래에서 채움
+        history_box = st.container()
         
         st.subheader("📝 메시지 입력")
         system_prompt = st.text_area(
@@ -279,112 +390,286 @@ else:
             help="AI의 역할, 행동 방식, 제약사항을 정의합니다."
         )
         
-        default_user_message = "안녕하세요!" if response_format_type == "text" else "사용자 정보를 JSON 형식으로 생성해주세요."
-        user_message = st.text_area(
-            "사용자 메시지",
-            default_user_message,
-            help="AI에게 전달할 질문이나 요청을 입력하세요."
-        )
+        batch_prompts = []
+        if batch_mode:
+            batch_file = st.file_uploader(
+                "평가 데이터 (JSONL / CSV)",
+                type=["jsonl", "csv"],
+                help="""
+                행마다 user(필수), system(선택), id(선택)
+                
+                • JSONL: {"id": "q1", "system": "...", "user": "..."}
+                • CSV: id, system, user 열
+                • system이 비어 있으면 위의 시스템 프롬프트 사용
+                """
+            )
+            if batch_file:
+                try:
+                    batch_prompts = load_prompts(batch_file.name, batch_file.getvalue(), system_prompt)
+                except ValueError as e:
+                    st.error(f"❌ 평가 데이터 오류: {e}")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                batch_concurrency = st.slider(
+                    "동시 요청 수",
+                    1, 32, 8,
+                    help="동시에 진행하는 최대 요청 수. 행별 지연 시간이 길수록 높일수록 빨라집니다"
+                )
+            with col2:
+                batch_tpm = st.number_input(
+                    "분당 토큰 한도 (TPM)",
+                    min_value=0,
+                    value=100000,
+                    step=10000,
+                    help="요청마다 입력 추정치 + Max Tokens를 예약하고 응답 후 실제 사용량으로 정산합니다. 0이면 제한 없음"
+                )
+            # 코드 미리보기는 첫 행 기준
+            user_message = batch_prompts[0]["user"] if batch_prompts else ""
+        else:
+            default_user_message = "안녕하세요!" if response_format_type == "text" else "사용자 정보를 JSON 형식으로 생성해주세요."
+            user_message = st.text_area(
+                "사용자 메시지",
+                default_user_message,
+                help="AI에게 전달할 질문이나 요청을 입력하세요."
+            )
         
-        if response_format_type in ["json_object", "json_schema"] and "json" not in user_message.lower():
+        if response_format_type in ["json_object", "json_schema"] and user_message and "json" not in user_message.lower():
             st.warning("⚠️ JSON 출력을 사용하려면 메시지에 'JSON' 단어를 포함해야 합니다.")
         
-        if st.button("전송", type="primary"):
-            try:
-                # JSON 파싱 사전 검증
-                import json
-                parsed_tools = None
-                parsed_schema = None
+        # 실행과 코드 미리보기가 같은 요청 구성을 사용 (JSON 입력은 문자열별로 한 번만 파싱 / 검증)
+        request_args = {
+            "model": model,
+            "sampling_params": {
+                "temperature": temperature,
+                "top_p": top_p,
+                "frequency_penalty": frequency_penalty,
+                "presence_penalty": presence_penalty,
+                "max_tokens": max_tokens
+            },
+            "reasoning_effort": reasoning_effort,
+            "response_format_type": response_format_type,
+            "json_schema_text": json_schema_input if response_format_type == "json_schema" else None,
+            "tools_text": tools_input if use_tools else None,
+            "tool_choice": tool_choice,
+            "prompt_cache_key": prompt_cache_key,
+        }
+        request = build_request(**request_args)
+        for error in request["errors"]:
+            st.warning(f"⚠️ {error}")
+        
+        # 일괄 평가 모드 (행별 결과를 파일에 바로 기록하므로 중단해도 이어서 실행 가능)
+        if batch_mode:
+            if not batch_prompts:
+                st.info("⬆️ 평가 데이터 파일을 업로드하세요.")
+            else:
+                sampling_params = request["sampling_params"]
+                # 툴 호출은 제외하고, 같은 실행의 요청끼리 하나의 Prompt Cache Key를 공유
+                batch_kwargs = {key: value for key, value in request["model_kwargs"].items() if key not in ("tools", "tool_choice", "prompt_cache_key")}
+                run_key = batch_run_key(model, {**sampling_params, **batch_kwargs}, batch_prompts)
+                batch_results = BatchResults(DEFAULT_RESULTS_DIR / f"{run_key}.jsonl")
+                batch_done = len(batch_results.completed_ids() & {prompt["id"] for prompt in batch_prompts})
                 
-                if use_tools and tools_input:
-                    try:
-                        parsed_tools = json.loads(tools_input)
-                    except json.JSONDecodeError as e:
-                        st.error(f"❌ Tools JSON 파싱 오류: {e}")
-                        st.stop()
+                st.caption(f"평가 {len(batch_prompts):,}행 · 완료 {batch_done:,}행 · 결과 파일: `{batch_results.path}`")
+                if use_tools:
+                    st.info("💡 일괄 평가에서는 Function Calling을 사용하지 않습니다.")
                 
-                if response_format_type == "json_schema" and json_schema_input:
+                col1, col2 = st.columns(2)
+                with col1:
+                    run_clicked = st.button(
+                        "✅ 모두 완료" if batch_done == len(batch_prompts) else ("▶️ 이어서 실행" if batch_done else "▶️ 일괄 실행"),
+                        type="primary",
+                        disabled=batch_done == len(batch_prompts) or bool(request["errors"]),
+                        use_container_width=True
+                    )
+                with col2:
+                    if st.button("🗑️ 결과 초기화", disabled=not batch_results.rows(), use_container_width=True):
+                        batch_results.reset()
+                        st.rerun()
+                
+                batch_progress = st.progress(batch_done / len(batch_prompts))
+                batch_table = st.empty()
+                
+                def render_batch_table():
+                    rows = batch_results.rows(batch_prompts)
+                    batch_table.dataframe(
+                        [{**row, "output": row["output"][:200]} for row in rows],
+                        column_order=["id", "latency", "ttft", "input_tokens", "output_tokens", "reasoning_tokens", "cached_tokens", "output", "error"],
+                        hide_index=True,
+                        use_container_width=True
+                    )
+                    return rows
+                
+                if run_clicked:
+                    llm = get_chat_model(api_key, model, **sampling_params, **batch_kwargs, prompt_cache_key=f"batch-{run_key}")
+                    limiter = RateLimiter(batch_tpm / 60, burst=batch_tpm) if batch_tpm else None
+                    started = time.perf_counter()
+                    rendered = 0.0
+                    batch_rows = run_batch(llm, batch_prompts, batch_results, batch_concurrency, limiter, reserve_output=max_tokens)
                     try:
-                        parsed_schema = json.loads(json_schema_input)
-                    except json.JSONDecodeError as e:
-                        st.error(f"❌ JSON Schema 파싱 오류: {e}")
-                        st.stop()
-                
-                # LLM 기본 파라미터 설정
-                llm_params = {
-                    "api_key": api_key,
-                    "model": model,
-                    "temperature": temperature,
-                    "top_p": top_p,
-                    "frequency_penalty": frequency_penalty,
-                    "presence_penalty": presence_penalty,
-                    "max_tokens": max_tokens
-                }
-                
-                # 추가 파라미터 (model_kwargs) 구성
-                model_kwargs = {}
-                if reasoning_effort:
-                    if model == "solar-pro3":
-                        model_kwargs["reasoning_effort"] = reasoning_effort
-                    elif model == "solar-pro2":
-                        model_kwargs["reasoning_effort"] = reasoning_effort
+                        # 결과는 끝나는 순서대로 들어오고, 표는 최대 초당 2회만 다시 그림
+                        for row in batch_rows:
+                            batch_done += 1
+                            now = time.monotonic()
+                            if now - rendered >= 0.5:
+                                elapsed = time.perf_counter() - started
+                                batch_progress.progress(batch_done / len(batch_prompts), text=f"{batch_done:,} / {len(batch_prompts):,} · {elapsed:.0f}s")
+                                render_batch_table()
+                                rendered = now
+                    finally:
+                        # 화면이 다시 실행되면 남은 요청 취소 (완료된 행은 이미 파일에 기록됨)
+                        batch_rows.close()
+                    # 완료 수 / 버튼 상태를 결과 파일 기준으로 다시 그림
+                    st.rerun()
                 
-                if response_format_type == "json_object":
-                    model_kwargs["response_format"] = {"type": "json_object"}
-                elif response_format_type == "json_schema" and parsed_schema:
-                    model_kwargs["response_format"] = {
-                        "type": "json_schema",
-                        "json_schema": parsed_schema
-                    }
+                rows = render_batch_table()
+                if rows:
+                    summary = summarize_results(rows)
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("성공 / 실패", f"{summary['succeeded']:,} / {summary['failed']:,}")
+                    col2.metric("지연 p50 / p95", f"{summary['latency_p50'] or 0:.2f}s / {summary['latency_p95'] or 0:.2f}s")
+                    col3.metric("토큰 (입력/출력)", f"{summary['input_tokens']:,} / {summary['output_tokens']:,}")
+                    col4.metric("reasoning_tokens", f"{summary['reasoning_tokens']:,}")
+                    if summary["failed"]:
+                        st.warning(f"⚠️ 실패한 {summary['failed']}행은 다시 실행하면 재시도합니다.")
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.download_button("📥 CSV 다운로드", results_to_csv(rows), file_name=f"batch-{run_key}.csv", mime="text/csv", use_container_width=True)
+                    with col2:
+                        st.download_button("📥 JSONL 다운로드", results_to_jsonl(rows), file_name=f"batch-{run_key}.jsonl", mime="application/json", use_container_width=True)
+        
+        elif st.button("전송", type="primary"):
+            try:
+                # JSON 입력 사전 검증
+                if request["errors"]:
+                    st.error(f"❌ {request['errors'][0]}")
+                    st.stop()
                 
-                # Function Calling 설정
-                if use_tools and parsed_tools:
-                    model_kwargs["tools"] = parsed_tools
-                    model_kwargs["tool_choice"] = tool_choice
+                if compare_mode and not compare_variants:
+                    st.warning("⚠️ 비교할 모델을 하나 이상 선택하세요.")
+                    st.stop()
                 
-                if prompt_cache_key:
-                    model_kwargs["prompt_cache_key"] = prompt_cache_key
+                # 샘플링 파라미터 (클라이언트는 재사용하고 호출 시점에 적용)와 추가 파라미터 (model_kwargs)
+                sampling_params = request["sampling_params"]
+                model_kwargs = request["model_kwargs"]
                 
-                if model_kwargs:
-                    llm_params["model_kwargs"] = model_kwargs
+                llm = get_chat_model(api_key, model, **sampling_params, **model_kwargs)
                 
-                llm = ChatUpstage(**llm_params)
+                # 메시지 구성 (대화 기록이 예산을 넘으면 오래된 턴부터 정리)
+                if keep_history:
+                    summarize = None
+                    if summarize_history:
+                        summary_llm = get_chat_model(api_key, model, temperature=0.3, max_tokens=1024)
+                        summarize = lambda prompt: summary_llm.invoke([("human", prompt)]).content
+                    reserved = estimate_tokens(system_prompt) + estimate_tokens(user_message)
+                    with st.spinner("🗂️ 대화 기록 정리 중..."):
+                        if conversation.compact(context_budget, reserved, summarize):
+                            st.info(f"🗂️ 컨텍스트 예산을 넘어 오래된 대화를 {'요약' if summarize else '정리'}했습니다.")
+                    messages = conversation.messages(system_prompt, user_message)
+                else:
+                    messages = [
+                        ("system", system_prompt),
+                        ("human", user_message)
+                    ]
                 
-                # 메시지 구성
-                messages = [
-                    ("system", system_prompt),
-                    ("human", user_message)
-                ]
+                # 같은 요청이면 저장된 응답 재생 (비교 모드는 지연 시간 측정이 목적이므로 제외)
+                cache_key = None
+                if (cache_always or temperature == 0) and not compare_mode:
+                    cache_key = make_completion_key(model, messages, {**sampling_params, **model_kwargs})
                 
                 # 응답 변수 초기화
                 full_response = ""
                 response = None
+                stream = StreamAccumulator()
+                aborted = False
+                
+                # JSON 응답 검증기 (json_schema는 스키마 문자열별로 컴파일된 validator 재사용)
+                output_validator = None
+                if response_format_type == "json_schema" and json_schema_input:
+                    output_validator = get_output_validator(json_schema_input)
                 
                 st.subheader("💬 응답:")
                 
+                # 모델 비교 모드 (여러 모델을 동시에 스트리밍, 툴 호출 제외)
+                if compare_mode:
+                    compare_kwargs = {key: value for key, value in model_kwargs.items() if key not in ("tools", "tool_choice", "reasoning_effort")}
+                    compare_llms = [
+                        get_chat_model(api_key, variant_model, **sampling_params, **compare_kwargs, reasoning_effort=variant_effort)
+                        for variant_model, variant_effort in (COMPARE_VARIANTS[label] for label in compare_variants)
+                    ]
+                    
+                    compare_columns = st.columns(len(compare_variants))
+                    compare_streams = []
+                    for column, label in zip(compare_columns, compare_variants):
+                        column.markdown(f"**{label}**")
+                        compare_streams.append(StreamAccumulator(StreamRenderer(column.empty(), fps=render_fps)))
+                    
+                    with st.spinner("🆚 모델별 응답 생성 중..."):
+                        compare_errors = stream_comparison(compare_llms, messages, compare_streams)
+                    
+                    for idx, error in compare_errors.items():
+                        compare_columns[idx].error(f"오류 발생: {error}")
+                    
+                    # 모델별 지연 시간 / 처리량 / 토큰 비교
+                    compare_rows = []
+                    for label, compare_stream in zip(compare_variants, compare_streams):
+                        stats = compare_stream.stats()
+                        compare_rows.append({
+                            "모델": label,
+                            "TTFT (s)": round(stats["ttft"], 2) if stats["ttft"] is not None else None,
+                            "전체 시간 (s)": round(stats["total"], 2),
+                            "토큰/초": round(stats["tokens_per_sec"], 1) if stats["tokens_per_sec"] else None,
+                            "입력 토큰": stats["input_tokens"],
+                            "출력 토큰": stats["output_tokens"],
+                            "reasoning_tokens": stats["reasoning_tokens"],
+                        })
+                    st.dataframe(compare_rows, hide_index=True, use_container_width=True)
+                    if use_tools:
+                        st.info("💡 비교 모드에서는 Function Calling을 사용하지 않습니다.")
+                
                 # 스트리밍 모드 (툴 호출 제외)
-                if streaming and not use_tools:
+                elif streaming and not use_tools:
                     with st.spinner("🔄 응답 생성 중..."):
-                        response_placeholder = st.empty()
-                        chunks = []
+                        # 청크는 받는 즉시 합산하고 보관하지 않음 (텍스트는 renderer 버퍼에만 쌓임)
+                        stream = StreamAccumulator(StreamRenderer(st.empty(), fps=render_fps))
+                        
+                        # JSON 응답이면 받는 대로 이어서 파싱하고 완성된 필드부터 검증
+                        monitor = None
+                        if response_format_type != "text":
+                            monitor = StructuredOutputMonitor(output_validator)
+                            with st.expander("🌳 JSON 파싱 결과", expanded=True):
+                                tree_placeholder = st.empty()
+                            tree_rendered = 0.0
                         
-                        for chunk in llm.stream(messages):
-                            chunks.append(chunk)
-                            full_response += chunk.content
-                            response_placeholder.markdown(full_response + "▌")
+                        chunks = stream_cached(llm, messages, completion_cache, cache_key, stream_usage=True)
+                        try:
+                            for chunk in chunks:
+                                content = stream.add(chunk)
+                                if monitor and content:
+                                    if monitor.feed(content) and abort_on_invalid:
+                                        aborted = True
+                                        break
+                                    now = time.monotonic()
+                                    if monitor.value is not None and now - tree_rendered >= 1 / render_fps:
+                                        tree_placeholder.json(monitor.value)
+                                        tree_rendered = now
+                        finally:
+                            # 중단하면 연결을 닫아 남은 토큰 생성을 멈춤 (중단된 응답은 캐시하지 않음)
+                            chunks.close()
                         
-                        response_placeholder.markdown(full_response)
+                        full_response = stream.close()
+                        if monitor:
+                            if monitor.value is not None:
+                                tree_placeholder.json(monitor.value)
+                            render_json_validation(monitor, aborted)
                         
                         # 디버깅 정보
                         if not full_response:
-                            st.error(f"❌ 응답이 비어있습니다! 총 {len(chunks)}개 청크 수신, content 길이: {sum(len(c.content) for c in chunks)}")
+                            st.error(f"❌ 응답이 비어있습니다! 총 {stream.chunks}개 청크 수신, content 길이: {stream.content_chars}")
                         
-                        # 마지막 청크에서 메타데이터 추출
-                        for i in range(len(chunks)-1, -1, -1):
-                            chunk = chunks[i]
-                            if hasattr(chunk, 'response_metadata') and chunk.response_metadata:
-                                response = chunk
-                                break
+                        # 메타데이터가 있는 마지막 청크
+                        response = stream.response
                 else:
                     # 일반 모드 (invoke)
                     # reasoning 사용 여부 확인
@@ -397,178 +682,139 @@ else:
                     spinner_msg = "🧠 추론 중..." if use_reasoning else "💬 응답 생성 중..."
                     
                     with st.spinner(spinner_msg):
-                        response = llm.invoke(messages)
+                        response = invoke_cached(llm, messages, completion_cache, cache_key)
+                        stream.add_response(response)
                         full_response = response.content  # invoke 모드에서도 설정
                     
-                    # Function Calling 처리
+                    # Function Calling 처리 (모델이 함수 호출을 멈출 때까지 라운드 반복)
                     if hasattr(response, 'tool_calls') and response.tool_calls:
-                        st.success("🔧 모델이 함수 호출을 요청했습니다.")
-                        for i, tc in enumerate(response.tool_calls, 1):
-                            with st.expander(f"함수 호출 #{i}: {tc.get('name', 'unknown')}"):
-                                st.json(tc)
+                        from langchain_core.messages import AIMessage, ToolMessage
                         
-                        # 더미 함수 실행 시뮬레이션
-                        st.divider()
-                        st.subheader("🔄 함수 실행 및 최종 응답")
+                        tool_registry = get_tool_registry()
+                        # 두 번째 라운드부터는 tool_choice=auto (required면 호출이 끝나지 않음)
+                        followup_llm = get_chat_model(api_key, model, **sampling_params, **{**model_kwargs, "tool_choice": "auto"})
                         
-                        # Mock 함수 정의 (실제 환경에서는 API 호출로 대체)
-                        def get_current_weather(location, unit="fahrenheit"):
-                            import json
-                            if "seoul" in location.lower():
-                                return json.dumps({"location": "Seoul", "temperature": "10", "unit": unit})
-                            elif "san francisco" in location.lower():
-                                return json.dumps({"location": "San Francisco", "temperature": "72", "unit": unit})
-                            elif "paris" in location.lower():
-                                return json.dumps({"location": "Paris", "temperature": "22", "unit": unit})
-                            else:
-                                return json.dumps({"location": location, "temperature": "unknown"})
+                        def generate(target_llm):
+                            # 스트리밍이면 청크를 합쳐 tool_calls까지 복원
+                            if not streaming:
+                                result = target_llm.invoke(messages)
+                                if result.content:
+                                    st.markdown(result.content)
+                                return result
+                            renderer = StreamRenderer(st.empty(), fps=render_fps)
+                            merged = None
+                            for chunk in target_llm.stream(messages):
+                                renderer.write(chunk.content)
+                                merged = chunk if merged is None else merged + chunk
+                            renderer.close()
+                            return merged or AIMessage(content="")
                         
-                        # 대화 히스토리에 AI 응답 추가
-                        from langchain_core.messages import AIMessage, ToolMessage
-                        messages.append(AIMessage(content="", tool_calls=response.tool_calls))
+                        st.divider()
+                        st.subheader("🔄 함수 실행 및 최종 응답")
                         
-                        # 각 함수 호출 실행 및 결과 수집
-                        for tc in response.tool_calls:
-                            function_name = tc.get('name')
-                            function_args = tc.get('args', {})
+                        tool_round = 0
+                        while response.tool_calls and tool_round < max_tool_rounds:
+                            tool_round += 1
+                            st.success(f"🔧 라운드 {tool_round}: 모델이 함수 {len(response.tool_calls)}개 호출을 요청했습니다.")
+                            messages.append(AIMessage(content=response.content or "", tool_calls=response.tool_calls))
                             
-                            st.info(f"▶️ 함수 실행: {function_name}({function_args})")
+                            # 한 라운드의 함수들은 동시에 실행 (지연 시간 = 가장 느린 함수)
+                            with st.spinner("▶️ 함수 실행 중..."):
+                                results = tool_registry.dispatch(response.tool_calls)
+                            for i, result in enumerate(results, 1):
+                                status = "⚠️" if result["error"] else ("💾" if result["cached"] else "▶️")
+                                with st.expander(f"{status} 함수 호출 #{i}: {result['name']}({result['args']}) · {result['elapsed']:.2f}s"):
+                                    st.code(result["content"], language='json')
+                                messages.append(ToolMessage(content=result["content"], tool_call_id=result["id"]))
                             
-                            # 더미 함수 호출
-                            if function_name == "get_current_weather":
-                                result = get_current_weather(**function_args)
-                                st.code(result, language='json')
-                                
-                                # 결과를 메시지에 추가
-                                messages.append(ToolMessage(
-                                    content=result,
-                                    tool_call_id=tc.get('id')
-                                ))
+                            st.info("🤖 함수 결과를 바탕으로 응답 생성 중...")
+                            response = generate(followup_llm)
+                            stream.add_response(response)
                         
-                        # 함수 실행 결과를 바탕으로 최종 응답 생성
-                        st.info("🤖 함수 결과를 바탕으로 최종 응답 생성 중...")
+                        if response.tool_calls:
+                            # 최대 라운드에 도달하면 tools 없이 지금까지의 결과로 최종 응답 생성
+                            st.warning(f"⚠️ 최대 함수 호출 라운드({max_tool_rounds})에 도달해 함수 없이 최종 응답을 생성합니다.")
+                            response = generate(get_chat_model(api_key, model, **sampling_params))
+                            stream.add_response(response)
                         
-                        # 기본 파라미터 재사용 (tools 제외)
-                        final_params = {k: v for k, v in llm_params.items() if k != 'model_kwargs'}
-                        final_llm = ChatUpstage(**final_params)
-                        
-                        if streaming:
-                            response_placeholder = st.empty()
-                            full_response = ""
-                            for chunk in final_llm.stream(messages):
-                                full_response += chunk.content
-                                response_placeholder.markdown(full_response + "▌")
-                            response_placeholder.markdown(full_response)
-                        else:
-                            final_response = final_llm.invoke(messages)
-                            st.markdown(final_response.content)
+                        full_response = response.content
                     
                     elif response.content:
                         st.markdown(response.content)
+                        if response_format_type != "text":
+                            monitor = StructuredOutputMonitor(output_validator)
+                            monitor.feed(response.content)
+                            render_json_validation(monitor)
                     else:
                         st.warning("응답 컨텐츠가 비어있습니다. 함수 호출만 발생했을 수 있습니다.")
                 
+                # 대화 기록에 이번 턴 추가 (비교 모드는 제외)
+                if keep_history and full_response and not compare_mode and not aborted:
+                    conversation.add_turn(user_message, full_response)
+                    conversation.record_usage(stream.usage)
+                
                 # 응답 메타데이터 표시
-                with st.expander("📝 전체 응답 로그"):
-                    if response:
-                        # 원본 response 객체를 dict로 변환
-                        import json
+                if not compare_mode:
+                    if stream.response and stream.response.response_metadata.get("cached"):
+                        st.caption("💾 캐시된 응답을 재생했습니다. (API 호출 없음)")
+                    with st.expander("📝 전체 응답 로그"):
+                        render_stream_stats(stream.stats())
                         
-                        # LangChain response 객체를 dict로 변환
-                        if hasattr(response, 'dict'):
-                            response_dict = response.dict()
-                        elif hasattr(response, 'model_dump'):
-                            response_dict = response.model_dump()
+                        if response:
+                            # 원본 response 객체를 dict로 변환
+                            import json
+                            
+                            # LangChain response 객체를 dict로 변환
+                            if hasattr(response, 'dict'):
+                                response_dict = response.dict()
+                            elif hasattr(response, 'model_dump'):
+                                response_dict = response.model_dump()
+                            else:
+                                response_dict = vars(response)
+                            
+                            # JSON 원문 표시
+                            st.code(json.dumps(response_dict, indent=2, ensure_ascii=False, default=str), language='json')
+                            
+                            # reasoning_tokens 표시 (편의 기능)
+                            metadata = response.response_metadata if hasattr(response, 'response_metadata') else {}
+                            token_usage = metadata.get('token_usage')
+                            if token_usage:
+                                completion_details = token_usage.get('completion_tokens_details') or {}
+                                reasoning_tokens = completion_details.get('reasoning_tokens')
+                                
+                                if reasoning_tokens:
+                                    st.success(f"🧠 reasoning_tokens: {reasoning_tokens:,}")
                         else:
-                            response_dict = vars(response)
+                            st.warning("⚠️ 응답 객체가 없습니다. 스트리밍 중 메타데이터를 받지 못했을 수 있습니다.")
+                            if full_response:
+                                st.info(f"생성된 응답: {full_response}")
                         
-                        # JSON 원문 표시
-                        st.code(json.dumps(response_dict, indent=2, ensure_ascii=False, default=str), language='json')
-                        
-                        # reasoning_tokens 표시 (편의 기능)
-                        metadata = response.response_metadata if hasattr(response, 'response_metadata') else {}
-                        token_usage = metadata.get('token_usage')
-                        if token_usage:
-                            completion_details = token_usage.get('completion_tokens_details', {})
-                            reasoning_tokens = completion_details.get('reasoning_tokens')
-                            
-                            if reasoning_tokens:
-                                st.success(f"🧠 reasoning_tokens: {reasoning_tokens:,}")
-                    else:
-                        st.warning("⚠️ 응답 객체가 없습니다. 스트리밍 중 메타데이터를 받지 못했을 수 있습니다.")
-                        if full_response:
-                            st.info(f"생성된 응답: {full_response}")
-                    
             except Exception as e:
                 st.error(f"오류 발생: {str(e)}")
+        
+        if keep_history:
+            with history_box:
+                turns = len(conversation.turns) // 2
+                with st.expander(f"🗂️ 대화 기록 ({turns}턴, 약 {conversation.history_tokens():,} 토큰)", expanded=False):
+                    if conversation.summary:
+                        st.caption(f"📌 이전 대화 요약: {conversation.summary}")
+                    for turn in conversation.turns:
+                        with st.chat_message("user" if turn["role"] == "human" else "assistant"):
+                            st.markdown(turn["content"])
+                    if conversation.prompt_tokens:
+                        st.caption(
+                            f"💾 누적 캐시된 입력 토큰: {conversation.cached_tokens:,} / {conversation.prompt_tokens:,} "
+                            f"({conversation.cached_tokens / conversation.prompt_tokens:.0%})"
+                            + (f" · 정리 {conversation.compactions}회" if conversation.compactions else "")
+                        )
+                    if st.button("🆕 새 대화", disabled=not conversation.turns):
+                        st.session_state.conversation = Conversation()
+                        st.rerun()
     
     with col_right:
         st.subheader("💻 생성된 코드")
         
-        # 실제 파라미터 구성
-        import json
-        
-        preview_params = {
-            "api_key": "YOUR_API_KEY",
-            "model": model,
-            "temperature": temperature,
-            "top_p": top_p,
-            "frequency_penalty": frequency_penalty,
-            "presence_penalty": presence_penalty,
-            "max_tokens": max_tokens
-        }
-        
-        preview_kwargs = {}
-        if reasoning_effort:
-            if model == "solar-pro3":
-                preview_kwargs["reasoning_effort"] = reasoning_effort
-            elif model == "solar-pro2":
-                preview_kwargs["reasoning_effort"] = reasoning_effort
-        
-        if response_format_type == "json_object":
-            preview_kwargs["response_format"] = {"type": "json_object"}
-        elif response_format_type == "json_schema" and json_schema_input:
-            try:
-                preview_kwargs["response_format"] = {
-                    "type": "json_schema",
-                    "json_schema": json.loads(json_schema_input)
-                }
-            except json.JSONDecodeError:
-                st.warning("⚠️ JSON Schema 파싱 오류")
-                preview_kwargs["response_format"] = {"type": "json_schema", "json_schema": {}}
-        
-        if use_tools and tools_input:
-            try:
-                preview_kwargs["tools"] = json.loads(tools_input)
-                preview_kwargs["tool_choice"] = tool_choice
-            except json.JSONDecodeError:
-                st.warning("⚠️ Tools JSON 파싱 오류")
-        
-        if prompt_cache_key:
-            preview_kwargs["prompt_cache_key"] = prompt_cache_key
-        
-        if preview_kwargs:
-            preview_params["model_kwargs"] = preview_kwargs
-        
-        # 코드 생성
-        params_str = json.dumps(preview_params, indent=4, ensure_ascii=False)
-        stream_code = "for chunk in llm.stream(messages):\n    print(chunk.content, end='', flush=True)" if streaming else "response = llm.invoke(messages)\nprint(response.content)"
-        
-        code = f'''from langchain_upstage import ChatUpstage
-
-# 파라미터 설정
-params = {params_str}
-
-# ChatUpstage 모델 초기화
-llm = ChatUpstage(**params)
-
-# 메시지 구성
-messages = [
-    ("system", """{system_prompt}"""),
-    ("human", """{user_message}""")
-]
-
-# {'스트리밍' if streaming else '일반'} 응답
-{stream_code}
-'''
+        # 요청 구성과 입력이 같으면 캐시된 코드 사용
+        history_turns = len(conversation.turns) // 2 if keep_history else 0
+        code = render_code(request_args, system_prompt, user_message, streaming, history_turns)
         st.code(code, language='python')
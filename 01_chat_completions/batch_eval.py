@@ -0,0 +1,228 @@
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import queue
+import threading
+from pathlib import Path
+
+from shared.async_loop import submit
+from shared.parse_cache import DEFAULT_CACHE_DIR
+from shared.streaming import StreamAccumulator
+from conversation import estimate_tokens
+
+# 실행별 결과 파일 ({run_key}.jsonl)을 두는 곳
+DEFAULT_RESULTS_DIR = DEFAULT_CACHE_DIR / "batch-eval"
+
+RESULT_FIELDS = [
+    "id", "system", "user", "output", "latency", "ttft",
+    "input_tokens", "output_tokens", "reasoning_tokens", "cached_tokens", "error",
+]
+
+
+def load_prompts(name, data, default_system=""):
+    """JSONL / CSV 평가 데이터를 [{"id", "system", "user"}, ...]로 변환
+
+    - JSONL: 줄마다 {"user", "system"(선택), "id"(선택)} 객체
+    - CSV: user, system(선택), id(선택) 열
+    - system이 비어 있으면 default_system, id가 없으면 행 번호(1부터) 사용
+    """
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    if name.lower().endswith(".csv"):
+        records = list(csv.DictReader(io.StringIO(text)))
+    else:
+        records = []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{line_no}번째 줄 JSON 파싱 오류: {e}") from e
+
+    prompts = []
+    seen = set()
+    for idx, record in enumerate(records, 1):
+        if not isinstance(record, dict) or not str(record.get("user") or "").strip():
+            raise ValueError(f"{idx}번째 행에 user가 없습니다.")
+        row_id = str(record.get("id") or idx)
+        if row_id in seen:
+            raise ValueError(f"중복된 id: {row_id}")
+        seen.add(row_id)
+        prompts.append({"id": row_id, "system": record.get("system") or default_system, "user": str(record["user"])})
+    return prompts
+
+
+def batch_run_key(model, params, prompts):
+    """모델 + 요청 파라미터 + 평가 데이터가 같으면 같은 키 (같은 결과 파일에 이어서 기록)"""
+    payload = {
+        "model": model,
+        "params": {key: value for key, value in params.items() if value is not None and key != "prompt_cache_key"},
+        "prompts": prompts,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class BatchResults:
+    """행별 결과를 JSONL 파일에 한 줄씩 덧붙이는 저장소
+
+    - 행이 끝날 때마다 바로 기록하므로 중간에 멈춰도 다시 열면 성공한 행은 건너뛰고 이어서 실행
+    - 같은 id가 여러 번 기록되면 마지막 결과 사용 (실패한 행을 다시 실행한 경우)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._rows = {}
+        self._lock = threading.Lock()
+        self._needs_newline = False
+        if self.path.exists():
+            text = self.path.read_text(encoding="utf-8")
+            for line in text.splitlines():
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    # 기록 도중 중단된 마지막 줄
+                    continue
+                self._rows[row["id"]] = row
+            self._needs_newline = bool(text) and not text.endswith("\n")
+
+    def completed_ids(self):
+        with self._lock:
+            return {row_id for row_id, row in self._rows.items() if not row.get("error")}
+
+    def rows(self, prompts=None):
+        """기록된 결과 (prompts를 넘기면 그 순서대로, 결과가 있는 행만)"""
+        with self._lock:
+            if prompts is None:
+                return list(self._rows.values())
+            return [self._rows[prompt["id"]] for prompt in prompts if prompt["id"] in self._rows]
+
+    def add(self, row):
+        line = json.dumps(row, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._needs_newline:
+                    f.write("\n")
+                    self._needs_newline = False
+                f.write(line)
+            self._rows[row["id"]] = row
+
+    def reset(self):
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+            self._rows.clear()
+            self._needs_newline = False
+
+
+def _round(value, digits=3):
+    return round(value, digits) if value is not None else None
+
+
+async def _run_row(llm, prompt, semaphore, limiter, reserve):
+    async with semaphore:
+        if limiter:
+            await limiter.acquire_async(reserve)
+        # 대기 시간은 빼고 요청 시작부터 측정
+        stream = StreamAccumulator()
+        error = None
+        try:
+            async for chunk in llm.astream([("system", prompt["system"]), ("human", prompt["user"])], stream_usage=True):
+                stream.add(chunk)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        stats = stream.stats()
+        if limiter:
+            used = (stats["input_tokens"] or 0) + (stats["output_tokens"] or 0)
+            if used:
+                limiter.adjust(used - reserve)
+    return {
+        **prompt,
+        "output": stream.text,
+        "latency": _round(stats["total"]),
+        "ttft": _round(stats["ttft"]),
+        "input_tokens": stats["input_tokens"],
+        "output_tokens": stats["output_tokens"],
+        "reasoning_tokens": stats["reasoning_tokens"],
+        "cached_tokens": stats["cached_tokens"],
+        "error": error,
+    }
+
+
+def run_batch(llm, prompts, results, concurrency=8, limiter=None, reserve_output=0):
+    """아직 성공하지 않은 행만 백그라운드 이벤트 루프에서 동시에 실행하고, 끝나는 순서대로 결과 행을 yield
+
+    - concurrency: 동시에 진행하는 최대 요청 수
+    - limiter: 분당 토큰 한도용 RateLimiter. 요청마다 (입력 추정 + reserve_output) 토큰을 예약하고 응답 후 실제 사용량으로 정산
+    - 결과는 끝나는 즉시 results(BatchResults)에 기록되므로 중간에 멈춰도 다시 실행하면 이어서 처리
+    - 제너레이터를 닫으면 (화면 재실행 / 중단) 남은 요청을 취소하고 취소가 끝날 때까지 기다림
+    """
+    done = results.completed_ids()
+    pending = [prompt for prompt in prompts if prompt["id"] not in done]
+    if not pending:
+        return
+    events = queue.SimpleQueue()
+
+    async def run_one(prompt, semaphore):
+        reserve = estimate_tokens(prompt["system"]) + estimate_tokens(prompt["user"]) + reserve_output
+        if limiter:
+            reserve = min(reserve, limiter.burst)
+        row = await _run_row(llm, prompt, semaphore, limiter, reserve)
+        results.add(row)
+        events.put(row)
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(concurrency)
+        try:
+            await asyncio.gather(*(run_one(prompt, semaphore) for prompt in pending))
+        finally:
+            events.put(None)
+
+    future = submit(run_all())
+    try:
+        while True:
+            row = events.get()
+            if row is None:
+                break
+            yield row
+        future.result()
+    finally:
+        if not future.done():
+            future.cancel()
+            # 취소된 요청이 모두 정리될 때까지 기다려서 제너레이터를 닫은 뒤에는 결과 파일에 기록되지 않게 함
+            while events.get() is not None:
+                pass
+
+
+def summarize_results(rows):
+    """성공 / 실패 수, 지연 시간 p50 / p95, 토큰 합계"""
+    succeeded = [row for row in rows if not row.get("error")]
+    latencies = sorted(row["latency"] for row in succeeded if row.get("latency") is not None)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else None
+
+    return {
+        "rows": len(rows),
+        "succeeded": len(succeeded),
+        "failed": len(rows) - len(succeeded),
+        "latency_p50": percentile(0.5),
+        "latency_p95": percentile(0.95),
+        "input_tokens": sum(row.get("input_tokens") or 0 for row in succeeded),
+        "output_tokens": sum(row.get("output_tokens") or 0 for row in succeeded),
+        "reasoning_tokens": sum(row.get("reasoning_tokens") or 0 for row in succeeded),
+    }
+
+
+def results_to_csv(rows):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+def results_to_jsonl(rows):
+    return "".join(json.dumps({field: row.get(field) for field in RESULT_FIELDS}, ensure_ascii=False) + "\n" for row in rows)
@@ -0,0 +1,50 @@
+import queue
+
+from shared.async_loop import submit
+
+# 비교 대상: (모델, reasoning_effort)
+COMPARE_VARIANTS = {
+    "solar-pro3 · low": ("solar-pro3", "low"),
+    "solar-pro3 · medium": ("solar-pro3", "medium"),
+    "solar-pro3 · high": ("solar-pro3", "high"),
+    "solar-pro2 · minimal": ("solar-pro2", "minimal"),
+    "solar-pro2 · high": ("solar-pro2", "high"),
+    "solar-mini": ("solar-mini", None),
+}
+
+DEFAULT_VARIANTS = ["solar-pro3 · medium", "solar-pro2 · minimal", "solar-mini"]
+
+
+async def _forward(idx, llm, messages, events):
+    # 네트워크 I/O만 백그라운드 루프에서 처리하고 청크는 큐로 넘김
+    try:
+        async for chunk in llm.astream(messages, stream_usage=True):
+            events.put((idx, chunk))
+    except Exception as e:
+        events.put((idx, e))
+        return
+    events.put((idx, None))
+
+
+def stream_comparison(llms, messages, accumulators):
+    """같은 메시지를 여러 모델에 동시에 astream으로 보내고 청크를 각 StreamAccumulator에 누적
+
+    - 요청은 백그라운드 이벤트 루프에서 동시에 진행되고, 누적 / 화면 갱신은 호출한 스크립트 스레드에서 처리
+    - 반환: {인덱스: 예외} (실패한 모델만)
+    """
+    events = queue.SimpleQueue()
+    for idx, llm in enumerate(llms):
+        submit(_forward(idx, llm, messages, events))
+
+    errors = {}
+    remaining = len(llms)
+    while remaining:
+        idx, item = events.get()
+        if item is None or isinstance(item, Exception):
+            remaining -= 1
+            if item is not None:
+                errors[idx] = item
+            accumulators[idx].close()
+        else:
+            accumulators[idx].add(item)
+    return errors
@@ -0,0 +1,173 @@
+import json
+
+import streamlit as st
+from jsonschema import Draft202012Validator, validators
+from jsonschema.exceptions import SchemaError, ValidationError
+
+# response_format.json_schema 형식 ({"name", "strict", "schema"})
+RESPONSE_SCHEMA_FORMAT = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "minLength": 1},
+        "strict": {"type": "boolean"},
+        "schema": {"type": "object"},
+    },
+    "required": ["name", "schema"],
+}
+
+# tools 형식 (function 정의 목록)
+TOOLS_FORMAT = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "type": {"const": "function"},
+            "function": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "minLength": 1},
+                    "description": {"type": "string"},
+                    "parameters": {"type": "object"},
+                },
+                "required": ["name"],
+            },
+        },
+        "required": ["type", "function"],
+    },
+}
+
+_response_schema_validator = Draft202012Validator(RESPONSE_SCHEMA_FORMAT)
+_tools_validator = Draft202012Validator(TOOLS_FORMAT)
+
+
+def _error_message(error):
+    path = "/".join(str(part) for part in error.absolute_path)
+    return f"{path}: {error.message}" if path else error.message
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def parse_response_schema(text):
+    """JSON Schema 입력을 파싱 / 검증. (response_format.json_schema, 오류 메시지) 반환
+
+    같은 문자열은 한 번만 파싱하고 검증 (재실행마다 json.loads 하지 않음)
+    """
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError as e:
+        return None, f"JSON Schema 파싱 오류: {e}"
+    error = next(_response_schema_validator.iter_errors(value), None)
+    if error:
+        return None, f"JSON Schema 형식 오류: {_error_message(error)}"
+    try:
+        validators.validator_for(value["schema"]).check_schema(value["schema"])
+    except SchemaError as e:
+        return None, f"JSON Schema 오류: {_error_message(e)}"
+    return value, None
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def parse_tools(text):
+    """Tools 입력을 파싱 / 검증. (tools 목록, 오류 메시지) 반환"""
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError as e:
+        return None, f"Tools JSON 파싱 오류: {e}"
+    error = next(_tools_validator.iter_errors(value), None)
+    if error:
+        return None, f"Tools 형식 오류: {_error_message(error)}"
+    for tool in value:
+        parameters = tool["function"].get("parameters")
+        if parameters:
+            try:
+                validators.validator_for(parameters).check_schema(parameters)
+            except SchemaError as e:
+                return None, f"Tools 파라미터 스키마 오류 ({tool['function']['name']}): {_error_message(e)}"
+    return value, None
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def get_output_validator(text):
+    """응답 JSON을 검증할 컴파일된 validator (스키마 문자열별로 한 번만 생성, 오류가 있으면 None)"""
+    value, error = parse_response_schema(text)
+    if error:
+        return None
+    schema = value["schema"]
+    return validators.validator_for(schema)(schema)
+
+
+def validate_output(validator, text):
+    """응답 문자열이 스키마를 만족하면 None, 아니면 오류 메시지"""
+    try:
+        validator.validate(json.loads(text))
+    except json.JSONDecodeError as e:
+        return f"JSON 파싱 오류: {e}"
+    except ValidationError as e:
+        return _error_message(e)
+    return None
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_request(model, sampling_params, reasoning_effort=None, response_format_type="text", json_schema_text=None,
+                  tools_text=None, tool_choice="auto", prompt_cache_key=None):
+    """실행과 코드 미리보기가 함께 쓰는 요청 구성 (같은 입력이면 캐시된 결과의 사본 반환)
+
+    반환: {"model", "sampling_params", "model_kwargs", "errors"}
+    - model_kwargs: reasoning_effort, response_format, tools / tool_choice, prompt_cache_key
+    - errors: 스키마 / tools 파싱·검증 오류 (있으면 해당 항목은 model_kwargs에서 제외)
+    """
+    model_kwargs = {}
+    errors = []
+    if reasoning_effort and model in ("solar-pro3", "solar-pro2"):
+        model_kwargs["reasoning_effort"] = reasoning_effort
+
+    if response_format_type == "json_object":
+        model_kwargs["response_format"] = {"type": "json_object"}
+    elif response_format_type == "json_schema" and json_schema_text:
+        parsed_schema, error = parse_response_schema(json_schema_text)
+        if error:
+            errors.append(error)
+        else:
+            model_kwargs["response_format"] = {"type": "json_schema", "json_schema": parsed_schema}
+
+    if tools_text:
+        parsed_tools, error = parse_tools(tools_text)
+        if error:
+            errors.append(error)
+        else:
+            model_kwargs["tools"] = parsed_tools
+            model_kwargs["tool_choice"] = tool_choice
+
+    if prompt_cache_key:
+        model_kwargs["prompt_cache_key"] = prompt_cache_key
+
+    return {"model": model, "sampling_params": dict(sampling_params), "model_kwargs": model_kwargs, "errors": errors}
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_code(request_args, system_prompt, user_message, streaming, history_turns=0):
+    """build_request(**request_args)로 ChatUpstage 예제 코드 생성 (같은 입력이면 다시 만들지 않음)"""
+    request = build_request(**request_args)
+    preview_params = {"api_key": "YOUR_API_KEY", "model": request["model"], **request["sampling_params"]}
+    if request["model_kwargs"]:
+        preview_params["model_kwargs"] = request["model_kwargs"]
+
+    params_str = json.dumps(preview_params, indent=4, ensure_ascii=False)
+    stream_code = "for chunk in llm.stream(messages):\n    print(chunk.content, end='', flush=True)" if streaming else "response = llm.invoke(messages)\nprint(response.content)"
+
+    return f'''from langchain_upstage import ChatUpstage
+
+# 파라미터 설정
+params = {params_str}
+
+# ChatUpstage 모델 초기화
+llm = ChatUpstage(**params)
+
+# 메시지 구성{f" (이전 대화 {history_turns}턴 생략)" if history_turns else ""}
+messages = [
+    ("system", """{system_prompt}"""),
+    ("human", """{user_message}""")
+]
+
+# {'스트리밍' if streaming else '일반'} 응답
+{stream_code}
+'''
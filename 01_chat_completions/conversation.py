@@ -0,0 +1,82 @@
+import uuid
+
+# 모델별 컨텍스트 길이 (토큰)
+MODEL_CONTEXT = {"solar-pro3": 65536, "solar-pro2": 65536, "solar-mini": 32768}
+
+SUMMARY_PROMPT = (
+    "다음은 사용자와 AI 어시스턴트의 이전 대화입니다. 이후 대화에 필요한 사실, 결정, 요청 사항만 "
+    "간결하게 한국어로 요약하세요.\n\n{history}"
+)
+
+
+def estimate_tokens(text):
+    # 토크나이저 없이 근사 (영문은 약 4자, 한글 등은 약 1.5자당 1토큰)
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii * 2 // 3 + 1
+
+
+class Conversation:
+    """st.session_state에 보관하는 멀티턴 대화 기록
+
+    - 대화마다 고정된 prompt_cache_key를 사용해 같은 접두부(시스템 프롬프트 + 이전 대화)가 캐시되도록 함
+    - 예산을 넘으면 오래된 턴을 한 번에 예산의 compact_ratio까지 줄임 (매 턴 조금씩 자르면 접두부가 계속 바뀌어 캐시가 깨짐)
+    - summarize(text)가 주어지면 잘라낸 턴을 요약해 시스템 메시지 뒤에 붙임
+    """
+
+    def __init__(self, compact_ratio=0.5):
+        self.id = uuid.uuid4().hex[:12]
+        self.turns = []
+        self.summary = ""
+        self.compact_ratio = compact_ratio
+        self.compactions = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    @property
+    def cache_key(self):
+        return f"chat-{self.id}"
+
+    def history_tokens(self):
+        return sum(turn["tokens"] for turn in self.turns) + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def add_turn(self, user_message, assistant_message):
+        for role, content in (("human", user_message), ("ai", assistant_message)):
+            self.turns.append({"role": role, "content": content, "tokens": estimate_tokens(content)})
+
+    def record_usage(self, usage):
+        """응답의 usage_metadata에서 입력 / 캐시 적중 토큰 누적"""
+        if not usage:
+            return
+        self.prompt_tokens += usage.get("input_tokens") or 0
+        self.cached_tokens += (usage.get("input_token_details") or {}).get("cache_read") or 0
+
+    def compact(self, budget, reserved=0, summarize=None):
+        """대화 기록 + reserved(이번 시스템 프롬프트 / 사용자 메시지)가 budget을 넘으면 오래된 턴을 정리"""
+        if self.history_tokens() + reserved <= budget:
+            return False
+
+        target = max(0, int(budget * self.compact_ratio) - reserved)
+        kept = 0
+        cut = len(self.turns)
+        # 최근 턴부터 target 안에 들어가는 만큼 유지 (human/ai 쌍 단위)
+        while cut >= 2 and kept + self.turns[cut - 2]["tokens"] + self.turns[cut - 1]["tokens"] <= target:
+            cut -= 2
+            kept += self.turns[cut]["tokens"] + self.turns[cut + 1]["tokens"]
+
+        dropped, self.turns = self.turns[:cut], self.turns[cut:]
+        if summarize and dropped:
+            history = "\n".join(f"{'사용자' if t['role'] == 'human' else 'AI'}: {t['content']}" for t in dropped)
+            if self.summary:
+                history = f"(이전 요약) {self.summary}\n{history}"
+            self.summary = summarize(SUMMARY_PROMPT.format(history=history))
+        self.compactions += 1
+        return True
+
+    def messages(self, system_prompt, user_message):
+        """시스템 프롬프트 → (요약) → 이전 대화 → 이번 메시지 순서의 메시지 목록"""
+        messages = [("system", system_prompt)]
+        if self.summary:
+            messages.append(("system", f"이전 대화 요약: {self.summary}"))
+        messages.extend((turn["role"], turn["content"]) for turn in self.turns)
+        messages.append(("human", user_message))
+        return messages
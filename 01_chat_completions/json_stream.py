@@ -0,0 +1,266 @@
+import json
+import time
+
+# 아직 값이 다 오지 않았을 수 있어 스트리밍 중에는 무시하는 검증 키워드 (최종 검증에서 확인)
+DEFERRED_KEYWORDS = {
+    "required", "minItems", "minProperties", "minContains", "contains",
+    "dependentRequired", "dependencies", "anyOf", "oneOf", "not",
+}
+# 값 전체를 봐야 판단할 수 있어 아직 열린 객체 / 배열에서는 무시하는 키워드
+WHOLE_VALUE_KEYWORDS = {
+    "const", "enum", "uniqueItems", "maxContains", "unevaluatedProperties", "unevaluatedItems",
+}
+# 아직 오지 않은 필드에 따라 적용 여부가 바뀌는 하위 스키마: 이 아래에서 나온 위반은 최종 검증에서만 확인
+CONDITIONAL_KEYWORDS = {"then", "else", "dependentSchemas", "dependencies"}
+
+LITERALS = {"true": True, "false": False, "null": None}
+NUMBER_CHARS = set("0123456789+-.eE")
+
+
+class IncrementalJSONParser:
+    """스트리밍 청크를 이어서 받는 JSON 파서 (이미 받은 부분은 다시 파싱하지 않음)
+
+    - value: 지금까지 완성된 값으로 만든 부분 트리 (열린 객체 / 배열은 포함, 진행 중인 문자열 / 숫자는 제외)
+    - completed: 완성된 값(스칼라, 닫힌 객체 / 배열) 개수
+    - done: 최상위 값이 끝났는지, error: 문법 오류 메시지 (오류 후 입력은 무시)
+    - 앞뒤의 ``` 코드 펜스는 허용
+    """
+
+    def __init__(self):
+        self.value = None
+        self.completed = 0
+        self.done = False
+        self.error = None
+        self.chars = 0
+        self._stack = []
+        self._keys = []
+        self._expect = "start"
+        self._token = None
+        self._buf = []
+        self._escape = False
+        self._is_key = False
+        self._skip_line = False
+
+    def feed(self, text):
+        """청크를 이어서 파싱. 오류가 있으면 오류 메시지 반환"""
+        for ch in text:
+            if self.error:
+                break
+            self.chars += 1
+            self._consume(ch)
+        return self.error
+
+    def finish(self):
+        """스트림이 끝났을 때 남은 숫자 / 리터럴을 마무리하고 최종 오류 반환"""
+        if not self.error and self._token in ("number", "literal"):
+            self._finish_scalar()
+        if not self.error and not self.done:
+            self.error = "JSON이 끝나지 않았습니다."
+        return self.error
+
+    def is_open(self, value):
+        """value가 아직 닫히지 않은 객체 / 배열인지 (열린 컨테이너의 상위도 모두 열려 있음)"""
+        return any(value is container for container in self._stack)
+
+    def _fail(self, message):
+        self.error = f"{message} ({self.chars}번째 문자)"
+
+    def _consume(self, ch):
+        if self._skip_line:
+            self._skip_line = ch != "\n"
+            return
+
+        if self._token == "string":
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._finish_string()
+                return
+            self._buf.append(ch)
+            return
+
+        if self._token in ("number", "literal"):
+            if (self._token == "number" and ch in NUMBER_CHARS) or (self._token == "literal" and ch.isalpha()):
+                self._buf.append(ch)
+                return
+            self._finish_scalar()
+            if self.error:
+                return
+
+        if ch.isspace():
+            return
+
+        expect = self._expect
+        if expect in ("start", "done") and ch == "`":
+            # 코드 펜스(```json) 줄은 건너뜀
+            self._skip_line = True
+        elif expect == "done":
+            self._fail("JSON 뒤에 추가 출력이 있습니다")
+        elif expect in ("start", "value", "value_or_end"):
+            if ch == "{":
+                self._open({})
+                self._expect = "key_or_end"
+            elif ch == "[":
+                self._open([])
+                self._expect = "value_or_end"
+            elif ch == '"':
+                self._start("string", is_key=False)
+            elif ch == "-" or ch.isdigit():
+                self._start("number", ch)
+            elif ch in "tfn":
+                self._start("literal", ch)
+            elif ch == "]" and expect == "value_or_end":
+                self._close()
+            else:
+                self._fail(f"값이 와야 할 위치에 '{ch}'")
+        elif expect in ("key", "key_or_end"):
+            if ch == '"':
+                self._start("string", is_key=True)
+            elif ch == "}" and expect == "key_or_end":
+                self._close()
+            else:
+                self._fail(f"키가 와야 할 위치에 '{ch}'")
+        elif expect == "colon":
+            if ch == ":":
+                self._expect = "value"
+            else:
+                self._fail(f"':'이 와야 할 위치에 '{ch}'")
+        elif expect == "comma_or_end":
+            top = self._stack[-1]
+            if ch == ",":
+                self._expect = "key" if isinstance(top, dict) else "value"
+            elif (ch == "}" and isinstance(top, dict)) or (ch == "]" and isinstance(top, list)):
+                self._close()
+            else:
+                self._fail(f"',' 또는 닫는 괄호가 와야 할 위치에 '{ch}'")
+
+    def _start(self, token, first=None, is_key=False):
+        self._token = token
+        self._buf = [first] if first else []
+        self._escape = False
+        self._is_key = is_key
+
+    def _finish_string(self):
+        self._token = None
+        try:
+            text = json.loads('"' + "".join(self._buf) + '"', strict=False)
+        except json.JSONDecodeError:
+            self._fail("잘못된 문자열 이스케이프")
+            return
+        if self._is_key:
+            self._keys[-1] = text
+            self._expect = "colon"
+        else:
+            self._complete(text)
+
+    def _finish_scalar(self):
+        token, raw = self._token, "".join(self._buf)
+        self._token = None
+        if token == "literal":
+            if raw not in LITERALS:
+                self._fail(f"알 수 없는 값 '{raw}'")
+                return
+            self._complete(LITERALS[raw])
+            return
+        try:
+            self._complete(json.loads(raw))
+        except json.JSONDecodeError:
+            self._fail(f"잘못된 숫자 '{raw}'")
+
+    def _attach(self, value):
+        if not self._stack:
+            self.value = value
+            return
+        top = self._stack[-1]
+        if isinstance(top, dict):
+            top[self._keys[-1]] = value
+        else:
+            top.append(value)
+
+    def _open(self, container):
+        # 열린 컨테이너도 바로 트리에 붙여서 부분 결과로 보여줌
+        self._attach(container)
+        self._stack.append(container)
+        self._keys.append(None)
+
+    def _close(self):
+        self._stack.pop()
+        self._keys.pop()
+        self._after_value()
+
+    def _complete(self, value):
+        self._attach(value)
+        self._after_value()
+
+    def _after_value(self):
+        self.completed += 1
+        self._expect = "comma_or_end" if self._stack else "done"
+        self.done = not self._stack
+
+
+class StructuredOutputMonitor:
+    """스트리밍 중인 JSON 응답을 이어서 파싱하고, 완성된 필드 기준으로 스키마 위반을 조기에 감지
+
+    - validator: 컴파일된 jsonschema validator (없으면 JSON 문법만 확인)
+    - feed(): 청크를 넣고 문법 오류 / 확정된 스키마 위반 메시지 반환 (없으면 None)
+    - 스키마 검증은 새로 완성된 값이 있을 때 최대 interval초에 한 번만 수행
+    - 필수 필드 누락(required), 열린 객체 / 배열의 enum / const, if/then/else 같이
+      나머지 출력에 따라 달라질 수 있는 위반은 finish()에서 확인
+    """
+
+    def __init__(self, validator=None, interval=0.2):
+        self.parser = IncrementalJSONParser()
+        self.validator = validator
+        self.interval = interval
+        self.violation = None
+        self._checked = 0
+        self._last_check = 0.0
+
+    @property
+    def value(self):
+        return self.parser.value
+
+    def feed(self, text):
+        if self.violation:
+            return self.violation
+        error = self.parser.feed(text)
+        if error:
+            self.violation = f"JSON 문법 오류: {error}"
+            return self.violation
+        now = time.monotonic()
+        if self.validator and self.parser.completed > self._checked and (self.parser.done or now - self._last_check >= self.interval):
+            self._checked = self.parser.completed
+            self._last_check = now
+            self.violation = self._first_error(deferred=not self.parser.done)
+        return self.violation
+
+    def finish(self):
+        """스트림이 끝난 뒤 전체 검증 (오류 메시지 또는 None)"""
+        if self.violation:
+            return self.violation
+        error = self.parser.finish()
+        if error:
+            self.violation = f"JSON 문법 오류: {error}"
+        elif self.validator:
+            self.violation = self._first_error(deferred=False)
+        return self.violation
+
+    def _is_final(self, error):
+        # 스트리밍 중에도 확정된 위반인지 (이후 출력으로 바뀔 수 없는지)
+        if error.validator in DEFERRED_KEYWORDS:
+            return False
+        if CONDITIONAL_KEYWORDS.intersection(str(part) for part in error.absolute_schema_path):
+            return False
+        if error.validator in WHOLE_VALUE_KEYWORDS:
+            return not self.parser.is_open(error.instance)
+        return True
+
+    def _first_error(self, deferred):
+        for error in self.validator.iter_errors(self.parser.value):
+            if deferred and not self._is_final(error):
+                continue
+            path = "/".join(str(part) for part in error.absolute_path)
+            return f"스키마 위반: {path + ': ' if path else ''}{error.message}"
+        return None
@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Mock 함수의 외부 API 호출 지연 흉내 (초)
+MOCK_LATENCY = 0.3
+
+
+class ToolRegistry:
+    """Function Calling용 함수 등록 / 병렬 실행기
+
+    - register(): 함수와 JSON 스키마, 타임아웃, 결과 캐시 여부를 등록 (데코레이터로도 사용 가능)
+    - dispatch(): 한 턴의 tool_calls를 스레드 풀에서 동시에 실행하므로 지연 시간은 가장 느린 함수 기준
+    - cacheable로 등록한 함수는 (이름, 인자)별 결과를 LRU로 재사용
+    - 타임아웃, 예외, 등록되지 않은 함수는 {"error": ...} JSON으로 돌려줘 모델이 이어서 판단하게 함
+    """
+
+    def __init__(self, max_workers=8, cache_size=256):
+        self._tools = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, name, func=None, description="", parameters=None, timeout=10.0, cacheable=False):
+        if func is None:
+            return lambda f: self.register(name, f, description, parameters, timeout, cacheable) or f
+        self._tools[name] = {
+            "func": func,
+            "timeout": timeout,
+            "cacheable": cacheable,
+            "schema": {
+                "type": "function",
+                "function": {
+                    "name": name,
+                    "description": description,
+                    "parameters": parameters or {"type": "object", "properties": {}},
+                },
+            },
+        }
+
+    @property
+    def names(self):
+        return list(self._tools)
+
+    def schemas(self, names=None):
+        """tools 파라미터로 보낼 함수 정의 목록"""
+        return [self._tools[name]["schema"] for name in (names or self._tools)]
+
+    def _cache_key(self, name, args):
+        return name, json.dumps(args, sort_keys=True, ensure_ascii=False)
+
+    def _cache_get(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+            return None
+
+    def _cache_set(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _call(self, name, args):
+        result = self._tools[name]["func"](**args)
+        return result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+
+    def dispatch(self, tool_calls):
+        """tool_calls를 동시에 실행하고 호출 순서대로 결과 반환
+
+        결과: {"id", "name", "args", "content", "elapsed", "cached", "error"}
+        """
+        started = time.perf_counter()
+        pending = []
+        results = []
+        for tc in tool_calls:
+            name, args = tc.get("name"), tc.get("args") or {}
+            result = {"id": tc.get("id"), "name": name, "args": args, "content": None,
+                      "elapsed": 0.0, "cached": False, "error": None}
+            results.append(result)
+            tool = self._tools.get(name)
+            if tool is None:
+                result["error"] = f"등록되지 않은 함수: {name}"
+                continue
+            if tool["cacheable"]:
+                cached = self._cache_get(self._cache_key(name, args))
+                if cached is not None:
+                    result.update(content=cached, cached=True)
+                    continue
+            pending.append((result, tool, self._executor.submit(self._call, name, args)))
+
+        # 모두 동시에 시작했으므로 각 함수의 마감 시각은 시작 시각 + 타임아웃
+        for result, tool, future in pending:
+            try:
+                result["content"] = future.result(timeout=max(0.0, started + tool["timeout"] - time.perf_counter()))
+                if tool["cacheable"]:
+                    self._cache_set(self._cache_key(result["name"], result["args"]), result["content"])
+            except FutureTimeoutError:
+                # 실행 중인 스레드는 중단할 수 없으므로 결과만 버림
+                future.cancel()
+                result["error"] = f"시간 초과 ({tool['timeout']}s)"
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["elapsed"] = time.perf_counter() - started
+
+        for result in results:
+            if result["error"]:
+                result["content"] = json.dumps({"error": result["error"]}, ensure_ascii=False)
+        return results
+
+    def cache_stats(self):
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+# Mock 함수 (실제 환경에서는 API 호출이나 DB 쿼리로 대체)
+
+WEATHER = {
+    "seoul": {"location": "Seoul", "temperature": "10"},
+    "san francisco": {"location": "San Francisco", "temperature": "72"},
+    "paris": {"location": "Paris", "temperature": "22"},
+}
+
+TIMEZONES = {"seoul": 9, "san francisco": -8, "paris": 1}
+
+
+def get_current_weather(location, unit="fahrenheit"):
+    time.sleep(MOCK_LATENCY)
+    for city, weather in WEATHER.items():
+        if city in location.lower():
+            return {**weather, "unit": unit}
+    return {"location": location, "temperature": "unknown"}
+
+
+def get_local_time(location):
+    time.sleep(MOCK_LATENCY)
+    for city, offset in TIMEZONES.items():
+        if city in location.lower():
+            local = time.gmtime(time.time() + offset * 3600)
+            return {"location": location, "local_time": time.strftime("%Y-%m-%d %H:%M", local), "utc_offset": offset}
+    return {"location": location, "local_time": "unknown"}
+
+
+def default_registry():
+    """예시 함수(날씨, 현지 시각)를 등록한 레지스트리"""
+    registry = ToolRegistry()
+    registry.register(
+        "get_current_weather", get_current_weather,
+        description="Get the current weather in a given location",
+        parameters={
+            "type": "object",
+            "properties": {
+                "location": {"type": "string", "description": "The city and state, e.g. San Francisco, CA"},
+                "unit": {"type": "string", "enum": ["celsius", "fahrenheit"]},
+            },
+            "required": ["location"],
+        },
+        timeout=5.0,
+        cacheable=True,
+    )
+    # 현재 시각은 호출할 때마다 달라지므로 캐시하지 않음
+    registry.register(
+        "get_local_time", get_local_time,
+        description="Get the current local date and time in a given location",
+        parameters={
+            "type": "object",
+            "properties": {
+                "location": {"type": "string", "description": "The city, e.g. Seoul"},
+            },
+            "required": ["location"],
+        },
+        timeout=5.0,
+    )
+    return registry
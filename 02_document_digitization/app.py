@@ -1,10 +1,21 @@
 import streamlit as st
-import requests
-import json
-from pdf2image import convert_from_bytes
-from PIL import Image, ImageDraw
-import io
-import base64
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from shared.parse_cache import ParseCache, make_cache_key
+from shared.page_images import PageImageProvider
+from shared.http_client import get_http_client
+from shared.instrumentation import render_metrics_sidebar
+from shared.document_parse import (
+    DOCUMENT_PARSE_URL, OCR_URL, DocumentParseClient, DocumentParseError, parse_document_in_chunks, run_ocr_by_page
+)
+from shared.rate_limit import RateLimiter
+from batch import BatchArchive, expand_uploads, run_batch
+from crops import ElementCropStore, crop_element, draw_overlay
+from export import ResultExporter, export_filename, export_mime, has_text
+from pipeline import ELEMENT_CATEGORIES, build_ocr_data, build_parse_data, process_document
 
 st.set_page_config(page_title="Document Digitization", page_icon="📄", layout="wide")
 
@@ -28,8 +39,416 @@ st.markdown("""
 
 st.title("📄 Document Digitization Lab")
 
+
+@st.cache_resource
+def get_parse_cache():
+    # 프로세스 전체에서 하나의 캐시 인스턴스 공유 (hit/miss 카운터 유지)
+    return ParseCache()
+
+
+@st.cache_resource
+def get_ocr_cache():
+    # OCR 결과는 페이지 해시 단위로 별도 namespace에 저장
+    return ParseCache(namespace="ocr-pages", max_bytes=200 * 1024 * 1024)
+
+
+def cache_caption(stats):
+    return (
+        f"적중 {stats['hits']} / 미적중 {stats['misses']} "
+        f"({stats['hit_rate']:.0%}) · {stats['entries']}개 · "
+        f"{stats['bytes'] / 1024 / 1024:.1f}MB / {stats['max_bytes'] / 1024 / 1024:.0f}MB"
+    )
+
+
+def get_page_images(uploaded_file):
+    # 같은 업로드 파일이면 rerun 사이에서 provider(렌더링된 페이지 캐시 포함) 재사용
+    cached = st.session_state.get("page_images")
+    if cached is None or cached[0] != uploaded_file.file_id:
+        provider = PageImageProvider(uploaded_file, uploaded_file.name.split('.')[-1])
+        st.session_state["page_images"] = (uploaded_file.file_id, provider)
+        return provider
+    return cached[1]
+
+
+def load_page_image(page_images, page_num, zoom=False):
+    # 현재 페이지만 래스터화 (실패하면 경고 후 None)
+    try:
+        return page_images.get_page(page_num, zoom=zoom)
+    except Exception as e:
+        st.warning(f"PDF 변환 실패: {e}. poppler 설치 필요")
+        return None
+
+
+def render_page_image(page_images, page_num, zoom=False, elements=None):
+    # elements가 주어지면 요소 바운딩 박스를 한 번에 겹쳐 그림
+    page_image = load_page_image(page_images, page_num, zoom=zoom)
+    if page_image is not None:
+        if elements:
+            page_image = draw_overlay(page_image, elements)
+        st.image(page_image, width='stretch')
+    else:
+        st.info("이미지 미리보기 불가")
+
+
+ELEMENT_ICONS = {
+    "table": "📊", "figure": "🖼️", "chart": "📈",
+    "heading1": "📌", "header": "🔝", "footer": "🔽",
+    "caption": "💬", "paragraph": "📝", "equation": "🔢",
+    "list": "📋", "index": "🔖", "footnote": "📎"
+}
+
+
+def group_elements_by_page(elements):
+    # 결과당 한 번만 계산해 두고 rerun 때는 현재 페이지 요소만 꺼내 씀
+    elements_by_page = {}
+    for elem in elements:
+        elements_by_page.setdefault(elem.get("page", 1), []).append(elem)
+    return dict(sorted(elements_by_page.items()))
+
+
+def save_result(uploaded_file, api_type, output_format, result, spill_crops=True):
+    # 이전 결과의 crop 임시 파일 정리
+    previous = st.session_state.get("doc_result")
+    if previous:
+        previous["crops"].close()
+        previous["exporter"].close()
+    
+    # base64 crop 이미지는 결과에서 떼어내 필요할 때만 디코딩
+    crops = ElementCropStore(spill=spill_crops)
+    crops.ingest(result)
+    
+    # 결과는 session_state에 보관해서 페이지 이동 등으로 rerun되어도 유지
+    st.session_state["doc_result"] = {
+        "file_id": uploaded_file.file_id,
+        "api_type": api_type,
+        "output_format": output_format,
+        "result": result,
+        "elements_by_page": group_elements_by_page(result.get("elements", [])),
+        "crops": crops,
+        "exporter": ResultExporter(result, prepare=crops.restore),
+    }
+    for key in ("doc_page", "ocr_page"):
+        st.session_state.pop(key, None)
+
+
+def run_parse_job(uploaded_file, api_key):
+    # st.session_state["parse_job"]의 비동기 작업을 제출(또는 재개)하고 완료되면 결과 반환
+    job = st.session_state["parse_job"]
+    progress = st.progress(0.0, text="비동기 작업 제출 중...")
+    
+    def on_submit(request_id):
+        job["request_id"] = request_id
+    
+    def on_progress(completed_pages, total_pages, status):
+        ratio = completed_pages / total_pages if total_pages else 0.0
+        progress.progress(ratio, text=f"{status.get('status', '')}: {completed_pages}/{total_pages or '?'} 페이지 완료")
+    
+    try:
+        result = DocumentParseClient(api_key).parse(
+            uploaded_file.name, uploaded_file, job["data"],
+            request_id=job["request_id"], on_submit=on_submit, on_progress=on_progress
+        )
+    except DocumentParseError:
+        # 작업 자체가 실패한 경우에는 다시 폴링하지 않도록 정리 (네트워크 오류는 유지해서 재개)
+        st.session_state.pop("parse_job", None)
+        raise
+    if job["cache_key"]:
+        get_parse_cache().set(job["cache_key"], result)
+    del st.session_state["parse_job"]
+    return result
+
+
+def page_navigator(page_numbers, key):
+    # 페이지 선택 + 이전/다음 버튼. 선택된 페이지 번호 반환
+    if st.session_state.get(key) not in page_numbers:
+        st.session_state[key] = page_numbers[0]
+    
+    def move(step):
+        idx = page_numbers.index(st.session_state[key]) + step
+        st.session_state[key] = page_numbers[max(0, min(idx, len(page_numbers) - 1))]
+    
+    current_idx = page_numbers.index(st.session_state[key])
+    col_prev, col_select, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        st.button("◀ 이전", key=f"{key}_prev", on_click=move, args=(-1,), disabled=current_idx == 0)
+    with col_select:
+        st.selectbox(
+            "페이지",
+            page_numbers,
+            key=key,
+            format_func=lambda p: f"📄 페이지 {p} ({page_numbers.index(p) + 1}/{len(page_numbers)})",
+            label_visibility="collapsed"
+        )
+    with col_next:
+        st.button("다음 ▶", key=f"{key}_next", on_click=move, args=(1,), disabled=current_idx == len(page_numbers) - 1)
+    return st.session_state[key]
+
+
+def render_parse_result(uploaded_file, doc_result, zoom_preview, show_boxes):
+    output_format = doc_result["output_format"]
+    elements_by_page = doc_result["elements_by_page"]
+    crops = doc_result["crops"]
+    st.success(f"✅ 완료! {sum(len(v) for v in elements_by_page.values())}개 요소 추출")
+    
+    if not elements_by_page:
+        st.warning("추출된 요소가 없습니다.")
+        return
+    
+    # 원본 이미지는 페이지를 표시할 때만 래스터화
+    page_images = get_page_images(uploaded_file)
+    
+    # 현재 페이지의 요소만 렌더링
+    page_num = page_navigator(list(elements_by_page), "doc_page")
+    st.markdown(f"## 📄 페이지 {page_num}")
+    
+    col_left, col_right = st.columns([1, 1])
+    
+    with col_left:
+        st.markdown("### 📎 원본")
+        render_page_image(page_images, page_num, zoom=zoom_preview, elements=elements_by_page[page_num] if show_boxes else None)
+    
+    with col_right:
+        st.markdown("### 📝 파싱 결과")
+        
+        # 카테고리별로 묶어서 표시 (페이지 내 등장 순서 유지)
+        by_category = {}
+        for idx, elem in enumerate(elements_by_page[page_num]):
+            by_category.setdefault(elem.get("category", "unknown"), []).append((idx, elem))
+        
+        for category, items in by_category.items():
+            icon = ELEMENT_ICONS.get(category, "📄")
+            st.markdown(f"**{icon} {category}** ({len(items)})")
+            
+            for idx, elem in items:
+                content = elem.get("content", {}).get(output_format, "")
+                if not content:
+                    continue
+                
+                elem_id = elem.get("id", idx)
+                with st.expander(f"{icon} {category} #{idx+1}"):
+                    # Base64 이미지는 켰을 때만 디코딩
+                    crop_key = crops.element_key(elem)
+                    if crop_key is not None:
+                        if st.toggle("🖼️ 이미지 보기", key=f"crop_{elem_id}"):
+                            try:
+                                st.image(crops.get_image(crop_key), caption=f"{category} 이미지", use_container_width=True)
+                            except Exception as e:
+                                st.warning(f"Base64 디코딩 실패: {e}")
+                    # base64가 없으면 좌표로 원본 페이지에서 직접 잘라냄
+                    elif elem.get("coordinates") and page_images.supported:
+                        if st.toggle("🖼️ 이미지 보기 (로컬 crop)", key=f"crop_{elem_id}"):
+                            page_image = load_page_image(page_images, page_num, zoom=True)
+                            cropped = crop_element(page_image, elem) if page_image is not None else None
+                            if cropped is not None:
+                                st.image(cropped, caption=f"{category} 이미지", use_container_width=True)
+                    
+                    if output_format == "html":
+                        st.markdown(content, unsafe_allow_html=True)
+                    elif output_format == "markdown":
+                        st.markdown(content, unsafe_allow_html=True)
+                    else:
+                        st.text(content)
+                    
+                    # 원문 JSON은 켰을 때만 전송
+                    if st.toggle("원문 데이터", key=f"raw_{elem_id}"):
+                        st.json(elem)
+
+
+def render_ocr_result(uploaded_file, doc_result, zoom_preview):
+    output_format = doc_result["output_format"]
+    result = doc_result["result"]
+    pages = result.get("pages", [])
+    st.success(f"✅ 완료! {len(pages)}페이지 OCR")
+    
+    # 디버그: 원본 응답 확인 (켰을 때만 전송)
+    if st.toggle("🔍 API 응답 원문 확인", key="ocr_raw_response"):
+        st.json(result)
+    
+    # 원본 이미지는 페이지를 표시할 때만 래스터화
+    page_images = get_page_images(uploaded_file)
+    
+    if not page_images.supported:
+        st.info("이미지 미리보기를 사용할 수 없습니다. 텍스트 결과만 표시됩니다.")
+    
+    if not pages:
+        st.warning("OCR 결과가 비어있습니다.")
+        return
+    
+    page_idx = page_navigator(list(range(1, len(pages) + 1)), "ocr_page")
+    page_data = pages[page_idx - 1]
+    st.markdown(f"## 📄 페이지 {page_idx}")
+    
+    col_left, col_right = st.columns([1, 1])
+    
+    with col_left:
+        st.markdown("### 📎 원본 이미지")
+        render_page_image(page_images, page_idx, zoom=zoom_preview)
+    
+    with col_right:
+        st.markdown("### 🔍 OCR 결과")
+        
+        # 여러 가능한 키 확인
+        text_content = page_data.get(output_format) or page_data.get("text") or page_data.get("content", {}).get(output_format, "")
+        
+        if not text_content:
+            st.warning(f"페이지 {page_idx}에 추출된 텍스트가 없습니다.")
+            with st.expander("페이지 데이터 확인"):
+                st.json(page_data)
+        elif output_format == "html":
+            st.components.v1.html(text_content, height=600, scrolling=True)
+        elif output_format == "markdown":
+            st.markdown(text_content, unsafe_allow_html=True)
+        else:
+            st.text_area("텍스트", text_content, height=600, key=f"ocr_text_{page_idx}")
+
+
+def render_downloads(doc_result):
+    # 다운로드 파일은 버튼을 눌렀을 때 생성하고, 결과별로 한 번만 만든 파일을 재사용
+    output_format = doc_result["output_format"]
+    exporter = doc_result["exporter"]
+    
+    st.divider()
+    st.markdown("### 💾 다운로드")
+    opt1, opt2 = st.columns(2)
+    with opt1:
+        compact = st.checkbox("압축 JSON (들여쓰기 없음)", key="export_compact")
+    with opt2:
+        gzip_output = st.checkbox("gzip 압축", key="export_gzip")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if has_text(doc_result["result"], output_format):
+            st.download_button(
+                f"📥 {output_format.upper()} 다운로드",
+                lambda: exporter.read(output_format, gzip_output=gzip_output),
+                export_filename("result", output_format, gzip_output),
+                mime=export_mime(output_format, gzip_output),
+                width='stretch'
+            )
+        else:
+            st.info("다운로드할 내용이 없습니다.")
+    
+    with col2:
+        st.download_button(
+            "📥 JSON 다운로드",
+            lambda: exporter.read("json", compact=compact, gzip_output=gzip_output),
+            export_filename("result", "json", gzip_output),
+            mime=export_mime("json", gzip_output),
+            width='stretch'
+        )
+    
+    with col3:
+        st.download_button(
+            "📥 JSON Lines 다운로드",
+            lambda: exporter.read("jsonl", gzip_output=gzip_output),
+            export_filename("result", "jsonl", gzip_output),
+            mime=export_mime("jsonl", gzip_output),
+            help="요소(OCR은 페이지)마다 한 줄씩 기록",
+            width='stretch'
+        )
+
+
+def render_batch(uploaded_files, api_key, api_type, data, output_format, max_workers, rate_per_sec, bypass_cache):
+    items = expand_uploads(uploaded_files or [])
+    if not items:
+        st.info("📦 처리할 파일을 업로드하세요. zip 파일은 내부의 지원 형식 파일을 모두 처리합니다.")
+        return
+    
+    # 옵션이 바뀌면 이전 일괄 처리 상태(결과 zip 포함)를 새로 시작
+    batch_key = make_cache_key(api_type.encode("utf-8"), {**data, "output_format": output_format})
+    batch = st.session_state.get("batch")
+    if batch is None or batch["key"] != batch_key:
+        if batch:
+            batch["archive"].close()
+        batch = st.session_state["batch"] = {"key": batch_key, "archive": BatchArchive(output_format), "statuses": {}}
+    statuses = batch["statuses"]
+    
+    names = [name for name, _ in items]
+    succeeded = [n for n in names if statuses.get(n, {}).get("status") == "success"]
+    failed = [n for n in names if statuses.get(n, {}).get("status") == "failed"]
+    remaining = [n for n in names if n not in statuses]
+    st.caption(f"📦 {len(items)}개 파일 · 완료 {len(succeeded)} · 실패 {len(failed)} · 대기 {len(remaining)}")
+    
+    col_run, col_retry = st.columns([2, 1])
+    with col_run:
+        run_clicked = st.button(f"🚀 일괄 실행 ({len(remaining)}개)", type="primary", disabled=not remaining)
+    with col_retry:
+        retry_targets = st.multiselect("재시도할 실패 파일", failed, default=failed, disabled=not failed)
+        retry_clicked = st.button("🔁 선택 파일 재시도", disabled=not retry_targets)
+    
+    targets = remaining if run_clicked else retry_targets if retry_clicked else []
+    if targets:
+        archive = batch["archive"]
+        limiter = RateLimiter(rate_per_sec)
+        cache = get_parse_cache()
+        ocr_cache = get_ocr_cache()
+        
+        def process(filename, document):
+            # 워커 스레드에서 실행 (Streamlit 호출 금지)
+            return process_document(
+                api_key, filename, document, data,
+                parse_cache=cache, ocr_cache=ocr_cache, bypass=bypass_cache, limiter=limiter
+            )
+        
+        progress = st.progress(0.0, text="일괄 처리 시작...")
+        throughput = st.empty()
+        started = time.perf_counter()
+        done = {"files": 0, "pages": 0}
+        
+        def on_done(name, outcome):
+            if outcome["status"] == "success":
+                archive.add(name, outcome.pop("result"))
+                done["pages"] += outcome["pages"]
+            statuses[name] = outcome
+            done["files"] += 1
+            elapsed = time.perf_counter() - started
+            progress.progress(done["files"] / len(targets), text=f"{done['files']}/{len(targets)} 파일 완료")
+            throughput.caption(f"⏱️ {elapsed:.1f}s · {done['pages']}페이지 · {done['pages'] / elapsed:.2f} pages/sec")
+        
+        run_batch([item for item in items if item[0] in targets], process, max_workers=max_workers, on_done=on_done)
+        st.rerun()
+    
+    if statuses:
+        st.dataframe(
+            [
+                {
+                    "파일": name,
+                    "상태": "✅ 완료" if s["status"] == "success" else "❌ 실패",
+                    "페이지": s.get("pages", 0),
+                    "소요 시간(s)": round(s["elapsed"], 2),
+                    "오류": s.get("error", ""),
+                }
+                for name, s in statuses.items()
+            ],
+            width='stretch'
+        )
+    
+    if succeeded and batch["archive"].path:
+        with open(batch["archive"].path, "rb") as f:
+            st.download_button("📥 결과 zip 다운로드", f, "results.zip", "application/zip", width='stretch')
+
+
 api_key = st.sidebar.text_input("Upstage API Key", type="password")
 
+# Document Parse 응답 캐시 + OCR 페이지 캐시
+parse_cache = get_parse_cache()
+ocr_cache = get_ocr_cache()
+with st.sidebar.expander("🗃️ 응답 캐시", expanded=False):
+    bypass_cache = st.checkbox("캐시 사용 안 함", value=False, help="체크하면 캐시를 무시하고 항상 API를 호출합니다 (결과는 캐시에 갱신)")
+    st.caption(f"**Document Parse** · {cache_caption(parse_cache.stats())}")
+    ocr_cache_mb = st.number_input(
+        "OCR 페이지 캐시 최대 크기 (MB)", min_value=10, max_value=10000, value=200, step=50,
+        help="초과하면 가장 오래 조회되지 않은 페이지부터 삭제"
+    )
+    ocr_cache.max_bytes = int(ocr_cache_mb) * 1024 * 1024
+    st.caption(f"**OCR 페이지** · {cache_caption(ocr_cache.stats())}")
+    if st.button("캐시 비우기"):
+        parse_cache.clear()
+        ocr_cache.clear()
+        st.rerun()
+render_metrics_sidebar()
+
 if not api_key:
     st.warning("왼쪽 사이드바에서 API Key를 입력해주세요.")
     st.info("💡 [Console](https://console.upstage.ai)에서 API Key 발급")
@@ -44,11 +463,21 @@ else:
     
     st.divider()
     
+    batch_mode = st.toggle("📦 일괄 처리", value=False, help="여러 파일(또는 zip)을 한 번에 처리하고 결과를 zip으로 내려받습니다")
+    
     # 파일 업로드
-    uploaded_file = st.file_uploader(
-        "📤 문서 업로드",
-        type=["pdf", "jpg", "jpeg", "png", "bmp", "docx", "pptx", "xlsx"]
-    )
+    if batch_mode:
+        uploaded_file = None
+        uploaded_files = st.file_uploader(
+            "📤 문서 업로드 (여러 파일 또는 zip)",
+            type=["pdf", "jpg", "jpeg", "png", "bmp", "docx", "pptx", "xlsx", "zip"],
+            accept_multiple_files=True
+        )
+    else:
+        uploaded_file = st.file_uploader(
+            "📤 문서 업로드",
+            type=["pdf", "jpg", "jpeg", "png", "bmp", "docx", "pptx", "xlsx"]
+        )
     
     # 설정
     if api_type == "📄 Document Parse":
@@ -65,8 +494,14 @@ else:
         with col4:
             base64_encoding = st.multiselect(
                 "Base64 인코딩", 
-                ["table", "figure", "chart", "heading1", "header", "footer", "caption", "paragraph", "equation", "list", "index", "footnote"],
-                help="선택한 카테고리의 요소를 원본 문서에서 잘라낸 이미지로 추출"
+                ELEMENT_CATEGORIES,
+                help="선택한 카테고리의 요소를 원본 문서에서 잘라낸 이미지로 추출 (좌표만 받아도 요소 이미지는 로컬에서 잘라 볼 수 있어 응답 크기를 줄일 수 있음)"
+            )
+            spill_crops = st.checkbox(
+                "이미지 임시 파일로 분리",
+                value=True,
+                disabled=not base64_encoding,
+                help="Base64 이미지를 결과에서 떼어내 임시 디렉토리에 저장합니다 (메모리 절약). 이미지는 보기를 켰을 때만 디코딩됩니다"
             )
         
         st.markdown("#### 베타 옵션")
@@ -77,224 +512,163 @@ else:
             chart_recognition = st.checkbox("차트 인식 (Beta)", value=True, help="차트를 표로 변환")
         with col7:
             merge_multipage_tables = st.checkbox("다중 페이지 표 병합 (Beta)", value=False, help="여러 페이지 표를 하나로 병합 (enhanced 모드에서 20페이지 제한)")
+        
+        if batch_mode:
+            parse_strategy = "동기"
+            split_pages = False
+        else:
+            st.markdown("#### 대용량 문서 옵션")
+            parse_strategy = st.radio(
+                "처리 방식",
+                ["동기", "페이지 분할 병렬", "비동기"],
+                horizontal=True,
+                help="동기: 한 번의 요청 | 페이지 분할 병렬: PDF를 페이지 범위로 나눠 동시에 요청 후 병합 (청크 경계를 넘는 표는 병합되지 않음) | 비동기: 작업 제출 후 진행 상황 폴링 (연결이 끊겨도 이어서 확인)"
+            )
+            split_pages = parse_strategy == "페이지 분할 병렬"
+            col8, col9, col10 = st.columns(3)
+            with col8:
+                pages_per_chunk = st.number_input("청크당 페이지 수", min_value=1, max_value=100, value=10, disabled=not split_pages)
+            with col9:
+                max_workers = st.number_input("동시 요청 수", min_value=1, max_value=16, value=4, disabled=not split_pages)
+            with col10:
+                max_retries = st.number_input("청크별 재시도 횟수", min_value=0, max_value=5, value=2, disabled=not split_pages)
     else:
         schema = st.selectbox("스키마", ["None", "clova", "google"], help="Clova 또는 Google OCR API 응답 형식으로 변환 (선택사항)")
         schema = None if schema == "None" else schema
         output_format = "text"
         ocr = "force"
         mode = None
+        spill_crops = False
+        parse_strategy = "동기"
+        split_pages = False
+    
+    if batch_mode:
+        st.markdown("#### 일괄 처리 옵션")
+        col_b1, col_b2 = st.columns(2)
+        with col_b1:
+            batch_workers = st.number_input("동시 처리 파일 수", min_value=1, max_value=16, value=4)
+        with col_b2:
+            batch_rate = st.number_input("초당 최대 요청 수", min_value=0.1, max_value=50.0, value=2.0, step=0.5, help="모든 워커가 공유하는 전체 요청 속도 제한")
+    
+    zoom_preview = st.sidebar.checkbox(
+        "🔍 고해상도 미리보기",
+        value=False,
+        help="원본 미리보기를 썸네일(72 DPI) 대신 150 DPI로 렌더링합니다"
+    )
+    show_boxes = st.sidebar.checkbox(
+        "📐 요소 영역 표시",
+        value=True,
+        help="좌표가 있으면 원본 미리보기에 요소 바운딩 박스를 카테고리별 색으로 표시합니다"
+    )
+    
+    # API 엔드포인트 및 요청 파라미터
+    if api_type == "📄 Document Parse":
+        url = DOCUMENT_PARSE_URL
+        data = build_parse_data(output_format, ocr, coordinates, mode, chart_recognition, merge_multipage_tables, base64_encoding)
+    else:
+        url = OCR_URL
+        data = build_ocr_data(schema)
+    
+    if batch_mode:
+        render_batch(uploaded_files, api_key, api_type, data, output_format, int(batch_workers), batch_rate, bypass_cache)
     
     if uploaded_file and st.button("🚀 실행", type="primary", width='stretch'):
         with st.spinner(f"{'📄 파싱' if api_type == '📄 Document Parse' else '🔍 OCR'} 중..."):
             try:
-                # API 엔드포인트
+                headers = {"Authorization": f"Bearer {api_key}"}
+                # 업로드 파일 객체를 그대로 스트리밍 전송 (getvalue() 복사본을 만들지 않음)
+                uploaded_file.seek(0)
+                files = {"document": (uploaded_file.name, uploaded_file)}
+                
+                # 같은 파일 + 같은 옵션이면 캐시된 응답 재사용 (Document Parse만)
+                result = None
+                cache_key = None
+                use_split = split_pages and uploaded_file.name.lower().endswith(".pdf")
                 if api_type == "📄 Document Parse":
-                    url = "https://api.upstage.ai/v1/document-ai/document-parse"
-                    data = {
-                        "model": "document-parse",
-                        "ocr": ocr,
-                        "output_formats": f"['{output_format}']",
-                        "coordinates": str(coordinates).lower(),
-                        "mode": mode,
-                        "chart_recognition": str(chart_recognition).lower(),
-                        "merge_multipage_tables": str(merge_multipage_tables).lower()
-                    }
-                    if base64_encoding:
-                        data["base64_encoding"] = str(base64_encoding).replace("'", '"')
-                else:
-                    url = "https://api.upstage.ai/v1/document-ai/ocr"
-                    data = {"model": "ocr"}
-                    if schema:
-                        data["schema"] = schema
+                    cache_options = {**data, "pages_per_chunk": pages_per_chunk} if use_split else data
+                    cache_key = make_cache_key(uploaded_file, cache_options)
+                    if not bypass_cache:
+                        result = parse_cache.get(cache_key)
+                        if result is not None:
+                            st.info("⚡ 캐시된 결과를 사용합니다 (API 호출 생략)")
                 
-                headers = {"Authorization": f"Bearer {api_key}"}
-                files = {"document": (uploaded_file.name, uploaded_file.getvalue())}
+                if result is None and use_split:
+                    # 페이지 범위 청크를 병렬로 요청하고 결과 병합
+                    progress = st.progress(0.0, text="청크 요청 중...")
+                    try:
+                        result = parse_document_in_chunks(
+                            api_key, uploaded_file.name, uploaded_file, data,
+                            pages_per_chunk=int(pages_per_chunk),
+                            max_workers=int(max_workers),
+                            max_retries=int(max_retries),
+                            on_progress=lambda done, total: progress.progress(done / total, text=f"청크 {done}/{total} 완료")
+                        )
+                        parse_cache.set(cache_key, result)
+                    except DocumentParseError as e:
+                        st.error(f"❌ API 오류 ({e.status_code})")
+                        st.code(e.text)
+                
+                elif result is None and api_type == "📄 Document Parse" and parse_strategy == "비동기":
+                    # 작업 id를 session_state에 저장하고 폴링 (rerun/재접속 시 재제출 없이 이어서 폴링)
+                    st.session_state["parse_job"] = {
+                        "request_id": None,
+                        "file_id": uploaded_file.file_id,
+                        "output_format": output_format,
+                        "cache_key": cache_key,
+                        "data": data,
+                    }
+                    result = run_parse_job(uploaded_file, api_key)
                 
-                response = requests.post(url, headers=headers, data=data, files=files)
+                elif result is None and api_type == "🔍 Document OCR":
+                    # 페이지 해시 단위 캐시: 바뀐 페이지만 OCR 요청하고 나머지는 캐시에서 재조립
+                    try:
+                        result, page_stats = run_ocr_by_page(
+                            api_key, uploaded_file.name, uploaded_file, data, ocr_cache, bypass=bypass_cache
+                        )
+                        if page_stats["cached"]:
+                            st.info(f"⚡ {page_stats['cached']}페이지는 캐시 사용, {page_stats['sent']}페이지만 OCR 요청")
+                    except DocumentParseError as e:
+                        st.error(f"❌ API 오류 ({e.status_code})")
+                        st.code(e.text)
                 
-                if response.status_code == 200:
-                    result = response.json()
+                elif result is None:
+                    response = get_http_client().post(url, headers=headers, data=data, files=files)
                     
-                    # Document Parse
-                    if api_type == "📄 Document Parse":
-                        elements = result.get("elements", [])
-                        st.success(f"✅ 완료! {len(elements)}개 요소 추출")
-                        
-                        # 원본 이미지 준비
-                        file_bytes = uploaded_file.getvalue()
-                        file_ext = uploaded_file.name.split('.')[-1].lower()
-                        
-                        images = None
-                        if file_ext == 'pdf':
-                            try:
-                                images = convert_from_bytes(file_bytes, dpi=150)
-                            except Exception as e:
-                                st.warning(f"PDF 변환 실패: {e}. poppler 설치 필요")
-                        elif file_ext in ['jpg', 'jpeg', 'png', 'bmp']:
-                            try:
-                                images = [Image.open(io.BytesIO(file_bytes))]
-                            except Exception as e:
-                                st.warning(f"이미지 로드 실패: {e}")
-                        
-                        if not elements:
-                            st.warning("추출된 요소가 없습니다.")
-                        
-                        if 'selected_elem' not in st.session_state:
-                            st.session_state.selected_elem = None
-                        
-                        pages = sorted(set(e.get("page", 1) for e in elements))
-                        
-                        for page_num in pages:
-                            st.markdown(f"## 📄 페이지 {page_num}")
-                            
-                            page_elements = [e for e in elements if e.get("page") == page_num]
-                            
-                            col_left, col_right = st.columns([1, 1])
-                            
-                            with col_left:
-                                st.markdown("### 📎 원본")
-                                if images and page_num <= len(images):
-                                    st.image(images[page_num - 1], width='stretch')
-                                else:
-                                    st.info("이미지 미리보기 불가")
-                            
-                            with col_right:
-                                st.markdown("### 📝 파싱 결과")
-                                for idx, elem in enumerate(page_elements):
-                                    category = elem.get("category", "unknown")
-                                    content = elem.get("content", {}).get(output_format, "")
-                                    
-                                    if content:
-                                        icons = {
-                                            "table": "📊", "figure": "🖼️", "chart": "📈", 
-                                            "heading1": "📌", "header": "🔝", "footer": "🔽",
-                                            "caption": "💬", "paragraph": "📝", "equation": "🔢",
-                                            "list": "📋", "index": "🔖", "footnote": "📎"
-                                        }
-                                        icon = icons.get(category, "📄")
-                                        
-                                        with st.expander(f"{icon} {category} #{idx+1}"):
-                                            # Base64 이미지 표시
-                                            if elem.get("base64_encoding"):
-                                                try:
-                                                    img_data = base64.b64decode(elem["base64_encoding"])
-                                                    img = Image.open(io.BytesIO(img_data))
-                                                    st.image(img, caption=f"{category} 이미지", use_container_width=True)
-                                                except Exception as e:
-                                                    st.warning(f"Base64 디코딩 실패: {e}")
-                                            
-                                            if output_format == "html":
-                                                st.markdown(content, unsafe_allow_html=True)
-                                            elif output_format == "markdown":
-                                                st.markdown(content, unsafe_allow_html=True)
-                                            else:
-                                                st.text(content)
-                                            
-                                            with st.expander("원문 데이터"):
-                                                st.json(elem)
-                            
-                            st.divider()
-                        
-                        # 다운로드
+                    if response.status_code == 200:
+                        result = response.json()
+                        if cache_key:
+                            parse_cache.set(cache_key, result)
                     else:
-                        pages = result.get("pages", [])
-                        st.success(f"✅ 완료! {len(pages)}페이지 OCR")
-                        
-                        # 디버그: 원본 응답 확인
-                        with st.expander("🔍 API 응답 원문 확인"):
-                            st.json(result)
-                        
-                                # 원본 이미지
-                        file_bytes = uploaded_file.getvalue()
-                        file_ext = uploaded_file.name.split('.')[-1].lower()
-                        
-                        images = None
-                        if file_ext == 'pdf':
-                            try:
-                                images = convert_from_bytes(file_bytes, dpi=150)
-                            except Exception as e:
-                                st.warning(f"PDF 변환 실패: {e}. poppler 설치 필요")
-                        elif file_ext in ['jpg', 'jpeg', 'png', 'bmp']:
-                            try:
-                                images = [Image.open(io.BytesIO(file_bytes))]
-                            except Exception as e:
-                                st.warning(f"이미지 로드 실패: {e}")
-                        
-                        if not images:
-                            st.info("이미지 미리보기를 사용할 수 없습니다. 텍스트 결과만 표시됩니다.")
-                        
-                        if not pages:
-                            st.warning("OCR 결과가 비어있습니다.")
-                        
-                        for page_idx, page_data in enumerate(pages, 1):
-                            st.markdown(f"## 📄 페이지 {page_idx}")
-                            
-                            col_left, col_right = st.columns([1, 1])
-                            
-                            with col_left:
-                                st.markdown("### 📎 원본 이미지")
-                                if images and page_idx <= len(images):
-                                    st.image(images[page_idx - 1], width='stretch')
-                                else:
-                                    st.info("이미지 미리보기 불가")
-                            
-                            with col_right:
-                                st.markdown("### 🔍 OCR 결과")
-                                
-                                # 여러 가능한 키 확인
-                                text_content = page_data.get(output_format) or page_data.get("text") or page_data.get("content", {}).get(output_format, "")
-                                
-                                if not text_content:
-                                    st.warning(f"페이지 {page_idx}에 추출된 텍스트가 없습니다.")
-                                    with st.expander("페이지 데이터 확인"):
-                                        st.json(page_data)
-                                elif output_format == "html":
-                                    st.components.v1.html(text_content, height=600, scrolling=True)
-                                elif output_format == "markdown":
-                                    st.markdown(text_content, unsafe_allow_html=True)
-                                else:
-                                    st.text_area("텍스트", text_content, height=600, key=f"ocr_text_{page_idx}")
-                            
-                            st.divider()
-                    
-                    # 다운로드
-                    st.markdown("### 💾 다운로드")
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        if api_type == "📄 Document Parse":
-                            full_content = "\n\n".join([e.get("content", {}).get(output_format, "") for e in elements if e.get("content", {}).get(output_format, "")])
-                        else:
-                            full_content = "\n\n".join([p.get(output_format, "") for p in pages if p.get(output_format, "")])
-                        
-                        if full_content.strip():
-                            st.download_button(
-                                f"📥 {output_format.upper()} 다운로드",
-                                full_content,
-                                f"result.{output_format}",
-                                width='stretch'
-                            )
-                        else:
-                            st.info("다운로드할 내용이 없습니다.")
-                    
-                    with col2:
-                        st.download_button(
-                            "📥 JSON 다운로드",
-                            json.dumps(result, ensure_ascii=False, indent=2),
-                            "result.json",
-                            width='stretch'
-                        )
+                        st.error(f"❌ API 오류 ({response.status_code})")
+                        st.code(response.text)
                 
-                else:
-                    st.error(f"❌ API 오류 ({response.status_code})")
-                    st.code(response.text)
+                if result is not None:
+                    save_result(uploaded_file, api_type, output_format, result, spill_crops)
             
             except Exception as e:
                 st.error(f"❌ 오류: {str(e)}")
                 import traceback
                 st.code(traceback.format_exc())
     
-    elif not uploaded_file:
+    # 진행 중이던 비동기 작업이 있으면 재제출하지 않고 폴링 재개
+    parse_job = st.session_state.get("parse_job")
+    if uploaded_file and parse_job and parse_job["file_id"] == uploaded_file.file_id and parse_job["request_id"]:
+        st.info(f"⏳ 진행 중인 비동기 작업을 이어서 확인합니다 (request_id: {parse_job['request_id']})")
+        try:
+            result = run_parse_job(uploaded_file, api_key)
+            save_result(uploaded_file, "📄 Document Parse", parse_job["output_format"], result, spill_crops)
+        except Exception as e:
+            st.error(f"❌ 오류: {str(e)}")
+    
+    doc_result = st.session_state.get("doc_result")
+    if uploaded_file and doc_result and doc_result["file_id"] == uploaded_file.file_id:
+        if doc_result["api_type"] == "📄 Document Parse":
+            render_parse_result(uploaded_file, doc_result, zoom_preview, show_boxes)
+        else:
+            render_ocr_result(uploaded_file, doc_result, zoom_preview)
+        render_downloads(doc_result)
+    
+    elif not uploaded_file and not batch_mode:
         col1, col2 = st.columns(2)
         
         with col1:
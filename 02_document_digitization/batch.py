@@ -0,0 +1,118 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import weakref
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path, PurePosixPath
+
+from shared.document_parse import count_pages
+
+from export import has_text, write_export
+
+SUPPORTED_EXTENSIONS = {"pdf", "jpg", "jpeg", "png", "bmp", "docx", "pptx", "xlsx"}
+TEXT_EXTENSIONS = {"html": "html", "markdown": "md", "text": "txt"}
+
+
+def unique_name(name, seen):
+    """이미 나온 이름이면 확장자 앞에 번호를 붙여 구분 (a.pdf -> a (2).pdf)"""
+    path = PurePosixPath(name)
+    candidate, number = name, 2
+    while candidate in seen:
+        candidate = str(path.with_name(f"{path.stem} ({number}){path.suffix}"))
+        number += 1
+    seen.add(candidate)
+    return candidate
+
+
+def expand_uploads(uploaded_files):
+    """업로드된 파일(zip은 내부 파일로 펼침)을 [(이름, 문서를 여는 함수), ...]로 변환
+
+    업로드 파일은 파일 객체를 그대로 사용하고, zip 내부 파일은 처리할 때 읽어서 한꺼번에 메모리에 올리지 않음
+    이름이 겹치면 (같은 이름의 업로드, zip 안의 중복 항목) 번호를 붙여 결과와 상태가 서로 덮어쓰지 않게 함
+    """
+    items = []
+    seen = set()
+    for uploaded in uploaded_files:
+        if uploaded.name.lower().endswith(".zip"):
+            archive = zipfile.ZipFile(uploaded)
+            prefix = unique_name(uploaded.name, seen)
+            for info in archive.infolist():
+                member = PurePosixPath(info.filename)
+                if info.is_dir() or member.parts[0] == "__MACOSX":
+                    continue
+                if member.suffix.lstrip(".").lower() not in SUPPORTED_EXTENSIONS:
+                    continue
+                name = unique_name(f"{prefix}/{info.filename}", seen)
+                items.append((name, lambda a=archive, i=info: a.read(i)))
+        else:
+            items.append((unique_name(uploaded.name, seen), lambda u=uploaded: u))
+    return items
+
+
+def _run_one(process, name, open_document):
+    start = time.perf_counter()
+    try:
+        result = process(PurePosixPath(name).name, open_document())
+        return {
+            "status": "success",
+            "result": result,
+            "pages": count_pages(result),
+            "elapsed": time.perf_counter() - start,
+        }
+    except Exception as e:
+        return {"status": "failed", "error": str(e), "elapsed": time.perf_counter() - start}
+
+
+def run_batch(items, process, max_workers=4, on_done=None):
+    """items를 워커 풀에서 process(파일명, 바이트 또는 파일 객체)로 처리
+
+    on_done(이름, outcome)은 완료 순서대로 호출한 스레드에서 실행됨
+    outcome: {"status": "success", "result", "pages", "elapsed"} 또는 {"status": "failed", "error", "elapsed"}
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_run_one, process, name, open_document): name for name, open_document in items}
+        for future in as_completed(futures):
+            if on_done:
+                on_done(futures[future], future.result())
+
+
+class BatchArchive:
+    """완료된 결과를 바로 임시 zip 파일에 추가 (파일별 JSON + 텍스트)
+
+    zip 파일은 첫 결과를 추가할 때 만들고, close()를 호출하거나 객체가 정리될 때(세션 종료) 삭제
+    """
+
+    def __init__(self, output_format):
+        self.output_format = output_format
+        self.path = None
+        self._finalizer = None
+        self._lock = threading.Lock()
+
+    def _create(self):
+        fd, self.path = tempfile.mkstemp(prefix="upstage-batch-", suffix=".zip")
+        os.close(fd)
+        zipfile.ZipFile(self.path, "w").close()
+        self._finalizer = weakref.finalize(self, Path(self.path).unlink, missing_ok=True)
+
+    def add(self, name, result):
+        # zip 항목에 바로 스트리밍으로 기록 (JSON 전체 문자열을 만들지 않음)
+        with self._lock:
+            if self.path is None:
+                self._create()
+            with zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+                with io.TextIOWrapper(archive.open(f"{name}.json", "w"), encoding="utf-8") as f:
+                    write_export(f, result, "json")
+                if has_text(result, self.output_format):
+                    ext = TEXT_EXTENSIONS.get(self.output_format, "txt")
+                    with io.TextIOWrapper(archive.open(f"{name}.{ext}", "w"), encoding="utf-8") as f:
+                        write_export(f, result, self.output_format)
+
+    def close(self):
+        with self._lock:
+            if self._finalizer:
+                self._finalizer()
+            self.path = None
+            self._finalizer = None
@@ -0,0 +1,239 @@
+"""Document Digitization 헤드리스 CLI
+
+예시:
+    python 02_document_digitization/cli.py ./docs -o ./out --format markdown --workers 8 --rate 4
+    python 02_document_digitization/cli.py "scans/*.pdf" -o ./out --api ocr
+
+API Key는 --api-key 또는 UPSTAGE_API_KEY 환경 변수로 전달
+같은 옵션으로 만든 출력 파일이 입력 파일보다 새로우면 건너뜀 (--force로 다시 처리)
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from shared.document_parse import count_pages
+from shared.instrumentation import get_metrics
+from shared.parse_cache import ParseCache
+from shared.rate_limit import RateLimiter
+from batch import SUPPORTED_EXTENSIONS
+from export import export_filename, has_text, save_export
+from pipeline import ELEMENT_CATEGORIES, build_ocr_data, build_parse_data, process_document
+
+
+def is_supported(file_path):
+    return file_path.suffix.lstrip(".").lower() in SUPPORTED_EXTENSIONS
+
+
+def collect_inputs(patterns):
+    """디렉토리(하위 폴더 포함) / glob / 파일 경로를 [(출력 기준 상대 이름, 경로), ...]로 변환
+
+    - 디렉토리는 그 디렉토리, glob은 일치한 파일들의 공통 상위 디렉토리 기준 상대 경로를 이름으로 사용
+    - 디렉토리와 glob은 지원 확장자만 수집 (이전 실행의 출력/manifest 파일 제외). 직접 지정한 파일은 그대로 사용
+    - 서로 다른 파일이 같은 이름이 되면 결과를 덮어쓰지 않도록 ValueError
+    """
+    inputs = {}
+
+    def add(name, file_path):
+        existing = inputs.setdefault(name, file_path)
+        if existing.resolve() != file_path.resolve():
+            raise ValueError(f"출력 이름이 겹칩니다: {name} ({existing}, {file_path})")
+
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            for file_path in sorted(path.rglob("*")):
+                if file_path.is_file() and is_supported(file_path):
+                    add(file_path.relative_to(path).as_posix(), file_path)
+        elif path.is_file():
+            add(path.name, path)
+        else:
+            matches = [Path(match) for match in sorted(glob.glob(pattern, recursive=True))]
+            matches = [file_path for file_path in matches if file_path.is_file() and is_supported(file_path)]
+            if not matches:
+                continue
+            root = os.path.commonpath([str(file_path.parent) for file_path in matches]) or "."
+            for file_path in matches:
+                add(Path(os.path.relpath(file_path, root)).as_posix(), file_path)
+    return list(inputs.items())
+
+
+def output_paths(output_dir, name, formats, gzip_output):
+    return {fmt: output_dir / export_filename(name, fmt, gzip_output) for fmt in formats}
+
+
+def manifest_path(output_dir, name):
+    # 처리 옵션과 생성한 파일 목록을 기록하는 파일 (건너뛰기 판단용)
+    return output_dir / f"{name}.manifest.json"
+
+
+def run_options(args, data, formats):
+    """출력 내용에 영향을 주는 옵션 (JSON으로 저장한 값과 비교할 수 있는 형태)"""
+    return json.loads(json.dumps({"data": data, "formats": formats, "compact": args.compact, "gzip": args.gzip}))
+
+
+def is_up_to_date(input_path, manifest, options):
+    """manifest가 입력 파일보다 새롭고, 같은 옵션으로 만든 출력 파일이 모두 남아 있으면 True"""
+    try:
+        if manifest.stat().st_mtime < input_path.stat().st_mtime:
+            return False
+        recorded = json.loads(manifest.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    if recorded.get("options") != options:
+        return False
+    return all((manifest.parent / filename).is_file() for filename in recorded.get("files", []))
+
+
+def write_manifest(manifest, options, paths):
+    # 모든 출력 파일을 저장한 뒤 마지막에 기록 (중간에 실패하면 다음 실행에서 다시 처리)
+    tmp_path = manifest.with_name(manifest.name + ".tmp")
+    tmp_path.write_text(
+        json.dumps({"options": options, "files": [path.name for path in paths]}, ensure_ascii=False),
+        encoding="utf-8"
+    )
+    os.replace(tmp_path, manifest)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Upstage Document Parse / OCR 일괄 처리")
+    parser.add_argument("inputs", nargs="+", help="입력 디렉토리, glob 패턴 또는 파일")
+    parser.add_argument("-o", "--output-dir", required=True, help="결과 저장 디렉토리")
+    parser.add_argument("--api-key", default=os.environ.get("UPSTAGE_API_KEY"), help="기본값: $UPSTAGE_API_KEY")
+    parser.add_argument("--api", choices=["parse", "ocr"], default="parse", help="Document Parse 또는 Document OCR")
+    parser.add_argument("--format", choices=["html", "markdown", "text"], default="markdown", help="텍스트 출력 형식 (OCR은 항상 text)")
+    parser.add_argument("--jsonl", action="store_true", help="요소(OCR은 페이지)별 JSON Lines도 저장")
+    parser.add_argument("--compact", action="store_true", help="JSON을 들여쓰기 없이 저장")
+    parser.add_argument("--gzip", action="store_true", help="결과 파일을 gzip으로 압축")
+
+    parse_group = parser.add_argument_group("Document Parse 옵션")
+    parse_group.add_argument("--ocr", choices=["auto", "force"], default="auto")
+    parse_group.add_argument("--mode", choices=["standard", "enhanced", "auto"], default="standard")
+    parse_group.add_argument("--no-coordinates", action="store_true", help="좌표 미반환")
+    parse_group.add_argument("--no-chart-recognition", action="store_true", help="차트 인식 끄기")
+    parse_group.add_argument("--merge-multipage-tables", action="store_true", help="다중 페이지 표 병합")
+    parse_group.add_argument("--base64", nargs="*", choices=ELEMENT_CATEGORIES, default=[], metavar="CATEGORY",
+                             help="Base64 이미지로 추출할 카테고리")
+
+    ocr_group = parser.add_argument_group("Document OCR 옵션")
+    ocr_group.add_argument("--schema", choices=["clova", "google"], help="OCR 응답 형식 변환")
+
+    run_group = parser.add_argument_group("실행 옵션")
+    run_group.add_argument("--workers", type=int, default=4, help="동시 처리 파일 수")
+    run_group.add_argument("--rate", type=float, default=2.0, help="초당 최대 요청 수 (모든 워커 공유)")
+    run_group.add_argument("--force", action="store_true", help="최신 결과가 있어도 다시 처리")
+    run_group.add_argument("--no-cache", action="store_true", help="응답 캐시를 읽지 않음 (결과는 캐시에 갱신)")
+    run_group.add_argument("--metrics-dir", help="API 호출 지표를 저장할 디렉토리 (spans.jsonl: OTLP JSON span, metrics.prom: Prometheus)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.api_key:
+        print("API Key가 필요합니다 (--api-key 또는 UPSTAGE_API_KEY)", file=sys.stderr)
+        return 2
+
+    # Streamlit 캐시(get_http_client)를 스크립트 밖에서 쓸 때 나오는 경고 숨김
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    if args.api == "ocr":
+        data = build_ocr_data(args.schema)
+        output_format = "text"
+    else:
+        data = build_parse_data(
+            args.format, args.ocr, not args.no_coordinates, args.mode,
+            not args.no_chart_recognition, args.merge_multipage_tables, args.base64
+        )
+        output_format = args.format
+    formats = ["json", output_format] + (["jsonl"] if args.jsonl else [])
+
+    output_dir = Path(args.output_dir)
+    try:
+        inputs = collect_inputs(args.inputs)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    options = run_options(args, data, formats)
+    pending = [
+        (name, path) for name, path in inputs
+        if args.force or not is_up_to_date(path, manifest_path(output_dir, name), options)
+    ]
+    print(f"입력 {len(inputs)}개 · 최신 {len(inputs) - len(pending)}개 건너뜀 · 처리 {len(pending)}개", file=sys.stderr)
+    if not pending:
+        return 0
+
+    metrics = get_metrics()
+    if args.metrics_dir:
+        metrics.enable_export(Path(args.metrics_dir))
+
+    parse_cache = ParseCache()
+    ocr_cache = ParseCache(namespace="ocr-pages", max_bytes=200 * 1024 * 1024)
+    limiter = RateLimiter(args.rate)
+
+    def process(name, input_path):
+        # 워커 스레드에서 API 호출부터 결과 저장까지 처리
+        with open(input_path, "rb") as document:
+            result = process_document(
+                args.api_key, input_path.name, document, data,
+                parse_cache=parse_cache, ocr_cache=ocr_cache, bypass=args.no_cache, limiter=limiter
+            )
+        paths = output_paths(output_dir, name, formats, args.gzip)
+        paths["json"].parent.mkdir(parents=True, exist_ok=True)
+        saved = []
+        for fmt in formats:
+            if fmt == output_format and not has_text(result, fmt):
+                continue
+            saved.append(save_export(result, paths[fmt], fmt, compact=args.compact, gzip_output=args.gzip))
+        write_manifest(manifest_path(output_dir, name), options, saved)
+        return result
+
+    def run_one(name, input_path):
+        start = time.perf_counter()
+        try:
+            result = process(name, input_path)
+            return {"status": "success", "pages": count_pages(result), "elapsed": time.perf_counter() - start}
+        except Exception as e:
+            return {"status": "failed", "error": str(e), "elapsed": time.perf_counter() - start}
+
+    started = time.perf_counter()
+    done = {"files": 0, "pages": 0, "failed": 0}
+
+    def on_done(name, outcome):
+        done["files"] += 1
+        if outcome["status"] == "success":
+            done["pages"] += outcome["pages"]
+            print(f"[{done['files']}/{len(pending)}] ✅ {name} · {outcome['pages']}페이지 · {outcome['elapsed']:.1f}s", file=sys.stderr)
+        else:
+            done["failed"] += 1
+            print(f"[{done['files']}/{len(pending)}] ❌ {name} · {outcome['error']}", file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(run_one, name, path): name for name, path in pending}
+        for future in as_completed(futures):
+            on_done(futures[future], future.result())
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"완료 {done['files'] - done['failed']}개 · 실패 {done['failed']}개 · {done['pages']}페이지 · "
+        f"{elapsed:.1f}s · {done['pages'] / elapsed:.2f} pages/sec",
+        file=sys.stderr
+    )
+    for row in metrics.summary():
+        print(
+            f"  {row['endpoint']} · {row['requests']}회 (오류 {row['errors']}, 재시도 {row['retries']}) · "
+            f"p50 {row['p50']:.2f}s · p95 {row['p95']:.2f}s · {row['pages']}페이지",
+            file=sys.stderr
+        )
+    if args.metrics_dir:
+        metrics.write_prometheus(Path(args.metrics_dir) / "metrics.prom")
+    return 1 if done["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
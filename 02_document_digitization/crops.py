@@ -0,0 +1,158 @@
+import base64
+import io
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# 카테고리별 바운딩 박스 색상
+CATEGORY_COLORS = {
+    "table": "#0080FF", "figure": "#E0007A", "chart": "#00A040",
+    "heading1": "#8B4513", "header": "#808080", "footer": "#808080",
+    "caption": "#9040C0", "paragraph": "#FF8C00", "equation": "#C00000",
+    "list": "#008080", "index": "#506070", "footnote": "#A0A000"
+}
+
+
+class ElementCropStore:
+    """Document Parse 요소의 base64 crop 이미지를 결과에서 분리해 보관하고 필요할 때만 디코딩
+
+    - ingest(result): elements의 base64_encoding을 떼어냄 (spill=True면 디코딩한 바이트를 임시 디렉토리에 저장)
+      id가 없는 요소는 순서(idx)를 키로 쓰되, 결과에는 id를 써 넣지 않음 (내보내는 JSON은 API 응답 그대로)
+    - element_key(elem): ingest한 요소의 crop 키 (crop이 없으면 None)
+    - get_image(elem_id): 요청된 요소만 디코딩, 디코딩된 이미지는 max_decoded개까지 LRU 캐싱
+    - restore(result): JSON 다운로드용으로 base64_encoding을 다시 채운 사본 생성
+    """
+
+    def __init__(self, spill=True, max_decoded=16):
+        self.spill = spill
+        self.max_decoded = max_decoded
+        self.spill_dir = None
+        self._encoded = {}
+        self._keys = {}
+        self._decoded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ingest(self, result):
+        for idx, elem in enumerate(result.get("elements", [])):
+            encoded = elem.pop("base64_encoding", None)
+            if not encoded:
+                continue
+            elem_id = elem.get("id", idx)
+            self._keys[id(elem)] = (elem, elem_id)
+            if self.spill:
+                if self.spill_dir is None:
+                    self.spill_dir = Path(tempfile.mkdtemp(prefix="upstage-crops-"))
+                (self.spill_dir / f"{elem_id}.bin").write_bytes(base64.b64decode(encoded))
+                self._encoded[elem_id] = None
+            else:
+                self._encoded[elem_id] = encoded
+        return result
+
+    def element_key(self, elem):
+        entry = self._keys.get(id(elem))
+        return entry[1] if entry and entry[0] is elem else None
+
+    def has(self, elem_id):
+        return elem_id in self._encoded
+
+    def __len__(self):
+        return len(self._encoded)
+
+    def _raw_bytes(self, elem_id):
+        if self.spill:
+            return (self.spill_dir / f"{elem_id}.bin").read_bytes()
+        return base64.b64decode(self._encoded[elem_id])
+
+    def get_image(self, elem_id):
+        with self._lock:
+            if elem_id in self._decoded:
+                self._decoded.move_to_end(elem_id)
+                return self._decoded[elem_id]
+
+        image = Image.open(io.BytesIO(self._raw_bytes(elem_id)))
+        image.load()
+
+        with self._lock:
+            self._decoded[elem_id] = image
+            while len(self._decoded) > self.max_decoded:
+                self._decoded.popitem(last=False)
+        return image
+
+    def encoded(self, elem_id):
+        if self.spill:
+            return base64.b64encode(self._raw_bytes(elem_id)).decode("ascii")
+        return self._encoded[elem_id]
+
+    def restore(self, result):
+        if not self._encoded:
+            return result
+        elements = []
+        for idx, elem in enumerate(result.get("elements", [])):
+            elem_id = elem.get("id", idx)
+            elements.append({**elem, "base64_encoding": self.encoded(elem_id)} if self.has(elem_id) else elem)
+        return {**result, "elements": elements}
+
+    def close(self):
+        with self._lock:
+            self._decoded.clear()
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+def element_boxes(elements, width, height):
+    """요소들의 정규화 좌표(0~1 다각형)를 한 번에 픽셀 bbox 배열로 변환
+
+    반환: (boxes (n, 4) int [x0, y0, x1, y1], valid (n,) bool - 좌표가 있는 요소 여부)
+    """
+    polygons = [elem.get("coordinates") or [] for elem in elements]
+    counts = np.array([len(p) for p in polygons], dtype=int)
+    n, total = len(polygons), int(counts.sum())
+
+    xs = np.fromiter((pt["x"] for p in polygons for pt in p), dtype=float, count=total)
+    ys = np.fromiter((pt["y"] for p in polygons for pt in p), dtype=float, count=total)
+    owner = np.repeat(np.arange(n), counts)
+
+    # 요소별 min/max를 한 번의 연산으로 계산
+    x0, y0 = np.full(n, np.inf), np.full(n, np.inf)
+    x1, y1 = np.full(n, -np.inf), np.full(n, -np.inf)
+    np.minimum.at(x0, owner, xs)
+    np.minimum.at(y0, owner, ys)
+    np.maximum.at(x1, owner, xs)
+    np.maximum.at(y1, owner, ys)
+
+    valid = counts > 0
+    boxes = np.zeros((n, 4), dtype=int)
+    scale = np.array([width, height, width, height], dtype=float)
+    normalized = np.clip(np.stack([x0, y0, x1, y1], axis=1)[valid], 0.0, 1.0)
+    boxes[valid] = np.rint(normalized * scale).astype(int)
+    return boxes, valid
+
+
+def draw_overlay(image, elements, highlight_id=None, line_width=2):
+    """페이지 이미지 위에 모든 요소의 바운딩 박스를 한 번에 그린 사본 반환"""
+    boxes, valid = element_boxes(elements, image.width, image.height)
+    overlay = image.convert("RGB")
+    draw = ImageDraw.Draw(overlay)
+    for elem, box in zip((e for e, v in zip(elements, valid) if v), boxes[valid].tolist()):
+        color = CATEGORY_COLORS.get(elem.get("category"), "#FF8C00")
+        width = line_width * 2 if elem.get("id") == highlight_id else line_width
+        draw.rectangle(box, outline=color, width=width)
+    return overlay
+
+
+def crop_element(image, elem, padding=2):
+    """좌표로 페이지 이미지에서 요소 영역을 잘라냄 (좌표가 없으면 None)"""
+    boxes, valid = element_boxes([elem], image.width, image.height)
+    if not valid[0]:
+        return None
+    x0, y0, x1, y1 = boxes[0].tolist()
+    x0, y0 = max(0, x0 - padding), max(0, y0 - padding)
+    x1, y1 = min(image.width, x1 + padding), min(image.height, y1 + padding)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return image.crop((x0, y0, x1, y1))
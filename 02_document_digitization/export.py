@@ -0,0 +1,149 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+# 다운로드 형식별 확장자와 MIME 타입
+EXPORT_FORMATS = {
+    "html": ("html", "text/html"),
+    "markdown": ("md", "text/markdown"),
+    "text": ("txt", "text/plain"),
+    "json": ("json", "application/json"),
+    "jsonl": ("jsonl", "application/x-ndjson"),
+}
+
+
+def _records(result):
+    # Document Parse는 elements, OCR은 pages 단위로 순회
+    return result["elements"] if "elements" in result else result.get("pages", [])
+
+
+def _record_text(record, output_format):
+    if "content" in record and isinstance(record["content"], dict):
+        return record["content"].get(output_format, "")
+    return record.get(output_format, "")
+
+
+def iter_text(result, output_format):
+    """extract_text와 같은 내용을 요소 단위 조각으로 생성 (전체 문자열을 만들지 않음)"""
+    first = True
+    for record in _records(result):
+        part = _record_text(record, output_format)
+        if not part:
+            continue
+        if not first:
+            yield "\n\n"
+        yield part
+        first = False
+
+
+def has_text(result, output_format):
+    return any(part.strip() for part in iter_text(result, output_format))
+
+
+def iter_json(result, compact=False):
+    """JSON을 조각 단위로 인코딩 (compact=True면 들여쓰기/공백 없음)"""
+    if compact:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+    return encoder.iterencode(result)
+
+
+def iter_jsonl(result):
+    """요소(OCR은 페이지)마다 한 줄씩 JSON Lines 생성"""
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for record in _records(result):
+        yield encoder.encode(record)
+        yield "\n"
+
+
+def iter_export(result, fmt, compact=False):
+    if fmt == "json":
+        return iter_json(result, compact)
+    if fmt == "jsonl":
+        return iter_jsonl(result)
+    return iter_text(result, fmt)
+
+
+def write_export(f, result, fmt, compact=False, batch_size=64 * 1024):
+    """텍스트 스트림 f에 조각을 모아 batch_size 단위로 기록"""
+    buffer = []
+    size = 0
+    for chunk in iter_export(result, fmt, compact):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= batch_size:
+            f.write("".join(buffer))
+            buffer, size = [], 0
+    if buffer:
+        f.write("".join(buffer))
+
+
+def export_filename(base, fmt, gzip_output=False):
+    ext, _ = EXPORT_FORMATS[fmt]
+    return f"{base}.{ext}.gz" if gzip_output else f"{base}.{ext}"
+
+
+def export_mime(fmt, gzip_output=False):
+    return "application/gzip" if gzip_output else EXPORT_FORMATS[fmt][1]
+
+
+def open_export(path, gzip_output=False):
+    if gzip_output:
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def save_export(result, path, fmt, compact=False, gzip_output=False):
+    """결과를 path에 스트리밍으로 저장 (임시 파일에 쓴 뒤 교체)"""
+    tmp_path = f"{path}.tmp"
+    with open_export(tmp_path, gzip_output) as f:
+        write_export(f, result, fmt, compact=compact)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ResultExporter:
+    """결과 다운로드 파일을 실제로 요청될 때 한 번만 생성해 임시 파일로 보관
+
+    - (형식, compact, gzip) 조합별로 최초 요청 시 스트리밍으로 파일을 쓰고 이후에는 재사용
+    - prepare: JSON/JSONL 생성 직전에 결과를 변환하는 함수 (예: base64 crop 복원)
+    """
+
+    def __init__(self, result, prepare=None):
+        self.result = result
+        self.prepare = prepare
+        self.export_dir = None
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def path(self, fmt, compact=False, gzip_output=False):
+        key = (fmt, compact and fmt == "json", gzip_output)
+        with self._lock:
+            if key in self._paths:
+                return self._paths[key]
+
+            if self.export_dir is None:
+                self.export_dir = tempfile.mkdtemp(prefix="upstage-export-")
+            path = os.path.join(self.export_dir, export_filename("-".join(map(str, key)), fmt, gzip_output))
+
+            result = self.result
+            if fmt in ("json", "jsonl") and self.prepare:
+                result = self.prepare(result)
+
+            self._paths[key] = save_export(result, path, fmt, compact=key[1], gzip_output=gzip_output)
+            return path
+
+    def read(self, fmt, compact=False, gzip_output=False):
+        with open(self.path(fmt, compact, gzip_output), "rb") as f:
+            return f.read()
+
+    def close(self):
+        with self._lock:
+            self._paths.clear()
+            if self.export_dir:
+                shutil.rmtree(self.export_dir, ignore_errors=True)
+                self.export_dir = None
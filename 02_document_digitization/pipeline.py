@@ -0,0 +1,64 @@
+from shared.document_parse import parse_document, run_ocr, run_ocr_by_page
+from shared.parse_cache import make_cache_key
+
+ELEMENT_CATEGORIES = [
+    "table", "figure", "chart", "heading1", "header", "footer",
+    "caption", "paragraph", "equation", "list", "index", "footnote"
+]
+
+
+def build_parse_data(output_format="html", ocr="auto", coordinates=True, mode="standard",
+                     chart_recognition=True, merge_multipage_tables=False, base64_encoding=None):
+    """Document Parse 요청 파라미터 생성"""
+    data = {
+        "model": "document-parse",
+        "ocr": ocr,
+        "output_formats": f"['{output_format}']",
+        "coordinates": str(coordinates).lower(),
+        "mode": mode,
+        "chart_recognition": str(chart_recognition).lower(),
+        "merge_multipage_tables": str(merge_multipage_tables).lower()
+    }
+    if base64_encoding:
+        data["base64_encoding"] = str(list(base64_encoding)).replace("'", '"')
+    return data
+
+
+def build_ocr_data(schema=None):
+    """Document OCR 요청 파라미터 생성"""
+    data = {"model": "ocr"}
+    if schema:
+        data["schema"] = schema
+    return data
+
+
+def is_ocr(data):
+    return data.get("model") == "ocr"
+
+
+def process_document(api_key, filename, document, data, parse_cache=None, ocr_cache=None,
+                     bypass=False, limiter=None):
+    """캐시를 확인한 뒤 Document Parse 또는 OCR을 호출해 결과 반환
+
+    워커 스레드에서 호출해도 되도록 Streamlit API는 사용하지 않음
+    limiter가 주어지면 실제 API를 호출하기 전에 토큰을 받음
+    """
+    if is_ocr(data):
+        if ocr_cache is None:
+            if limiter:
+                limiter.acquire()
+            return run_ocr(api_key, filename, document, data)
+        result, _ = run_ocr_by_page(api_key, filename, document, data, ocr_cache, bypass=bypass, limiter=limiter)
+        return result
+
+    key = make_cache_key(document, data) if parse_cache else None
+    if key and not bypass:
+        cached = parse_cache.get(key)
+        if cached is not None:
+            return cached
+    if limiter:
+        limiter.acquire()
+    result = parse_document(api_key, filename, document, data)
+    if key:
+        parse_cache.set(key, result)
+    return result
@@ -1,7 +1,15 @@
 import streamlit as st
-import requests
 import json
 import base64
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from shared.http_client import API_URL, get_http_client
+from shared.instrumentation import render_metrics_sidebar
+
+INFORMATION_EXTRACTION_URL = f"{API_URL}/v1/information-extraction"
+SCHEMA_GENERATION_URL = f"{API_URL}/v1/information-extraction/schema-generation"
 
 st.set_page_config(page_title="Information Extraction", page_icon="🔍", layout="wide")
 
@@ -14,6 +22,7 @@ st.markdown("""
 st.title("🔍 Information Extraction Lab")
 
 api_key = st.sidebar.text_input("Upstage API Key", type="password")
+render_metrics_sidebar()
 
 if not api_key:
     st.warning("왼쪽 사이드바에서 API Key를 입력해주세요.")
@@ -128,8 +137,8 @@ else:
             try:
                 if api_type == "📄 Universal Extraction":
                     schema = json.loads(schema_input)
-                    file_bytes = uploaded_file.getvalue()
-                    base64_image = base64.b64encode(file_bytes).decode('utf-8')
+                    # getbuffer(): 업로드 버퍼를 복사하지 않고 인코딩
+                    base64_image = base64.b64encode(uploaded_file.getbuffer()).decode('utf-8')
                     
                     payload = {
                         "model": "information-extract",
@@ -159,15 +168,15 @@ else:
                     if enable_chunking:
                         payload["chunking"] = {"pages_per_chunk": pages_per_chunk}
                     
-                    response = requests.post(
-                        "https://api.upstage.ai/v1/information-extraction",
+                    response = get_http_client().post(
+                        INFORMATION_EXTRACTION_URL,
                         headers={"Authorization": f"Bearer {api_key}"},
                         json=payload
                     )
                 
                 elif api_type == "🧬 Schema Generation":
-                    file_bytes = uploaded_file.getvalue()
-                    base64_image = base64.b64encode(file_bytes).decode('utf-8')
+                    # getbuffer(): 업로드 버퍼를 복사하지 않고 인코딩
+                    base64_image = base64.b64encode(uploaded_file.getbuffer()).decode('utf-8')
                     
                     messages = [
                         {"role": "system", "content": extraction_goal}
@@ -187,17 +196,18 @@ else:
                         "messages": messages
                     }
                     
-                    response = requests.post(
-                        "https://api.upstage.ai/v1/information-extraction/schema-generation",
+                    response = get_http_client().post(
+                        SCHEMA_GENERATION_URL,
                         headers={"Authorization": f"Bearer {api_key}"},
                         json=payload
                     )
                 
                 else:
-                    response = requests.post(
-                        "https://api.upstage.ai/v1/information-extraction",
+                    uploaded_file.seek(0)
+                    response = get_http_client().post(
+                        INFORMATION_EXTRACTION_URL,
                         headers={"Authorization": f"Bearer {api_key}"},
-                        files={"document": uploaded_file.getvalue()},
+                        files={"document": (uploaded_file.name, uploaded_file)},
                         data={"model": model_type}
                     )
                 
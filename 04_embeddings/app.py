@@ -1,18 +1,35 @@
 import streamlit as st
-from langchain_upstage import ChatUpstage, UpstageEmbeddings
+from langchain_upstage import UpstageEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_community.vectorstores.utils import filter_complex_metadata
 from langchain_core.documents import Document
 import numpy as np
 import tempfile
-import os
 import shutil
-import requests
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from shared.parse_cache import ParseCache, make_cache_key
+from shared.http_client import get_http_client
+from shared.instrumentation import render_metrics_sidebar
+from shared.langchain_metrics import TrackedEmbeddings
+from shared.completion_cache import make_completion_key, render_completion_cache_sidebar, stream_cached
+from shared.llm import get_chat_model
+from shared.streaming import StreamRenderer
+from shared.document_parse import DOCUMENT_PARSE_URL, DocumentParseClient, DocumentParseError
 
 st.set_page_config(page_title="Embeddings & RAG", page_icon="🧮", layout="wide")
 st.title("🧮 Embeddings & RAG Pipeline")
 
+
+@st.cache_resource
+def get_parse_cache():
+    # 02_document_digitization과 같은 디스크 캐시 디렉토리를 공유
+    return ParseCache()
+
+
 api_key = st.sidebar.text_input("Upstage API Key", type="password")
 
 if not api_key:
@@ -32,6 +49,11 @@ else:
         st.sidebar.info(f"✂️ 청크: {len(st.session_state.get('splits', []))}개")
     else:
         st.sidebar.warning("⚠️ 문서를 업로드하세요")
+    cache_stats = get_parse_cache().stats()
+    st.sidebar.caption(f"🗃️ 파싱 캐시: 적중 {cache_stats['hits']} / 미적중 {cache_stats['misses']} · {cache_stats['entries']}개")
+    render_metrics_sidebar()
+    # temperature 0이거나 '항상 사용'이면 같은 질문의 답변을 재생
+    cache_always, completion_cache = render_completion_cache_sidebar()
     
     tab1, tab2, tab3 = st.tabs(["📚 RAG Pipeline", "💬 일반 LLM", "🗄️ Vector DB 내부"])
     
@@ -53,6 +75,11 @@ else:
             chunk_overlap = st.slider("청크 오버랩", 0, 500, 100, 50)
             
             with st.expander("⚙️ Document Parse 옵션"):
+                bypass_cache = st.checkbox(
+                    "파싱 캐시 사용 안 함",
+                    value=False,
+                    help="같은 문서 + 같은 옵션의 Document Parse 결과는 디스크 캐시에서 재사용합니다"
+                )
                 output_format = st.selectbox(
                     "출력 형식",
                     ["html", "markdown", "text"],
@@ -69,38 +96,96 @@ else:
                     ["auto", "force"],
                     help="auto: 이미지만 OCR | force: 모든 파일 OCR"
                 )
+                async_parse = st.checkbox(
+                    "비동기 파싱",
+                    value=False,
+                    help="작업 제출 후 진행 상황을 폴링합니다. 대용량 문서에 권장 (다시 실행하면 진행 중인 작업을 이어서 확인)"
+                )
+            
+            # 진행 중이던 비동기 작업이 있으면 버튼을 다시 누르지 않아도 폴링 재개 (rerun/재접속 시 재제출 없음)
+            parse_job = st.session_state.get('parse_job')
+            resume_job = bool(uploaded_file and parse_job and parse_job['file_id'] == uploaded_file.file_id)
+            if resume_job:
+                st.info(f"⏳ 진행 중인 비동기 작업을 이어서 확인합니다 (request_id: {parse_job['request_id']})")
             
-            if uploaded_file and st.button("📄 문서 파싱 & 임베딩", type="primary"):
+            if uploaded_file and (st.button("📄 문서 파싱 & 임베딩", type="primary") or resume_job):
                 with st.status("📄 문서 처리 중...", expanded=True) as status:
                     try:
-                        # 1. 임시 파일 저장
+                        # 1. 파일 업로드 (업로드 파일 객체를 그대로 스트리밍 전송, 크기는 한 번만 계산)
                         st.write("✅ 1/4: 파일 업로드 중...")
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                            tmp_file.write(uploaded_file.getvalue())
-                            tmp_path = tmp_file.name
-                        st.write(f"✅ 파일 크기: {len(uploaded_file.getvalue()) / 1024:.1f}KB")
+                        st.write(f"✅ 파일 크기: {uploaded_file.size / 1024:.1f}KB")
                         
                         # 2. Document Parse (API 직접 호출)
                         st.write("✅ 2/4: Document Parse API 호출 중...")
+                        if resume_job:
+                            # 작업을 제출할 때의 옵션으로 이어서 처리
+                            parse_data = parse_job['data']
+                            output_format = parse_job['output_format']
+                        else:
+                            parse_data = {
+                                'ocr': parse_ocr,
+                                'output_formats': f"['{output_format}']",
+                                'mode': parse_mode
+                            }
                         
-                        with open(tmp_path, 'rb') as f:
-                            response = requests.post(
-                                'https://api.upstage.ai/v1/document-ai/document-parse',
+                        cache_key = make_cache_key(uploaded_file, parse_data)
+                        
+                        def call_document_parse_async():
+                            # 같은 문서의 진행 중인 작업이 있으면 재제출하지 않고 이어서 폴링
+                            job = st.session_state.get('parse_job')
+                            request_id = job['request_id'] if job and job['cache_key'] == cache_key else None
+                            progress = st.progress(0.0, text="비동기 작업 제출 중...")
+                            
+                            def on_progress(completed_pages, total_pages, job_status):
+                                ratio = completed_pages / total_pages if total_pages else 0.0
+                                progress.progress(ratio, text=f"{job_status.get('status', '')}: {completed_pages}/{total_pages or '?'} 페이지 완료")
+                            
+                            def on_submit(rid):
+                                st.session_state['parse_job'] = {
+                                    'request_id': rid,
+                                    'file_id': uploaded_file.file_id,
+                                    'cache_key': cache_key,
+                                    'data': parse_data,
+                                    'output_format': output_format,
+                                }
+                            
+                            try:
+                                result = DocumentParseClient(api_key).parse(
+                                    uploaded_file.name, uploaded_file, parse_data,
+                                    request_id=request_id,
+                                    on_submit=on_submit,
+                                    on_progress=on_progress
+                                )
+                            except DocumentParseError:
+                                # 작업 자체가 실패한 경우에는 다시 폴링하지 않도록 정리 (네트워크 오류는 유지해서 재개)
+                                st.session_state.pop('parse_job', None)
+                                raise
+                            st.session_state.pop('parse_job', None)
+                            return result
+                        
+                        def call_document_parse():
+                            if async_parse or resume_job:
+                                return call_document_parse_async()
+                            uploaded_file.seek(0)
+                            response = get_http_client().post(
+                                DOCUMENT_PARSE_URL,
                                 headers={'Authorization': f'Bearer {api_key}'},
-                                data={
-                                    'ocr': parse_ocr,
-                                    'output_formats': f"['{output_format}']",
-                                    'mode': parse_mode
-                                },
-                                files={'document': (uploaded_file.name, f)}
+                                data=parse_data,
+                                files={'document': (uploaded_file.name, uploaded_file)}
                             )
+                            if response.status_code != 200:
+                                raise Exception(f"API 오류: {response.status_code} - {response.text}")
+                            return response.json()
                         
-                        os.unlink(tmp_path)
+                        result, cache_hit = get_parse_cache().get_or_compute(
+                            cache_key,
+                            call_document_parse,
+                            bypass=bypass_cache
+                        )
                         
-                        if response.status_code != 200:
-                            raise Exception(f"API 오류: {response.status_code} - {response.text}")
+                        if cache_hit:
+                            st.write("⚡ 캐시된 파싱 결과 사용 (API 호출 생략)")
                         
-                        result = response.json()
                         elements = result.get('elements', [])
                         
                         # LangChain Document 객체로 변환 (페이지별 분리)
@@ -133,7 +218,8 @@ else:
                         
                         # 4. 임베딩 & 벡터 저장소
                         st.write("✅ 4/4: 임베딩 생성 & Chroma 벡터 저장소 구축 중...")
-                        embeddings = UpstageEmbeddings(api_key=api_key, model="embedding-query")
+                        # 임베딩 호출도 API 호출 지표에 기록
+                        embeddings = TrackedEmbeddings(UpstageEmbeddings(api_key=api_key, model="embedding-query"), "embedding-query")
                         
                         # 복잡한 메타데이터 필터링
                         filtered_splits = filter_complex_metadata(splits)
@@ -211,7 +297,7 @@ else:
                             
                             # 3. LLM 답변 생성
                             st.write(f"✅ 3/3: {model} 모델로 답변 생성 중 (temperature={temperature})...")
-                            llm = ChatUpstage(api_key=api_key, model=model, temperature=temperature)
+                            llm = get_chat_model(api_key, model, temperature=temperature)
                             
                             prompt = f"""다음 문서를 참고하여 질문에 답변하세요.
 
@@ -225,14 +311,18 @@ else:
                             status.update(label="✅ 답변 생성 중...", state="running")
                             
                             st.markdown("##### 💬 답변")
-                            response_placeholder = st.empty()
-                            full_response = ""
+                            renderer = StreamRenderer(st.empty())
+                            messages = [("human", prompt)]
+                            cache_key = make_completion_key(model, messages, {"temperature": temperature}) if cache_always or temperature == 0 else None
+                            cached = False
                             
-                            for chunk in llm.stream([("human", prompt)]):
-                                full_response += chunk.content
-                                response_placeholder.markdown(full_response + "▌")
+                            for chunk in stream_cached(llm, messages, completion_cache, cache_key):
+                                renderer.write(chunk.content)
+                                cached = cached or chunk.response_metadata.get("cached", False)
                             
-                            response_placeholder.markdown(full_response)
+                            renderer.close()
+                            if cached:
+                                st.caption("💾 캐시된 답변을 재생했습니다.")
                             status.update(label="✅ RAG 파이프라인 완료!", state="complete")
                         
                         except Exception as e:
@@ -264,17 +354,21 @@ else:
         if st.button("💬 답변 생성", type="primary"):
             with st.spinner("답변 생성 중..."):
                 try:
-                    llm = ChatUpstage(api_key=api_key, model=model_llm, temperature=temperature_llm)
+                    llm = get_chat_model(api_key, model_llm, temperature=temperature_llm)
                     
                     st.markdown("##### 💬 답변")
-                    response_placeholder = st.empty()
-                    full_response = ""
+                    renderer = StreamRenderer(st.empty())
+                    messages = [("human", question_llm)]
+                    cache_key = make_completion_key(model_llm, messages, {"temperature": temperature_llm}) if cache_always or temperature_llm == 0 else None
+                    cached = False
                     
-                    for chunk in llm.stream([("human", question_llm)]):
-                        full_response += chunk.content
-                        response_placeholder.markdown(full_response + "▌")
+                    for chunk in stream_cached(llm, messages, completion_cache, cache_key):
+                        renderer.write(chunk.content)
+                        cached = cached or chunk.response_metadata.get("cached", False)
                     
-                    response_placeholder.markdown(full_response)
+                    renderer.close()
+                    if cached:
+                        st.caption("💾 캐시된 답변을 재생했습니다.")
                     
                     if 'vectorstore' in st.session_state:
                         st.info("💡 RAG 탭에서 같은 질문을 해보세요. 문서를 참고하여 더 정확한 답변을 받을 수 있습니다.")
@@ -0,0 +1,92 @@
+import io
+import logging
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from pypdf import PdfWriter
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCHMARK_DIR.parent
+sys.path[:0] = [str(BENCHMARK_DIR), str(ROOT_DIR), str(ROOT_DIR / "01_chat_completions"), str(ROOT_DIR / "02_document_digitization")]
+
+from mock_server import MockUpstageServer
+
+_server = None
+_defaults = None
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # 앱 모듈이 import 시점에 API 주소를 읽으므로 테스트 모듈을 불러오기 전에 서버 주소를 설정
+    global _server, _defaults
+    # 실행 위치와 상관없이 결과를 benchmarks/.benchmarks에 저장 (--benchmark-compare로 커밋 간 비교)
+    if config.getoption("benchmark_storage", None) == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{BENCHMARK_DIR / '.benchmarks'}"
+    _server = MockUpstageServer().start()
+    _defaults = dict(_server.config)
+    os.environ["UPSTAGE_API_URL"] = _server.url
+    os.environ["UPSTAGE_API_BASE"] = f"{_server.url}/v1/solar"
+    os.environ["UPSTAGE_API_KEY"] = "mock-key"
+    # 캐시가 결과를 가리지 않도록 벤치마크 전용 디렉토리 사용
+    os.environ.setdefault("UPSTAGE_CACHE_DIR", str(BENCHMARK_DIR / ".cache"))
+    # Streamlit 캐시(get_http_client)를 스크립트 밖에서 쓸 때 나오는 경고 숨김
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+
+def pytest_unconfigure(config):
+    if _server:
+        _server.stop()
+
+
+@pytest.fixture
+def mock_server():
+    """테스트마다 기본 설정으로 되돌린 mock 서버"""
+    _server.configure(**_defaults)
+    yield _server
+    _server.configure(**_defaults)
+
+
+@pytest.fixture(scope="session")
+def make_pdf():
+    """빈 페이지로 된 PDF 바이트 생성 (크기가 다르면 페이지 해시도 다름)
+
+    changed: {페이지 인덱스: 변경 번호} - 해당 페이지만 다른 크기로 만들어 "바뀐 페이지"를 흉내 냄
+    """
+    def make(pages, size=200, changed=None):
+        changed = changed or {}
+        writer = PdfWriter()
+        for idx in range(pages):
+            extra = 1000 + changed[idx] if idx in changed else 0
+            writer.add_blank_page(size + idx + extra, size)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+    return make
+
+
+@pytest.fixture
+def record_peak_memory(benchmark):
+    """fn을 한 번 더 실행해 tracemalloc 최대 사용량(MB)을 결과에 기록 (측정 시간에는 포함하지 않음)"""
+    def record(fn, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            fn(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_mb"] = round(peak / 1024 / 1024, 2)
+    return record
+
+
+@pytest.fixture
+def record_throughput(benchmark):
+    """벤치마크 평균 시간 기준 처리량을 결과에 기록 (예: pages/sec)"""
+    def record(units, unit_name):
+        if benchmark.stats is None:
+            # --benchmark-disable로 실행하면 통계가 없음
+            return
+        benchmark.extra_info[f"{unit_name}_per_sec"] = round(units / benchmark.stats.stats.mean, 2)
+    return record
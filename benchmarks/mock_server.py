@@ -0,0 +1,493 @@
+"""Upstage API를 흉내 내는 로컬 mock 서버 (벤치마크용)
+
+지연 시간, 응답 크기, 오류 비율을 설정할 수 있음
+
+    python benchmarks/mock_server.py --port 8000 --latency 0.2 --error-rate 0.05
+
+앱을 mock 서버로 연결하려면:
+    UPSTAGE_API_URL=http://127.0.0.1:8000 UPSTAGE_API_BASE=http://127.0.0.1:8000/v1/solar streamlit run ...
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+
+FILLER = (
+    "Upstage Document AI는 문서의 구조를 분석해 제목, 단락, 표, 그림을 구분하고 "
+    "HTML, Markdown, 텍스트 형식으로 변환합니다. "
+)
+PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![s\w])")
+FORM_FIELD_PATTERN = re.compile(rb'name="([^"]+)"\r\n\r\n(.*?)\r\n--', re.S)
+
+
+def filler_text(size, seed=0):
+    text = FILLER * (size // len(FILLER) + 1)
+    start = seed % len(FILLER)
+    return text[start:start + size]
+
+
+def count_pdf_pages(body):
+    # multipart 본문에서 PDF 페이지 객체 수를 셈 (PDF가 아니면 1페이지)
+    if b"%PDF" not in body:
+        return 1
+    return max(1, len(PAGE_PATTERN.findall(body)))
+
+
+def form_fields(body):
+    return {name.decode(): value.decode("utf-8", "replace") for name, value in FORM_FIELD_PATTERN.findall(body)}
+
+
+class MockUpstageServer:
+    """별도 스레드에서 동작하는 mock 서버
+
+    - latency: 모든 요청의 기본 지연(초), latency_per_page: 문서 API의 페이지당 추가 지연
+    - error_rate: 429/500 응답 비율 (429는 Retry-After: 0)
+    - pages: 문서 페이지 수 고정 (None이면 업로드한 PDF에서 계산)
+    - elements_per_page, content_size: Document Parse 응답 크기
+    - embedding_dim, stream_tokens, token_interval: 임베딩 차원, 채팅 응답 토큰 수와 토큰 간 간격
+    - schema_violation: response_format이 json_schema일 때 첫 필드의 타입을 틀리게 생성
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.config = {
+            "latency": 0.0,
+            "latency_per_page": 0.0,
+            "error_rate": 0.0,
+            "pages": None,
+            "elements_per_page": 10,
+            "content_size": 200,
+            "embedding_dim": 4096,
+            "stream_tokens": 50,
+            "token_interval": 0.0,
+            "schema_violation": False,
+            "seed": 0,
+        }
+        self.configure(**config)
+        self.jobs = {}
+        self.request_counts = {}
+        self.prompt_cache = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    def configure(self, **config):
+        unknown = set(config) - set(self.config)
+        if unknown:
+            raise ValueError(f"알 수 없는 설정: {sorted(unknown)}")
+        self.config.update(config)
+        self.random = random.Random(self.config["seed"])
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, path):
+        with self._lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def should_fail(self):
+        with self._lock:
+            return self.config["error_rate"] and self.random.random() < self.config["error_rate"]
+
+    def cached_prompt_tokens(self, cache_key, messages):
+        """prompt_cache_key별로 직전 요청과 같은 메시지 접두부의 토큰 수 (제공자 프롬프트 캐시 흉내)"""
+        if not cache_key:
+            return 0
+        current = [(json.dumps(message, sort_keys=True), prompt_token_count([message])) for message in messages]
+        with self._lock:
+            previous = self.prompt_cache.get(cache_key, [])
+            self.prompt_cache[cache_key] = current
+        cached = 0
+        for (message, tokens), (previous_message, _) in zip(current, previous):
+            if message != previous_message:
+                break
+            cached += tokens
+        return cached
+
+    # 응답 생성
+
+    def document_parse(self, pages, output_formats):
+        formats = output_formats or ["html", "markdown", "text"]
+        size = self.config["content_size"]
+        elements = []
+        for page in range(1, pages + 1):
+            for idx in range(self.config["elements_per_page"]):
+                text = filler_text(size, seed=len(elements))
+                y = idx / self.config["elements_per_page"]
+                content = {
+                    "html": f"<p id='{len(elements)}'>{text}</p>" if "html" in formats else "",
+                    "markdown": text if "markdown" in formats else "",
+                    "text": text if "text" in formats else "",
+                }
+                elements.append({
+                    "category": "table" if idx == 3 else "paragraph",
+                    "content": content,
+                    "coordinates": [
+                        {"x": 0.1, "y": y}, {"x": 0.9, "y": y},
+                        {"x": 0.9, "y": y + 0.08}, {"x": 0.1, "y": y + 0.08}
+                    ],
+                    "id": len(elements),
+                    "page": page,
+                })
+        return {
+            "api": "2.0",
+            "model": "document-parse-mock",
+            "content": {fmt: "\n".join(e["content"][fmt] for e in elements) for fmt in ("html", "markdown", "text")},
+            "elements": elements,
+            "usage": {"pages": pages},
+        }
+
+    def ocr(self, pages):
+        size = self.config["content_size"] * self.config["elements_per_page"]
+        page_results = []
+        for idx in range(pages):
+            text = filler_text(size, seed=idx)
+            words = [
+                {"boundingBox": {"vertices": [{"x": i * 10, "y": 10}, {"x": i * 10 + 8, "y": 20}]},
+                 "confidence": 0.99, "id": i, "text": word}
+                for i, word in enumerate(text.split())
+            ]
+            page_results.append({"confidence": 0.98, "height": 1100, "id": idx, "text": text, "width": 850, "words": words})
+        return {
+            "apiVersion": "1.1",
+            "confidence": 0.98,
+            "metadata": {"pages": [{"height": 1100, "page": idx + 1, "width": 850} for idx in range(pages)]},
+            "mimeType": "application/pdf",
+            "modelVersion": "ocr-mock",
+            "numBilledPages": pages,
+            "pages": page_results,
+            "stored": False,
+            "text": "\n".join(p["text"] for p in page_results),
+        }
+
+    def chat_completion(self, model, content, prompt_tokens, cached_tokens=0, tool_calls=None):
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content.split()),
+                "total_tokens": prompt_tokens + len(content.split()),
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+    def embedding(self, text):
+        # 같은 텍스트는 항상 같은 단위 벡터
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.config["embedding_dim"])
+        return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+
+def fill_schema(schema):
+    # JSON 스키마 형태에 맞는 값 생성 (Universal Extraction 응답용)
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {key: fill_schema(value) for key, value in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        return [fill_schema(schema.get("items", {"type": "string"}))]
+    if schema_type in ("number", "integer"):
+        return 0
+    if schema_type == "boolean":
+        return False
+    return "mock"
+
+
+def json_response_tokens(payload, violation=False):
+    # response_format이 JSON이면 스키마에 맞는 JSON을 4자씩 나눠 토큰으로 사용
+    response_format = payload.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        value = fill_schema(response_format.get("json_schema", {}).get("schema", {}))
+        if violation and isinstance(value, dict) and value:
+            first = next(iter(value))
+            value[first] = 0 if isinstance(value[first], str) else "mock"
+    elif response_format.get("type") == "json_object":
+        value = {"result": filler_text(200)}
+    else:
+        return None
+    content = json.dumps(value, ensure_ascii=False)
+    return [content[start:start + 4] for start in range(0, len(content), 4)]
+
+
+def mock_tool_calls(payload):
+    # tools가 있고 아직 함수 결과를 받기 전이면 모든 함수를 한 번씩 호출 (parallel tool calls)
+    messages = payload.get("messages", [])
+    if not payload.get("tools") or payload.get("tool_choice") == "none" or (messages and messages[-1].get("role") == "tool"):
+        return None
+    return [{
+        "id": f"call_{uuid.uuid4().hex[:8]}",
+        "type": "function",
+        "function": {
+            "name": tool["function"]["name"],
+            "arguments": json.dumps(fill_schema(tool["function"].get("parameters", {}))),
+        },
+    } for tool in payload["tools"]]
+
+
+def prompt_token_count(messages):
+    count = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            count += len(content.split())
+        elif isinstance(content, list):
+            count += sum(len(str(part.get("text", ""))) // 4 + 1 for part in content)
+    return count
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문을 나눠 보낼 때 Nagle + delayed ACK로 40ms씩 늦어지지 않도록 함
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def mock(self):
+        return self.server.mock
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self):
+        if self.mock.random.random() < 0.5:
+            self._send_json({"error": {"message": "Too many requests", "code": "rate_limit"}}, 429, {"Retry-After": "0"})
+        else:
+            self._send_json({"error": {"message": "Internal server error", "code": "server_error"}}, 500)
+
+    def _sleep(self, pages=0):
+        config = self.mock.config
+        delay = config["latency"] + config["latency_per_page"] * pages
+        if delay:
+            time.sleep(delay)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self.mock.count(path)
+        match = re.fullmatch(r"/v1/document-ai/requests/([\w-]+)", path)
+        if match and match.group(1) in self.mock.jobs:
+            self._sleep()
+            self._send_json(self.mock.jobs[match.group(1)]["status"])
+            return
+        match = re.fullmatch(r"/v1/document-ai/results/([\w-]+)/(\d+)", path)
+        if match and match.group(1) in self.mock.jobs:
+            self._send_json(self.mock.jobs[match.group(1)]["batches"][int(match.group(2))])
+            return
+        self._send_json({"error": {"message": f"not found: {path}"}}, 404)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        self.mock.count(path)
+        body = self._body()
+        if self.mock.should_fail():
+            self._sleep()
+            self._send_error()
+            return
+
+        if path == "/v1/document-ai/document-parse":
+            self._document_parse(body)
+        elif path == "/v1/document-ai/async/document-parse":
+            self._async_document_parse(body)
+        elif path == "/v1/document-ai/ocr":
+            pages = self.mock.config["pages"] or count_pdf_pages(body)
+            self._sleep(pages)
+            self._send_json(self.mock.ocr(pages))
+        elif path == "/v1/information-extraction":
+            self._information_extraction(body)
+        elif path == "/v1/information-extraction/schema-generation":
+            self._sleep()
+            schema = {"type": "object", "properties": {"bank_name": {"type": "string"}, "balance": {"type": "number"}}}
+            content = json.dumps({"type": "json_schema", "json_schema": {"name": "document_schema", "schema": schema}})
+            self._send_json(self.mock.chat_completion("information-extract", content, 0))
+        elif path in ("/v1/solar/chat/completions", "/v1/chat/completions"):
+            self._chat_completions(json.loads(body or b"{}"))
+        elif path in ("/v1/solar/embeddings", "/v1/embeddings"):
+            self._embeddings(json.loads(body or b"{}"))
+        else:
+            self._send_json({"error": {"message": f"not found: {path}"}}, 404)
+
+    def _document_parse(self, body):
+        pages = self.mock.config["pages"] or count_pdf_pages(body)
+        fields = form_fields(body)
+        formats = re.findall(r"html|markdown|text", fields.get("output_formats", ""))
+        self._sleep(pages)
+        self._send_json(self.mock.document_parse(pages, formats))
+
+    def _async_document_parse(self, body):
+        pages = self.mock.config["pages"] or count_pdf_pages(body)
+        formats = re.findall(r"html|markdown|text", form_fields(body).get("output_formats", ""))
+        request_id = uuid.uuid4().hex
+        batches, batch_status = [], []
+        for idx, start in enumerate(range(1, pages + 1, 10)):
+            end = min(start + 9, pages)
+            batches.append(self.mock.document_parse(end - start + 1, formats))
+            batch_status.append({
+                "id": idx, "status": "completed", "start_page": start, "end_page": end,
+                "download_url": f"{self.mock.url}/v1/document-ai/results/{request_id}/{idx}",
+            })
+        self.mock.jobs[request_id] = {
+            "status": {"id": request_id, "status": "completed", "total_pages": pages, "completed_pages": pages, "batches": batch_status},
+            "batches": batches,
+        }
+        self._sleep()
+        self._send_json({"request_id": request_id}, 202)
+
+    def _information_extraction(self, body):
+        self._sleep(self.mock.config["pages"] or 1)
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            payload = json.loads(body)
+            schema = payload.get("response_format", {}).get("json_schema", {}).get("schema", {"type": "object"})
+            content = json.dumps(fill_schema(schema), ensure_ascii=False)
+            prompt_tokens = prompt_token_count(payload.get("messages", []))
+        else:
+            content = json.dumps({"total": 0, "store_name": "mock"})
+            prompt_tokens = len(body) // 4
+        self._send_json(self.mock.chat_completion("information-extract", content, prompt_tokens))
+
+    def _chat_completions(self, payload):
+        config = self.mock.config
+        model = payload.get("model", "solar-mini")
+        tokens = [f"{word} " for word in filler_text(config["stream_tokens"] * 8).split()][:config["stream_tokens"]]
+        prompt_tokens = prompt_token_count(payload.get("messages", []))
+        cached_tokens = self.mock.cached_prompt_tokens(payload.get("prompt_cache_key"), payload.get("messages", []))
+        tool_calls = mock_tool_calls(payload)
+        if tool_calls:
+            tokens = []
+        else:
+            tokens = json_response_tokens(payload, config["schema_violation"]) or tokens
+        self._sleep()
+
+        if not payload.get("stream"):
+            self._send_json(self.mock.chat_completion(model, "".join(tokens), prompt_tokens, cached_tokens, tool_calls))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        def event(data):
+            chunk = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.flush()
+
+        def chunk(delta, finish_reason=None, usage=None, choices=True):
+            return json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if choices else [],
+                "usage": usage,
+            }, ensure_ascii=False)
+
+        try:
+            event(chunk({"role": "assistant", "content": ""}))
+            for token in tokens:
+                if config["token_interval"]:
+                    time.sleep(config["token_interval"])
+                event(chunk({"content": token}))
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 스트림을 끊으면 (또는 요청을 취소하면) 생성도 중단
+            self.mock.count("stream-aborted")
+            self.close_connection = True
+            return
+        for index, tool_call in enumerate(tool_calls or []):
+            event(chunk({"tool_calls": [{"index": index, **tool_call}]}))
+        event(chunk({}, finish_reason="tool_calls" if tool_calls else "stop"))
+        if payload.get("stream_options", {}).get("include_usage"):
+            usage = {
+                "prompt_tokens": prompt_tokens, "completion_tokens": len(tokens), "total_tokens": prompt_tokens + len(tokens),
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            }
+            event(chunk({}, usage=usage, choices=False))
+        event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _embeddings(self, payload):
+        inputs = payload.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        texts = [text if isinstance(text, str) else " ".join(map(str, text)) for text in inputs]
+        self._sleep()
+        tokens = sum(len(text) // 4 + 1 for text in texts)
+        self._send_json({
+            "object": "list",
+            "data": [{"object": "embedding", "index": idx, "embedding": self.mock.embedding(text)} for idx, text in enumerate(texts)],
+            "model": payload.get("model", "embedding-passage"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upstage API mock 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 기본 지연(초)")
+    parser.add_argument("--latency-per-page", type=float, default=0.0, help="문서 API 페이지당 추가 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429/500 응답 비율 (0~1)")
+    parser.add_argument("--pages", type=int, help="응답 페이지 수 고정")
+    parser.add_argument("--elements-per-page", type=int, default=10)
+    parser.add_argument("--content-size", type=int, default=200, help="요소당 텍스트 길이")
+    parser.add_argument("--embedding-dim", type=int, default=4096)
+    parser.add_argument("--stream-tokens", type=int, default=50)
+    parser.add_argument("--token-interval", type=float, default=0.0, help="스트리밍 토큰 간격(초)")
+    args = parser.parse_args()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("host", "port")}
+    server = MockUpstageServer(args.host, args.port, **config)
+    print(f"mock 서버 실행 중: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
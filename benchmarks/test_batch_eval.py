@@ -0,0 +1,32 @@
+"""Chat Completions 일괄 평가 벤치마크 (01_chat_completions/batch_eval.py)"""
+import pytest
+
+from batch_eval import BatchResults, load_prompts, run_batch
+from shared.llm import get_chat_model
+from shared.rate_limit import RateLimiter
+
+API_KEY = "mock-key"
+ROWS = 64
+
+
+def make_prompts(rows):
+    text = "id,user\n" + "".join(f"q{idx},질문 {idx}번에 답하세요\n" for idx in range(rows))
+    return load_prompts("eval.csv", text, "당신은 친절한 AI 어시스턴트입니다.")
+
+
+@pytest.mark.parametrize("concurrency", [1, 16])
+def test_batch_eval(benchmark, mock_server, record_throughput, tmp_path, concurrency):
+    # 행당 약 0.1초인 요청을 순차 실행 vs 동시 16개 (분당 토큰 한도 포함)
+    mock_server.configure(latency=0.05, token_interval=0.001)
+    llm = get_chat_model(API_KEY, "solar-mini")
+    prompts = make_prompts(ROWS)
+    runs = iter(range(1000))
+
+    def run():
+        results = BatchResults(tmp_path / f"run-{next(runs)}.jsonl")
+        limiter = RateLimiter(1_000_000 / 60, burst=1_000_000)
+        return list(run_batch(llm, prompts, results, concurrency, limiter, reserve_output=256))
+
+    rows = benchmark.pedantic(run, rounds=3)
+    assert len(rows) == ROWS and not any(row["error"] for row in rows)
+    record_throughput(ROWS, "rows")
@@ -0,0 +1,52 @@
+"""Chat Completions 플레이그라운드 재실행 비용 벤치마크 (01_chat_completions/config.py)"""
+import json
+
+import pytest
+
+pytest.importorskip("jsonschema")
+
+from config import build_request, parse_response_schema, parse_tools, render_code
+
+
+def large_schema_text(properties):
+    schema = {
+        "type": "object",
+        "properties": {f"field_{idx}": {"type": "string", "description": "설명 " * 10} for idx in range(properties)},
+        "required": [f"field_{idx}" for idx in range(properties)],
+        "additionalProperties": False,
+    }
+    return json.dumps({"name": "response_schema", "strict": True, "schema": schema}, indent=2)
+
+
+def request_args(schema_text):
+    return {
+        "model": "solar-pro3",
+        "sampling_params": {"temperature": 0.8, "top_p": 0.95, "max_tokens": 4096},
+        "reasoning_effort": "medium",
+        "response_format_type": "json_schema",
+        "json_schema_text": schema_text,
+        "tools_text": None,
+        "tool_choice": "auto",
+        "prompt_cache_key": None,
+    }
+
+
+def rerun(args):
+    # 위젯을 조작할 때마다 앱이 하는 일: 요청 구성 + 코드 미리보기
+    request = build_request(**args)
+    return request, render_code(args, "당신은 친절한 AI 어시스턴트입니다.", "안녕하세요!", True)
+
+
+@pytest.mark.parametrize("properties", [10, 1000])
+@pytest.mark.parametrize("cache", ["cold", "cached"])
+def test_playground_rerun(benchmark, properties, cache):
+    args = request_args(large_schema_text(properties))
+
+    def run():
+        if cache == "cold":
+            for func in (build_request, render_code, parse_response_schema, parse_tools):
+                func.clear()
+        return rerun(args)
+
+    request, code = benchmark(run)
+    assert not request["errors"] and "json_schema" in code
@@ -0,0 +1,120 @@
+"""Document Parse / OCR 경로 벤치마크 (02_document_digitization, 04_embeddings의 파싱 단계)"""
+import io
+import tempfile
+
+import pytest
+
+from shared.document_parse import (
+    DocumentParseClient, parse_document, parse_document_in_chunks, run_ocr_by_page
+)
+from shared.parse_cache import ParseCache
+from shared.rate_limit import RateLimiter
+from batch import run_batch
+from export import ResultExporter
+from pipeline import build_ocr_data, build_parse_data, process_document
+
+API_KEY = "mock-key"
+PARSE_DATA = build_parse_data("markdown")
+
+
+@pytest.mark.parametrize("pages", [1, 20])
+def test_parse_sync(benchmark, mock_server, make_pdf, record_peak_memory, record_throughput, pages):
+    document = make_pdf(pages)
+    result = benchmark(parse_document, API_KEY, "doc.pdf", document, PARSE_DATA)
+    assert result["usage"]["pages"] == pages
+    record_throughput(pages, "pages")
+    record_peak_memory(parse_document, API_KEY, "doc.pdf", document, PARSE_DATA)
+
+
+def test_parse_split_parallel(benchmark, mock_server, make_pdf, record_throughput):
+    # 페이지당 지연이 있으면 청크 병렬 요청이 동기 요청보다 빨라야 함
+    mock_server.configure(latency=0.02, latency_per_page=0.005)
+    document = make_pdf(40)
+    result = benchmark.pedantic(
+        parse_document_in_chunks, args=(API_KEY, "doc.pdf", document, PARSE_DATA),
+        kwargs={"pages_per_chunk": 10, "max_workers": 4}, rounds=5
+    )
+    assert result["usage"]["pages"] == 40
+    record_throughput(40, "pages")
+
+
+def test_parse_async(benchmark, mock_server, make_pdf):
+    client = DocumentParseClient(API_KEY, poll_interval=0.01)
+    document = make_pdf(25)
+    result = benchmark.pedantic(client.parse, args=("doc.pdf", document, PARSE_DATA), rounds=5)
+    assert result["usage"]["pages"] == 25
+
+
+def test_ocr_page_cache_one_changed_page(benchmark, mock_server, make_pdf, record_throughput):
+    # 20페이지 중 1페이지만 바뀐 문서를 다시 OCR: 바뀐 페이지만 전송하고 나머지는 캐시에서 재조립
+    mock_server.configure(latency_per_page=0.005)
+    cache = ParseCache(tempfile.mkdtemp(), namespace="ocr-pages")
+    data = build_ocr_data()
+    run_ocr_by_page(API_KEY, "scan.pdf", make_pdf(20), data, cache)
+    revision = iter(range(1, 10000))
+
+    def setup():
+        # 라운드마다 7번째 페이지를 새로 바꾼 문서 사용
+        return (API_KEY, "scan.pdf", make_pdf(20, changed={6: next(revision)}), data, cache), {}
+
+    result, stats = benchmark.pedantic(run_ocr_by_page, setup=setup, rounds=10)
+    assert stats == {"cached": 19, "sent": 1}
+    assert len(result["pages"]) == 20
+    record_throughput(20, "pages")
+
+
+def test_batch_throughput(benchmark, mock_server, make_pdf, record_throughput):
+    # 일괄 처리/CLI 경로: 워커 풀 + 공유 rate limiter, 캐시 없이 API 지연만 받는지 확인
+    mock_server.configure(latency=0.02, latency_per_page=0.002)
+    items = [(f"doc{idx}.pdf", lambda pages=idx % 5 + 1: make_pdf(pages)) for idx in range(16)]
+    total_pages = sum(idx % 5 + 1 for idx in range(16))
+    limiter = RateLimiter(rate=1000, burst=16)
+
+    def process(filename, document):
+        return process_document(API_KEY, filename, document, PARSE_DATA, limiter=limiter)
+
+    def run():
+        outcomes = []
+        run_batch(items, process, max_workers=8, on_done=lambda name, outcome: outcomes.append(outcome))
+        return outcomes
+
+    outcomes = benchmark.pedantic(run, rounds=5)
+    assert all(outcome["status"] == "success" for outcome in outcomes)
+    record_throughput(total_pages, "pages")
+
+
+def test_retry_under_errors(benchmark, mock_server, make_pdf):
+    # 429/500이 섞여도 재시도로 성공해야 함
+    mock_server.configure(error_rate=0.3)
+    document = make_pdf(2)
+    result = benchmark(parse_document, API_KEY, "doc.pdf", document, PARSE_DATA, 5)
+    assert result["usage"]["pages"] == 2
+
+
+def test_export_json(benchmark, mock_server, make_pdf, record_peak_memory):
+    # 대용량 결과를 스트리밍으로 내보내는 비용 (네트워크 제외)
+    mock_server.configure(elements_per_page=30, content_size=500)
+    result = parse_document(API_KEY, "doc.pdf", make_pdf(100), PARSE_DATA)
+
+    def export():
+        exporter = ResultExporter(result)
+        try:
+            return len(exporter.read("json", gzip_output=True))
+        finally:
+            exporter.close()
+
+    assert benchmark(export) > 0
+    record_peak_memory(export)
+
+
+def test_upload_memory_file_object(benchmark, mock_server, make_pdf, record_peak_memory):
+    # 파일 객체 업로드는 multipart 스트리밍이므로 업로드 크기만큼 복사본이 생기지 않아야 함
+    mock_server.configure(pages=1, elements_per_page=1)
+    document = io.BytesIO(make_pdf(1) + b"\0" * (20 * 1024 * 1024))
+
+    def upload():
+        document.seek(0)
+        return parse_document(API_KEY, "big.pdf", document, PARSE_DATA)
+
+    benchmark.pedantic(upload, rounds=3)
+    record_peak_memory(upload)
@@ -0,0 +1,84 @@
+"""Information Extraction 경로 벤치마크 (03_information_extraction과 같은 방식으로 요청)"""
+import base64
+import io
+import json
+
+import pytest
+
+from shared.http_client import API_URL, get_http_client
+
+INFORMATION_EXTRACTION_URL = f"{API_URL}/v1/information-extraction"
+SCHEMA_GENERATION_URL = f"{API_URL}/v1/information-extraction/schema-generation"
+HEADERS = {"Authorization": "Bearer mock-key"}
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "bank_name": {"type": "string"},
+        "account_number": {"type": "string"},
+        "balance": {"type": "number"},
+        "transactions": {"type": "array", "items": {"type": "object", "properties": {
+            "date": {"type": "string"}, "amount": {"type": "number"}
+        }}},
+    },
+}
+
+
+def universal_extraction(document):
+    # 03 앱과 같이 버퍼를 base64로 인코딩해 JSON 요청
+    encoded = base64.b64encode(document.getbuffer()).decode("utf-8")
+    payload = {
+        "model": "information-extract",
+        "messages": [{"role": "user", "content": [{
+            "type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{encoded}"}
+        }]}],
+        "response_format": {"type": "json_schema", "json_schema": {"name": "document_schema", "schema": SCHEMA}},
+        "mode": "standard",
+        "location": False,
+        "confidence": False,
+        "split": False,
+    }
+    response = get_http_client().post(INFORMATION_EXTRACTION_URL, headers=HEADERS, json=payload)
+    response.raise_for_status()
+    return json.loads(response.json()["choices"][0]["message"]["content"])
+
+
+@pytest.mark.parametrize("size_mb", [1, 10])
+def test_universal_extraction(benchmark, mock_server, record_peak_memory, size_mb):
+    document = io.BytesIO(b"\xff\xd8" + b"\0" * (size_mb * 1024 * 1024))
+    extracted = benchmark(universal_extraction, document)
+    assert set(extracted) == set(SCHEMA["properties"])
+    record_peak_memory(universal_extraction, document)
+
+
+def test_prebuilt_extraction(benchmark, mock_server, make_pdf, record_peak_memory):
+    document = io.BytesIO(make_pdf(3))
+
+    def prebuilt():
+        document.seek(0)
+        response = get_http_client().post(
+            INFORMATION_EXTRACTION_URL, headers=HEADERS,
+            files={"document": ("receipt.pdf", document)}, data={"model": "receipt-extraction"}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    assert benchmark(prebuilt)["choices"]
+    record_peak_memory(prebuilt)
+
+
+def test_schema_generation(benchmark, mock_server):
+    encoded = base64.b64encode(b"\xff\xd8" + b"\0" * 1024).decode("utf-8")
+    payload = {
+        "model": "information-extract",
+        "messages": [
+            {"role": "system", "content": "Generate schema about bank_name and balance from bank statement."},
+            {"role": "user", "content": [{"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{encoded}"}}]},
+        ],
+    }
+
+    def generate():
+        response = get_http_client().post(SCHEMA_GENERATION_URL, headers=HEADERS, json=payload)
+        response.raise_for_status()
+        return json.loads(response.json()["choices"][0]["message"]["content"])
+
+    assert benchmark(generate)["type"] == "json_schema"
@@ -0,0 +1,33 @@
+"""API 호출 계측 오버헤드 벤치마크 (shared/instrumentation.py)"""
+import pytest
+
+from shared.instrumentation import MetricsRegistry, track
+
+CALLS = 1000
+ENDPOINTS = ["POST /v1/chat/completions", "POST /v1/embeddings", "POST /v1/document-digitization"]
+
+
+def record_calls(registry, calls):
+    for idx in range(calls):
+        with track(ENDPOINTS[idx % len(ENDPOINTS)], "solar-mini", registry=registry, request_bytes=512) as call:
+            call.first_token()
+            call.set_usage({"prompt_tokens": 100, "completion_tokens": 50, "pages": 1})
+
+
+@pytest.mark.parametrize("export", [False, True], ids=["memory", "export"])
+def test_record(benchmark, tmp_path, export):
+    # 호출 1건당 계측 비용 (파일 내보내기를 켜면 span 1줄 추가 + Prometheus 파일은 1초에 한 번)
+    registry = MetricsRegistry()
+    if export:
+        registry.enable_export(tmp_path)
+    benchmark(record_calls, registry, CALLS)
+    benchmark.extra_info["calls"] = CALLS
+
+
+@pytest.mark.parametrize("view", ["summary", "prometheus"])
+def test_render(benchmark, view):
+    # 사이드바 / Prometheus 출력: 가득 찬 window(1000건) 기준
+    registry = MetricsRegistry(window=CALLS)
+    record_calls(registry, CALLS)
+    result = benchmark(registry.summary if view == "summary" else registry.to_prometheus)
+    assert result
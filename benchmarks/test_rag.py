@@ -0,0 +1,207 @@
+"""임베딩 인덱싱 / RAG / 채팅 스트리밍 벤치마크 (01_chat_completions, 04_embeddings와 같은 방식으로 호출)"""
+import shutil
+import tempfile
+
+import pytest
+
+pytest.importorskip("langchain_upstage")
+pytest.importorskip("langchain_chroma")
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_upstage import ChatUpstage, UpstageEmbeddings
+
+from shared.completion_cache import CompletionCache, make_completion_key, stream_cached
+from shared.document_parse import parse_document
+from shared.llm import get_chat_model
+from shared.streaming import StreamAccumulator, StreamRenderer
+from compare import stream_comparison
+from conversation import Conversation
+from pipeline import build_parse_data
+
+API_KEY = "mock-key"
+
+
+def parsed_docs(document, output_format="markdown"):
+    # 04 앱과 같이 요소를 페이지별 Document로 묶음
+    result = parse_document(API_KEY, "doc.pdf", document, build_parse_data(output_format))
+    pages = {}
+    for elem in result["elements"]:
+        content = elem.get("content", {}).get(output_format, "")
+        if content:
+            pages.setdefault(elem.get("page", 1), []).append(content)
+    return [Document(page_content="\n".join(pages[page]), metadata={"page": page}) for page in sorted(pages)]
+
+
+def build_index(docs):
+    splits = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50).split_documents(docs)
+    chroma_dir = tempfile.mkdtemp()
+    vectorstore = Chroma.from_documents(
+        documents=splits,
+        embedding=UpstageEmbeddings(api_key=API_KEY, model="embedding-query"),
+        persist_directory=chroma_dir,
+        collection_metadata={"hnsw:space": "cosine"}
+    )
+    return vectorstore, chroma_dir, len(splits)
+
+
+def test_indexing(benchmark, mock_server, make_pdf, record_peak_memory, record_throughput):
+    mock_server.configure(latency=0.01)
+    docs = parsed_docs(make_pdf(10))
+    chroma_dirs = []
+
+    def index():
+        vectorstore, chroma_dir, count = build_index(docs)
+        chroma_dirs.append(chroma_dir)
+        return count
+
+    chunks = benchmark.pedantic(index, rounds=3)
+    record_throughput(chunks, "chunks")
+    record_peak_memory(index)
+    for chroma_dir in chroma_dirs:
+        shutil.rmtree(chroma_dir, ignore_errors=True)
+
+
+def test_rag_query(benchmark, mock_server, make_pdf):
+    mock_server.configure(latency=0.01, stream_tokens=100)
+    vectorstore, chroma_dir, _ = build_index(parsed_docs(make_pdf(5)))
+    llm = ChatUpstage(api_key=API_KEY, model="solar-mini", temperature=0.3)
+    question = "이 문서의 주요 내용을 요약해주세요."
+
+    def answer():
+        results = vectorstore.similarity_search_with_score(question, k=3)
+        context = "\n\n".join(doc.page_content for doc, _ in results)
+        prompt = f"다음 문서를 참고하여 질문에 답변하세요.\n\n문서:\n{context}\n\n질문: {question}\n\n답변:"
+        return "".join(chunk.content for chunk in llm.stream([("human", prompt)]))
+
+    try:
+        assert benchmark(answer)
+    finally:
+        shutil.rmtree(chroma_dir, ignore_errors=True)
+
+
+def test_chat_stream_ttft(benchmark, mock_server):
+    # 토큰 간격이 있는 스트리밍 응답의 첫 토큰 시간(TTFT)과 토큰 처리량
+    mock_server.configure(latency=0.05, stream_tokens=100, token_interval=0.001)
+    llm = ChatUpstage(api_key=API_KEY, model="solar-mini")
+    stats = {}
+
+    def stream():
+        accumulator = StreamAccumulator()
+        for chunk in llm.stream("안녕하세요", stream_usage=True):
+            accumulator.add(chunk)
+        stats.update(accumulator.stats())
+        return stats["output_tokens"]
+
+    assert benchmark.pedantic(stream, rounds=10) == 100
+    benchmark.extra_info["ttft_ms"] = round(stats["ttft"] * 1000, 2)
+    benchmark.extra_info["tokens_per_sec"] = round(stats["tokens_per_sec"], 1)
+
+
+@pytest.mark.parametrize("client", ["new", "cached"])
+def test_chat_client_reuse(benchmark, mock_server, client):
+    # 요청마다 ChatUpstage를 새로 만드는 경우와 get_chat_model로 재사용하는 경우의 첫 토큰 시간
+    def first_token():
+        if client == "new":
+            llm = ChatUpstage(api_key=API_KEY, model="solar-mini", temperature=0.3)
+        else:
+            llm = get_chat_model(API_KEY, "solar-mini", temperature=0.3)
+        for chunk in llm.stream("안녕하세요"):
+            if chunk.content:
+                return chunk.content
+
+    assert benchmark(first_token)
+
+
+@pytest.mark.parametrize("compact_ratio", [1.0, 0.5], ids=["sliding", "compact"])
+def test_chat_history_cache(benchmark, mock_server, compact_ratio):
+    # 01 앱처럼 예산을 넘긴 대화를 매 턴 조금씩 자르는 경우(sliding)와 절반까지 한 번에 정리하는 경우의 캐시 적중 비율
+    mock_server.configure(stream_tokens=200)
+    llm = get_chat_model(API_KEY, "solar-mini")
+
+    def chat():
+        conversation = Conversation(compact_ratio=compact_ratio)
+        llm_with_key = llm.bind(prompt_cache_key=conversation.cache_key)
+        for turn in range(12):
+            question = f"{turn}번째 질문입니다."
+            conversation.compact(1000, 10)
+            response = llm_with_key.invoke(conversation.messages("당신은 친절한 AI 어시스턴트입니다.", question))
+            conversation.add_turn(question, response.content)
+            conversation.record_usage(response.usage_metadata)
+        return conversation
+
+    conversation = benchmark.pedantic(chat, rounds=3)
+    benchmark.extra_info["cached_ratio"] = round(conversation.cached_tokens / conversation.prompt_tokens, 3)
+    benchmark.extra_info["compactions"] = conversation.compactions
+
+
+@pytest.mark.parametrize("mode", ["sequential", "concurrent"])
+def test_chat_compare(benchmark, mock_server, mode):
+    # 01 앱 비교 모드처럼 세 모델에 같은 메시지를 보낼 때 순차 stream vs 동시 astream
+    mock_server.configure(latency=0.05, stream_tokens=100, token_interval=0.001)
+    llms = [get_chat_model(API_KEY, model) for model in ("solar-pro3", "solar-pro2", "solar-mini")]
+    messages = [("human", "안녕하세요")]
+
+    def compare():
+        accumulators = [StreamAccumulator() for _ in llms]
+        if mode == "sequential":
+            for llm, accumulator in zip(llms, accumulators):
+                for chunk in llm.stream(messages, stream_usage=True):
+                    accumulator.add(chunk)
+        else:
+            assert not stream_comparison(llms, messages, accumulators)
+        return [accumulator.stats()["output_tokens"] for accumulator in accumulators]
+
+    assert benchmark.pedantic(compare, rounds=5) == [100, 100, 100]
+
+
+@pytest.mark.parametrize("cache", ["none", "memory", "sqlite"])
+def test_chat_completion_cache(benchmark, mock_server, tmp_path, cache):
+    # 같은 요청을 반복할 때 API 호출 vs 캐시된 응답을 스트림으로 재생
+    mock_server.configure(latency=0.05, stream_tokens=200)
+    llm = get_chat_model(API_KEY, "solar-mini", temperature=0)
+    messages = [("system", "당신은 친절한 AI 어시스턴트입니다."), ("human", "안녕하세요")]
+    completion_cache = CompletionCache(db_path=tmp_path / "completions.sqlite" if cache == "sqlite" else None)
+    key = make_completion_key("solar-mini", messages, {"temperature": 0}) if cache != "none" else None
+
+    def answer():
+        accumulator = StreamAccumulator()
+        for chunk in stream_cached(llm, messages, completion_cache, key, stream_usage=True):
+            accumulator.add(chunk)
+        return accumulator.stats()["output_tokens"]
+
+    assert benchmark(answer) == 200
+    benchmark.extra_info["saved_output_tokens"] = completion_cache.stats()["saved_output_tokens"]
+
+
+class FakePlaceholder:
+    # st.empty() 대신 전달된 문자열 길이만 누적 (웹소켓으로 보내는 양에 비례)
+    def __init__(self):
+        self.sent_chars = 0
+
+    def markdown(self, text):
+        self.sent_chars += len(text)
+
+
+@pytest.mark.parametrize("renderer", ["per_chunk", "throttled"])
+def test_stream_rendering(benchmark, renderer):
+    # 8천 토큰 응답을 그릴 때 다시 보내는 문자 수
+    tokens = [f"token{idx} " for idx in range(8000)]
+
+    def render():
+        placeholder = FakePlaceholder()
+        if renderer == "per_chunk":
+            full_response = ""
+            for token in tokens:
+                full_response += token
+                placeholder.markdown(full_response + "▌")
+            placeholder.markdown(full_response)
+        else:
+            stream = StreamRenderer(placeholder, fps=10)
+            for token in tokens:
+                stream.write(token)
+            stream.close()
+        return placeholder.sent_chars
+
+    benchmark.extra_info["sent_chars"] = benchmark(render)
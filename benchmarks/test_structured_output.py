@@ -0,0 +1,59 @@
+"""구조화 출력(JSON) 스트리밍 검증 벤치마크 (01_chat_completions/json_stream.py)"""
+import json
+
+import pytest
+
+pytest.importorskip("jsonschema")
+
+from jsonschema import Draft202012Validator
+
+from json_stream import StructuredOutputMonitor
+from shared.llm import get_chat_model
+
+API_KEY = "mock-key"
+SCHEMA = {
+    "type": "object",
+    "properties": {f"field_{idx}": {"type": "string"} for idx in range(200)},
+    "additionalProperties": False,
+}
+RESPONSE_FORMAT = {"type": "json_schema", "json_schema": {"name": "fields", "strict": True, "schema": SCHEMA}}
+
+
+@pytest.mark.parametrize("abort", [False, True], ids=["full", "abort"])
+def test_schema_violation_stream(benchmark, mock_server, abort):
+    # 첫 필드부터 스키마를 어긴 응답을 끝까지 받는 경우 vs 위반이 확정되면 바로 끊는 경우
+    mock_server.configure(token_interval=0.0005, schema_violation=True)
+    llm = get_chat_model(API_KEY, "solar-mini", response_format=RESPONSE_FORMAT)
+    validator = Draft202012Validator(SCHEMA)
+
+    def stream():
+        monitor = StructuredOutputMonitor(validator, interval=0)
+        chunks = llm.stream("JSON으로 답하세요")
+        try:
+            for chunk in chunks:
+                if monitor.feed(chunk.content) and abort:
+                    break
+        finally:
+            chunks.close()
+        return monitor
+
+    monitor = benchmark.pedantic(stream, rounds=3)
+    assert monitor.violation
+    benchmark.extra_info["received_chars"] = monitor.parser.chars
+
+
+def test_incremental_parse(benchmark):
+    # 4자씩 들어오는 JSON 청크를 이어서 파싱 + 검증 (청크마다 전체를 다시 파싱하지 않음)
+    document = {f"field_{idx}": f"value {idx}" for idx in range(200)}
+    text = json.dumps(document, ensure_ascii=False)
+    pieces = [text[start:start + 4] for start in range(0, len(text), 4)]
+    validator = Draft202012Validator(SCHEMA)
+
+    def parse():
+        monitor = StructuredOutputMonitor(validator)
+        for piece in pieces:
+            monitor.feed(piece)
+        return monitor
+
+    monitor = benchmark(parse)
+    assert monitor.finish() is None and monitor.value == document
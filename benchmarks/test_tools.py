@@ -0,0 +1,53 @@
+"""Function Calling 함수 실행 벤치마크 (01_chat_completions의 ToolRegistry)"""
+import time
+
+import pytest
+
+from tools import ToolRegistry
+
+TOOL_LATENCY = 0.05
+
+
+def slow_lookup(key):
+    time.sleep(TOOL_LATENCY)
+    return {"key": key}
+
+
+def make_registry(cacheable=False):
+    registry = ToolRegistry()
+    for idx in range(4):
+        registry.register(f"lookup_{idx}", slow_lookup, timeout=1.0, cacheable=cacheable)
+    return registry
+
+
+TOOL_CALLS = [{"id": f"call_{idx}", "name": f"lookup_{idx}", "args": {"key": idx}} for idx in range(4)]
+
+
+@pytest.mark.parametrize("mode", ["sequential", "parallel"])
+def test_tool_dispatch(benchmark, mode):
+    # 한 턴에 함수 4개를 호출할 때 순차 실행(합) vs 동시 실행(최대값)
+    registry = make_registry()
+
+    def run():
+        if mode == "sequential":
+            return [registry.dispatch([tc])[0] for tc in TOOL_CALLS]
+        return registry.dispatch(TOOL_CALLS)
+
+    results = benchmark.pedantic(run, rounds=5)
+    assert not any(result["error"] for result in results)
+
+
+def test_tool_dispatch_cached(benchmark):
+    registry = make_registry(cacheable=True)
+    registry.dispatch(TOOL_CALLS)
+    results = benchmark(registry.dispatch, TOOL_CALLS)
+    assert all(result["cached"] for result in results)
+
+
+def test_tool_dispatch_timeout(benchmark):
+    # 느린 함수가 있어도 턴 지연 시간은 해당 함수의 타임아웃에서 끊김
+    registry = make_registry()
+    registry.register("slow", lambda: time.sleep(0.5), timeout=TOOL_LATENCY * 2)
+    results = benchmark.pedantic(registry.dispatch, args=(TOOL_CALLS + [{"id": "slow", "name": "slow", "args": {}}],), rounds=3)
+    assert "시간 초과" in results[-1]["error"]
+    assert not any(result["error"] for result in results[:-1])
@@ -0,0 +1 @@
+# 실습 앱(01~04)이 함께 사용하는 공통 모듈
@@ -0,0 +1,26 @@
+import asyncio
+import threading
+
+import streamlit as st
+
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop():
+    """백그라운드 스레드에서 계속 도는 이벤트 루프
+
+    재사용하는 ChatUpstage의 비동기 클라이언트는 처음 연결한 이벤트 루프에 묶이므로,
+    실행할 때마다 asyncio.run()으로 새 루프를 만들면 'Event loop is closed' 오류가 남.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="asyncio-loop", daemon=True).start()
+    return loop
+
+
+def submit(coro):
+    """코루틴을 백그라운드 루프에서 실행하고 concurrent.futures.Future 반환"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def run_async(coro, timeout=None):
+    """코루틴을 백그라운드 루프에서 실행하고 결과를 기다림"""
+    return submit(coro).result(timeout)
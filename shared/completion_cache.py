@@ -0,0 +1,228 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+from langchain_core.messages import AIMessage, AIMessageChunk, convert_to_messages
+
+from shared.parse_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_DB_PATH = DEFAULT_CACHE_DIR / "completions.sqlite"
+
+# 응답 내용에 영향을 주지 않아 캐시 키에서 제외하는 파라미터
+IGNORED_PARAMS = {"prompt_cache_key", "stream_usage"}
+
+
+def _message_dict(message):
+    data = {"role": message.type, "content": message.content}
+    # tool_call id는 호출마다 새로 생기므로 제외 (이름, 인자, 순서로 구분)
+    if getattr(message, "tool_calls", None):
+        data["tool_calls"] = [{"name": tc["name"], "args": tc["args"]} for tc in message.tool_calls]
+    return data
+
+
+def make_completion_key(model, messages, params):
+    """모델 + 메시지 + 요청 파라미터(샘플링, response_format, tools 등)를 정규화한 SHA-256"""
+    payload = {
+        "model": model,
+        "messages": [_message_dict(message) for message in convert_to_messages(messages)],
+        "params": {key: value for key, value in params.items() if value is not None and key not in IGNORED_PARAMS},
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """같은 요청(make_completion_key)의 Chat Completions 응답을 재사용하는 캐시
+
+    - 메모리 LRU(max_entries)를 먼저 보고, enable_sqlite()로 켜면 SQLite 파일에도 저장 (재시작 후에도 유지)
+    - hits / misses와 캐시로 아낀 입력 / 출력 토큰 수를 프로세스 단위로 누적
+    """
+
+    def __init__(self, max_entries=512, db_path=None):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.db_path = None
+        self.hits = 0
+        self.misses = 0
+        self.saved_input_tokens = 0
+        self.saved_output_tokens = 0
+        if db_path:
+            self.enable_sqlite(db_path)
+
+    def enable_sqlite(self, db_path=DEFAULT_DB_PATH):
+        with self._lock:
+            if self._db is not None:
+                return
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+            self.db_path = db_path
+
+    def disable_sqlite(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+            self._db = None
+            self.db_path = None
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute("SELECT value FROM completions WHERE key = ?", (key,)).fetchone()
+                if row:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            usage = value.get("usage_metadata") or {}
+            self.saved_input_tokens += usage.get("input_tokens") or 0
+            self.saved_output_tokens += usage.get("output_tokens") or 0
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO completions (key, value, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False, default=str), time.time())
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM completions")
+                self._db.commit()
+            self.hits = self.misses = 0
+            self.saved_input_tokens = self.saved_output_tokens = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stored = self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0] if self._db is not None else None
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+                "stored": stored,
+                "saved_input_tokens": self.saved_input_tokens,
+                "saved_output_tokens": self.saved_output_tokens,
+            }
+
+
+def to_cache_value(message):
+    """AIMessage(또는 합친 AIMessageChunk)를 JSON으로 저장할 수 있는 dict로 변환"""
+    return {
+        "content": message.content,
+        "tool_calls": [{"name": tc["name"], "args": tc["args"], "id": tc.get("id")} for tc in message.tool_calls],
+        "usage_metadata": dict(message.usage_metadata or {}),
+        "response_metadata": message.response_metadata,
+    }
+
+
+def cached_message(value):
+    return AIMessage(
+        content=value["content"],
+        tool_calls=value["tool_calls"],
+        usage_metadata=value["usage_metadata"] or None,
+        response_metadata={**value["response_metadata"], "cached": True},
+    )
+
+
+def replay_stream(value, chunk_chars=8):
+    """저장된 응답을 스트림처럼 여러 청크로 나눠 재생 (마지막 청크에 메타데이터 / usage)"""
+    content = value["content"] if isinstance(value["content"], str) else ""
+    for start in range(0, len(content), chunk_chars):
+        yield AIMessageChunk(content=content[start:start + chunk_chars])
+    yield AIMessageChunk(
+        content="",
+        tool_call_chunks=[
+            {"name": tc["name"], "args": json.dumps(tc["args"], ensure_ascii=False), "id": tc["id"], "index": idx}
+            for idx, tc in enumerate(value["tool_calls"])
+        ],
+        usage_metadata=value["usage_metadata"] or None,
+        response_metadata={**value["response_metadata"], "cached": True},
+    )
+
+
+def invoke_cached(llm, messages, cache, key, **kwargs):
+    """key가 있으면 캐시를 먼저 보고, 없으면 llm.invoke() 결과를 저장 (key=None이면 캐시 미사용)"""
+    value = cache.get(key) if key else None
+    if value is not None:
+        return cached_message(value)
+    response = llm.invoke(messages, **kwargs)
+    if key:
+        cache.set(key, to_cache_value(response))
+    return response
+
+
+def stream_cached(llm, messages, cache, key, **kwargs):
+    """캐시에 있으면 저장된 응답을 스트림으로 재생, 없으면 llm.stream()을 그대로 넘기고 끝까지 받은 응답만 저장"""
+    value = cache.get(key) if key else None
+    if value is not None:
+        yield from replay_stream(value)
+        return
+    merged = None
+    for chunk in llm.stream(messages, **kwargs):
+        merged = chunk if merged is None else merged + chunk
+        yield chunk
+    if key and merged is not None:
+        cache.set(key, to_cache_value(merged))
+
+
+@st.cache_resource
+def get_completion_cache():
+    # 프로세스 전체에서 하나의 캐시 인스턴스 공유 (hit/miss, 절약 토큰 카운터 유지)
+    return CompletionCache()
+
+
+def render_completion_cache_sidebar():
+    """사이드바에 응답 캐시 설정 / 통계 표시. (항상 사용 여부, 캐시) 반환
+
+    항상 사용을 끄면 temperature가 0인 요청만 캐시 (결정적 응답)
+    """
+    cache = get_completion_cache()
+    with st.sidebar.expander("💾 응답 캐시", expanded=False):
+        always = st.checkbox(
+            "항상 사용",
+            value=False,
+            help="같은 모델 / 메시지 / 파라미터 요청이면 API를 다시 호출하지 않고 저장된 응답을 재생합니다. 끄면 temperature 0인 요청만 캐시합니다"
+        )
+        if st.checkbox("SQLite에 저장", value=False, help=f"앱을 다시 시작해도 유지 ({DEFAULT_DB_PATH})"):
+            cache.enable_sqlite()
+        else:
+            cache.disable_sqlite()
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        st.caption(
+            f"적중 {stats['hits']} / {lookups} ({stats['hit_rate']:.0%}) · 메모리 {stats['entries']}개"
+            + (f" · SQLite {stats['stored']}개" if stats["stored"] is not None else "")
+        )
+        st.caption(f"아낀 토큰: 입력 {stats['saved_input_tokens']:,} / 출력 {stats['saved_output_tokens']:,}")
+        if st.button("응답 캐시 비우기"):
+            cache.clear()
+            st.rerun()
+    return always, cache
@@ -0,0 +1,338 @@
+import hashlib
+import io
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pypdf import PdfReader, PdfWriter
+
+from shared.http_client import API_URL, get_http_client
+from shared.parse_cache import make_cache_key, normalize_options
+
+DOCUMENT_PARSE_URL = f"{API_URL}/v1/document-ai/document-parse"
+OCR_URL = f"{API_URL}/v1/document-ai/ocr"
+ASYNC_DOCUMENT_PARSE_URL = f"{API_URL}/v1/document-ai/async/document-parse"
+REQUEST_STATUS_URL = API_URL + "/v1/document-ai/requests/{request_id}"
+
+# id / presigned URL이 들어가는 요청의 지표 이름 (요청마다 라벨이 늘어나지 않게 경로 템플릿 사용)
+REQUEST_STATUS_ENDPOINT = "GET /v1/document-ai/requests/{id}"
+DOWNLOAD_ENDPOINT = "GET download_url"
+
+
+class DocumentParseError(Exception):
+    def __init__(self, status_code, text):
+        super().__init__(f"API 오류: {status_code} - {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+def parse_document(api_key, filename, document, data, max_retries=None):
+    """Document Parse 동기 호출. 200이 아니면 DocumentParseError 발생
+
+    document는 바이트 또는 파일 객체 (파일 객체는 multipart 스트리밍으로 전송)
+    """
+    response = get_http_client().post(
+        DOCUMENT_PARSE_URL,
+        headers={"Authorization": f"Bearer {api_key}"},
+        data=data,
+        files={"document": (filename, document)},
+        max_retries=max_retries
+    )
+    if response.status_code != 200:
+        raise DocumentParseError(response.status_code, response.text)
+    return response.json()
+
+
+def run_ocr(api_key, filename, document, data, max_retries=None):
+    """Document OCR 호출. 200이 아니면 DocumentParseError 발생"""
+    response = get_http_client().post(
+        OCR_URL,
+        headers={"Authorization": f"Bearer {api_key}"},
+        data=data,
+        files={"document": (filename, document)},
+        max_retries=max_retries
+    )
+    if response.status_code != 200:
+        raise DocumentParseError(response.status_code, response.text)
+    return response.json()
+
+
+def _page_key(page_bytes, data):
+    digest = hashlib.sha256(page_bytes)
+    digest.update(b"\0")
+    digest.update(json.dumps(normalize_options(data), sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def merge_ocr_pages(page_entries, billed_pages):
+    """페이지 단위 OCR 결과를 하나의 OCR 응답으로 재조립 (페이지 번호/id를 순서대로 보정)
+
+    page_entries: [{"page": pages 항목, "metadata": metadata.pages 항목, "common": 공통 필드}, ...]
+    """
+    merged = dict(page_entries[0]["common"]) if page_entries else {}
+    merged.update({"pages": [], "metadata": {"pages": []}, "numBilledPages": billed_pages})
+    for idx, entry in enumerate(page_entries):
+        merged["pages"].append({**entry["page"], "id": idx})
+        if entry.get("metadata"):
+            merged["metadata"]["pages"].append({**entry["metadata"], "page": idx + 1})
+
+    merged["text"] = "\n".join(page.get("text", "") for page in merged["pages"])
+    confidences = [page["confidence"] for page in merged["pages"] if "confidence" in page]
+    if confidences:
+        merged["confidence"] = sum(confidences) / len(confidences)
+    return merged
+
+
+def run_ocr_by_page(api_key, filename, document, data, cache, bypass=False, max_retries=None, limiter=None):
+    """페이지 해시 단위로 캐싱하는 OCR 호출. (결과, {"cached": n, "sent": n}) 반환
+
+    PDF는 페이지별로 나눠 해시하고, 캐시에 없는 페이지만 모아 한 번의 요청으로 보낸 뒤
+    pages를 원래 순서대로 재조립. PDF가 아니면 (이미지, Office 문서 등) 페이지를 나눌 수 없으므로
+    파일 전체 + 옵션 해시로 응답 전체를 캐싱
+    limiter가 주어지면 캐시에 없는 페이지를 실제로 보낼 때만 토큰을 받음
+    """
+    if not filename.lower().endswith(".pdf"):
+        return _run_ocr_whole(api_key, filename, document, data, cache, bypass, max_retries, limiter)
+
+    page_bytes = [chunk for _, chunk in split_pdf(document, 1)]
+    keys = [_page_key(chunk, data) for chunk in page_bytes]
+    entries = [None if bypass else cache.get(key) for key in keys]
+    missing = [idx for idx, entry in enumerate(entries) if entry is None]
+
+    billed = 0
+    if missing:
+        if len(missing) == len(page_bytes):
+            # 전부 새 페이지면 원본을 그대로 전송
+            payload = document
+        else:
+            writer = PdfWriter()
+            for idx in missing:
+                writer.append(PdfReader(io.BytesIO(page_bytes[idx])))
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            payload = buffer.getvalue()
+
+        if limiter:
+            limiter.acquire()
+        result = run_ocr(api_key, filename, payload, data, max_retries=max_retries)
+        pages = result.get("pages", [])
+        if len(pages) != len(missing):
+            raise DocumentParseError("mismatch", f"요청한 {len(missing)}페이지 중 {len(pages)}페이지만 응답했습니다")
+        metadata_pages = result.get("metadata", {}).get("pages", [])
+        common = {k: v for k, v in result.items() if k not in ("pages", "metadata", "text", "confidence", "numBilledPages")}
+        billed = result.get("numBilledPages", len(pages))
+
+        for pos, idx in enumerate(missing):
+            entry = {
+                "page": pages[pos],
+                "metadata": metadata_pages[pos] if pos < len(metadata_pages) else None,
+                "common": common,
+            }
+            cache.set(keys[idx], entry)
+            entries[idx] = entry
+
+    stats = {"cached": len(page_bytes) - len(missing), "sent": len(missing)}
+    return merge_ocr_pages(entries, billed), stats
+
+
+def _run_ocr_whole(api_key, filename, document, data, cache, bypass, max_retries, limiter):
+    # 페이지 단위 항목과 섞이지 않도록 키에 접두어를 붙임
+    key = "document-" + make_cache_key(document, data)
+    result = None if bypass else cache.get(key)
+    if result is not None:
+        return result, {"cached": len(result.get("pages", [])), "sent": 0}
+    if limiter:
+        limiter.acquire()
+    result = run_ocr(api_key, filename, document, data, max_retries=max_retries)
+    cache.set(key, result)
+    return result, {"cached": 0, "sent": len(result.get("pages", []))}
+
+
+def extract_text(result, output_format):
+    """Document Parse(elements) 또는 OCR(pages) 결과에서 output_format 텍스트를 이어 붙여 반환"""
+    if "elements" in result:
+        parts = [e.get("content", {}).get(output_format, "") for e in result["elements"]]
+    else:
+        parts = [p.get(output_format, "") for p in result.get("pages", [])]
+    return "\n\n".join(part for part in parts if part)
+
+
+def count_pages(result):
+    """결과의 페이지 수 (usage.pages가 없으면 pages/elements에서 계산)"""
+    if result.get("usage", {}).get("pages"):
+        return result["usage"]["pages"]
+    if "pages" in result:
+        return len(result["pages"])
+    return len({e.get("page", 1) for e in result.get("elements", [])})
+
+
+def split_pdf(document, pages_per_chunk):
+    """PDF(바이트 또는 파일 객체)를 페이지 범위 단위로 분할. [(시작 페이지(1부터), 청크 PDF 바이트), ...] 반환"""
+    if hasattr(document, "read"):
+        document.seek(0)
+    reader = PdfReader(document if hasattr(document, "read") else io.BytesIO(document))
+    total_pages = len(reader.pages)
+    chunks = []
+    for start in range(0, total_pages, pages_per_chunk):
+        writer = PdfWriter()
+        for page_idx in range(start, min(start + pages_per_chunk, total_pages)):
+            writer.add_page(reader.pages[page_idx])
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        chunks.append((start + 1, buffer.getvalue()))
+    return chunks
+
+
+def merge_results(chunk_results):
+    """청크별 결과를 하나로 병합 (페이지 번호와 요소 id를 전체 문서 기준으로 보정)
+
+    chunk_results: [(시작 페이지, 결과 dict), ...] (시작 페이지 순으로 정렬되어 있어야 함)
+    """
+    merged = {"elements": [], "content": {}, "usage": {"pages": 0}}
+    next_id = 0
+    for start_page, result in chunk_results:
+        for key in ("api", "model"):
+            if key in result and key not in merged:
+                merged[key] = result[key]
+
+        for elem in result.get("elements", []):
+            elem = dict(elem)
+            elem["page"] = elem.get("page", 1) + start_page - 1
+            elem["id"] = next_id
+            next_id += 1
+            merged["elements"].append(elem)
+
+        for fmt, text in result.get("content", {}).items():
+            if text:
+                merged["content"][fmt] = f"{merged['content'][fmt]}\n{text}" if merged["content"].get(fmt) else text
+
+        merged["usage"]["pages"] += result.get("usage", {}).get("pages", 0)
+    return merged
+
+
+def parse_document_in_chunks(api_key, filename, document, data, pages_per_chunk=10,
+                             max_workers=4, max_retries=2, on_progress=None):
+    """PDF를 페이지 범위로 나눠 병렬로 Document Parse 호출 후 결과 병합
+
+    on_progress(완료 청크 수, 전체 청크 수)는 호출한 스레드에서 실행됨
+    """
+    chunks = split_pdf(document, pages_per_chunk)
+    if len(chunks) <= 1:
+        result = parse_document(api_key, filename, document, data, max_retries=max_retries)
+        if on_progress:
+            on_progress(1, 1)
+        return result
+
+    chunk_results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                parse_document, api_key,
+                f"{filename.rsplit('.', 1)[0]}_p{start_page}.pdf", chunk_bytes, data, max_retries
+            ): start_page
+            for start_page, chunk_bytes in chunks
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            # 한 청크라도 재시도 후 실패하면 전체 실패 (남은 작업은 취소)
+            try:
+                chunk_results.append((futures[future], future.result()))
+            except Exception:
+                for pending in futures:
+                    pending.cancel()
+                raise
+            if on_progress:
+                on_progress(done, len(chunks))
+
+    chunk_results.sort(key=lambda item: item[0])
+    return merge_results(chunk_results)
+
+
+class DocumentParseClient:
+    """Document Parse 비동기 작업 클라이언트 (제출 → request_id → 백오프 폴링 → 배치 결과 다운로드)"""
+
+    def __init__(self, api_key, poll_interval=2.0, max_poll_interval=30.0, timeout=3600):
+        self.api_key = api_key
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def submit(self, filename, document, data):
+        """비동기 작업 제출 후 request_id 반환"""
+        response = get_http_client().post(
+            ASYNC_DOCUMENT_PARSE_URL,
+            headers=self.headers,
+            data=data,
+            files={"document": (filename, document)}
+        )
+        if response.status_code not in (200, 202):
+            raise DocumentParseError(response.status_code, response.text)
+        return response.json()["request_id"]
+
+    def get_status(self, request_id):
+        response = get_http_client().get(
+            REQUEST_STATUS_URL.format(request_id=request_id),
+            headers=self.headers,
+            timeout=(10, 60),
+            endpoint=REQUEST_STATUS_ENDPOINT
+        )
+        if response.status_code != 200:
+            raise DocumentParseError(response.status_code, response.text)
+        return response.json()
+
+    def wait(self, request_id, on_progress=None):
+        """작업이 끝날 때까지 폴링 (간격은 지수적으로 증가). 완료된 상태 dict 반환
+
+        on_progress(완료 페이지 수, 전체 페이지 수, 상태 dict)
+        """
+        interval = self.poll_interval
+        deadline = time.time() + self.timeout
+        while True:
+            status = self.get_status(request_id)
+            if on_progress:
+                on_progress(status.get("completed_pages", 0), status.get("total_pages", 0), status)
+
+            if status.get("status") == "completed":
+                return status
+            if status.get("status") == "failed":
+                raise DocumentParseError("failed", status.get("failure_message", "비동기 작업 실패"))
+            if time.time() > deadline:
+                raise DocumentParseError("timeout", f"{self.timeout}초 안에 작업이 끝나지 않았습니다 (request_id={request_id})")
+
+            time.sleep(interval + random.uniform(0, interval / 4))
+            interval = min(interval * 1.5, self.max_poll_interval)
+
+    def fetch_result(self, status):
+        """완료된 작업의 배치 결과를 내려받아 하나의 결과로 병합"""
+        chunk_results = []
+        for batch in sorted(status.get("batches", []), key=lambda b: b.get("start_page", 1)):
+            response = get_http_client().get(batch["download_url"], endpoint=DOWNLOAD_ENDPOINT)
+            if response.status_code != 200:
+                raise DocumentParseError(response.status_code, response.text)
+            result = response.json()
+
+            start_page = batch.get("start_page", 1)
+            batch_size = batch.get("end_page", start_page) - start_page + 1
+            pages = [e.get("page", 1) for e in result.get("elements", [])]
+            if pages and start_page > 1 and max(pages) > batch_size:
+                # 이미 전체 문서 기준 페이지 번호면 merge_results가 다시 더하지 않도록 배치 기준으로 변환
+                result["elements"] = [{**e, "page": e.get("page", 1) - start_page + 1} for e in result["elements"]]
+            chunk_results.append((start_page, result))
+        return merge_results(chunk_results)
+
+    def parse(self, filename, document, data, request_id=None, on_submit=None, on_progress=None):
+        """제출부터 결과 병합까지 한 번에 실행
+
+        request_id가 주어지면 재제출 없이 해당 작업의 폴링을 이어서 진행
+        on_submit(request_id)는 제출 직후 호출 (작업 id 저장용)
+        """
+        if request_id is None:
+            request_id = self.submit(filename, document, data)
+            if on_submit:
+                on_submit(request_id)
+        status = self.wait(request_id, on_progress=on_progress)
+        return self.fetch_result(status)
@@ -0,0 +1,174 @@
+import os
+import random
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+
+from shared.instrumentation import track
+
+# API 서버 주소 (로컬 mock 서버 등으로 바꿀 때 환경 변수 사용)
+API_URL = os.environ.get("UPSTAGE_API_URL", "https://api.upstage.ai").rstrip("/")
+
+# 재시도할 HTTP 상태 코드 (rate limit, 서버 오류)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _retry_after_seconds(response):
+    # Retry-After 헤더: 초 단위 숫자 또는 HTTP 날짜
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _file_objects(files):
+    # files={"document": (이름, 파일 객체, ...)} 또는 {"document": 파일 객체}에서 seek 가능한 객체만 추출
+    objects = []
+    for value in (files or {}).values():
+        fileobj = value[1] if isinstance(value, tuple) else value
+        if hasattr(fileobj, "seek") and hasattr(fileobj, "tell"):
+            objects.append(fileobj)
+    return objects
+
+
+def _streaming_multipart(kwargs):
+    # data + files를 MultipartEncoder로 변환: 파일을 청크 단위로 읽으며 전송해서
+    # 요청 본문 전체를 메모리에 다시 만들지 않음 (재시도마다 새로 생성해야 함)
+    kwargs = dict(kwargs)
+    fields = [(key, str(value)) for key, value in (kwargs.pop("data", None) or {}).items() if value is not None]
+    for field, value in kwargs.pop("files").items():
+        filename, content = value[:2] if isinstance(value, tuple) else (field, value)
+        fields.append((field, (filename, content, "application/octet-stream")))
+    encoder = MultipartEncoder(fields=fields)
+    kwargs["data"] = encoder
+    kwargs["headers"] = {**(kwargs.get("headers") or {}), "Content-Type": encoder.content_type}
+    return kwargs
+
+
+def _payload_model(kwargs):
+    # form 데이터 / JSON 본문의 model 필드 (계측 라벨용)
+    for payload in (kwargs.get("json"), kwargs.get("data")):
+        if isinstance(payload, dict) and payload.get("model"):
+            return str(payload["model"])
+    return None
+
+
+class _TrackedResponse(requests.Response):
+    # 호출한 쪽이 본문을 파싱할 때 usage(페이지 / 토큰)까지 함께 기록해서 같은 본문을 두 번 파싱하지 않음
+    # (호출 기록은 응답이 참조만 하므로 순환 참조가 생기지 않음)
+    def json(self, **kwargs):
+        data = super().json(**kwargs)
+        call = self.__dict__.get("_call")
+        if call:
+            if isinstance(data, dict):
+                call.set_usage(data.get("usage"))
+            call.finish()
+        return data
+
+
+def _record_on_json(response, call):
+    response.__class__ = _TrackedResponse
+    response._call = call
+    # 본문을 파싱하지 않고 버리는 응답도 빠지지 않도록 응답 객체가 정리될 때 기록
+    weakref.finalize(response, call.finish).atexit = False
+
+
+class UpstageHTTPClient:
+    """Upstage REST API 공용 HTTP 클라이언트
+
+    - 프로세스 전체에서 하나의 requests.Session(커넥션 풀, keep-alive) 공유
+    - connect/read 타임아웃 기본값 (호출별로 timeout=...으로 변경 가능)
+    - 429/5xx, 네트워크 오류 시 지수 백오프 + 지터로 재시도 (Retry-After 우선)
+    - 파일 업로드는 multipart 스트리밍 (파일 객체를 넘기면 본문 전체를 메모리에 만들지 않음)
+    - 시도마다 지연 시간, 요청 / 응답 크기, 상태 코드, 페이지 / 토큰 사용량을 shared.instrumentation에 기록
+    """
+
+    def __init__(self, connect_timeout=10, read_timeout=300, max_retries=3,
+                 backoff_base=0.5, backoff_max=30.0, pool_maxsize=16):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        # 재시도는 아래에서 직접 처리하므로 adapter 재시도는 끔
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, response=None):
+        retry_after = _retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay + random.uniform(0, delay / 2)
+
+    def request(self, method, url, max_retries=None, endpoint=None, **kwargs):
+        """세션으로 요청을 보내고 재시도 가능한 오류는 백오프 후 재시도. 마지막 응답을 반환
+
+        endpoint: 지표에 기록할 이름. URL에 id가 들어가는 요청은 경로 템플릿을 넘겨서
+        (예: "GET /v1/document-ai/requests/{id}") 요청마다 지표 라벨이 늘어나지 않게 함 (기본값: 메서드 + URL 경로)
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        endpoint = endpoint or f"{method.upper()} {urlparse(url).path}"
+        model = _payload_model(kwargs)
+
+        # 재시도 시 업로드 파일을 처음 위치부터 다시 보내도록 위치 기록
+        file_positions = [(f, f.tell()) for f in _file_objects(kwargs.get("files"))]
+
+        attempt = 0
+        while True:
+            for fileobj, position in file_positions:
+                fileobj.seek(position)
+            send_kwargs = _streaming_multipart(kwargs) if kwargs.get("files") else kwargs
+            call = track(endpoint, model, retry=attempt > 0)
+            try:
+                response = self.session.request(method, url, **send_kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                call.finish(error=type(e).__name__)
+                if attempt >= max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            call.stop_clock()
+            call.set(
+                status=response.status_code,
+                request_bytes=int(response.request.headers.get("Content-Length") or 0),
+                response_bytes=len(response.content),
+            )
+            if response.status_code >= 400:
+                call.finish(error=f"HTTP {response.status_code}")
+            else:
+                _record_on_json(response, call)
+            if response.status_code not in RETRYABLE_STATUS or attempt >= max_retries:
+                return response
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+@st.cache_resource
+def get_http_client():
+    # Streamlit rerun/세션 간에 같은 커넥션 풀을 재사용
+    return UpstageHTTPClient()
+
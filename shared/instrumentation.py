@@ -0,0 +1,383 @@
+import json
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+
+import streamlit as st
+
+from shared.parse_cache import DEFAULT_CACHE_DIR
+
+CHAT_ENDPOINT = "POST /v1/chat/completions"
+EMBEDDINGS_ENDPOINT = "POST /v1/embeddings"
+
+# 파일로 내보낼 때 기본 위치 (spans.jsonl: OTLP JSON span, metrics.prom: Prometheus 텍스트)
+DEFAULT_EXPORT_DIR = DEFAULT_CACHE_DIR / "metrics"
+
+USAGE_FIELDS = ["input_tokens", "output_tokens", "reasoning_tokens", "cached_tokens", "pages"]
+TOTAL_FIELDS = ["requests", "errors", "retries", "latency", "ttft", "streams", "request_bytes", "response_bytes", *USAGE_FIELDS]
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else None
+
+
+def normalize_usage(usage):
+    """LangChain usage_metadata / REST 응답의 usage를 {input_tokens, output_tokens, reasoning_tokens, cached_tokens, pages}로 변환"""
+    if not usage:
+        return {}
+    if "input_tokens" in usage or "output_tokens" in usage:
+        return {
+            "input_tokens": usage.get("input_tokens"),
+            "output_tokens": usage.get("output_tokens"),
+            "reasoning_tokens": (usage.get("output_token_details") or {}).get("reasoning"),
+            "cached_tokens": (usage.get("input_token_details") or {}).get("cache_read"),
+        }
+    return {
+        "input_tokens": usage.get("prompt_tokens"),
+        "output_tokens": usage.get("completion_tokens"),
+        "reasoning_tokens": (usage.get("completion_tokens_details") or {}).get("reasoning_tokens"),
+        "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+        "pages": usage.get("pages"),
+    }
+
+
+class Call:
+    """API 호출 1건의 기록. with 블록으로 쓰면 블록 실행 시간과 예외를 기록
+
+    with track(EMBEDDINGS_ENDPOINT, model, request_bytes=...) as call:
+        ...
+        call.set(response_bytes=...)
+
+    - first_token(): 스트리밍에서 첫 토큰을 받은 시점 기록 (TTFT)
+    - set_usage(): 토큰 / 페이지 사용량 기록 (normalize_usage 형식 모두 가능)
+    - finish(): 레지스트리에 기록 (여러 번 불러도 한 번만 기록)
+    """
+
+    def __init__(self, endpoint, model=None, registry=None, **fields):
+        self.registry = registry
+        self.data = {
+            "endpoint": endpoint,
+            "model": model,
+            "stream": False,
+            "start": time.time(),
+            "latency": None,
+            "ttft": None,
+            "request_bytes": None,
+            "response_bytes": None,
+            "status": None,
+            "retry": False,
+            "error": None,
+            **dict.fromkeys(USAGE_FIELDS),
+            **fields,
+        }
+        self._started = time.perf_counter()
+        self._finished = False
+
+    def first_token(self):
+        self.data["stream"] = True
+        if self.data["ttft"] is None:
+            self.data["ttft"] = time.perf_counter() - self._started
+
+    def set(self, **fields):
+        self.data.update(fields)
+
+    def set_usage(self, usage):
+        self.data.update({key: value for key, value in normalize_usage(usage).items() if value is not None})
+
+    def stop_clock(self):
+        # 응답 도착 시점까지만 측정하고 기록은 나중에 할 때 (본문 파싱 후 사용량까지 기록)
+        if self.data["latency"] is None:
+            self.data["latency"] = time.perf_counter() - self._started
+
+    def finish(self, error=None):
+        if self._finished:
+            return
+        self._finished = True
+        self.stop_clock()
+        if error is not None:
+            self.data["error"] = error
+        (self.registry or get_metrics()).record(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(error=exc_type.__name__ if exc_type else None)
+        return False
+
+
+def track(endpoint, model=None, **fields):
+    """Upstage API 호출을 감싸는 context manager (Call 반환)"""
+    return Call(endpoint, model, **fields)
+
+
+class MetricsRegistry:
+    """Upstage API 호출별 지연 시간 / TTFT / 토큰 / 페이지 / 바이트 기록
+
+    - 최근 window건은 그대로 보관 (백분위수, 사이드바 표), 누적 합계는 (엔드포인트, 모델)별로 따로 유지
+    - enable_export()로 켜면 호출마다 OTLP JSON span을 spans.jsonl에 덧붙이고,
+      metrics.prom(Prometheus 텍스트 형식)을 최대 export_interval초에 한 번 다시 씀
+    """
+
+    def __init__(self, window=1000, export_interval=1.0):
+        self._calls = deque(maxlen=window)
+        self._totals = defaultdict(lambda: dict.fromkeys(TOTAL_FIELDS, 0))
+        self._lock = threading.Lock()
+        self.export_dir = None
+        self.export_interval = export_interval
+        self._exported = 0.0
+
+    def record(self, call):
+        with self._lock:
+            self._calls.append(call)
+            totals = self._totals[(call["endpoint"], call["model"] or "")]
+            totals["requests"] += 1
+            totals["errors"] += int(bool(call["error"]))
+            totals["retries"] += int(call["retry"])
+            totals["latency"] += call["latency"] or 0.0
+            if call["ttft"] is not None:
+                totals["ttft"] += call["ttft"]
+                totals["streams"] += 1
+            for field in ("request_bytes", "response_bytes", *USAGE_FIELDS):
+                totals[field] += call[field] or 0
+            export_dir = self.export_dir
+            now = time.monotonic()
+            write_prometheus = export_dir is not None and now - self._exported >= self.export_interval
+            if write_prometheus:
+                self._exported = now
+        if export_dir is not None:
+            self._write_span(export_dir, call)
+            if write_prometheus:
+                self.write_prometheus(export_dir / "metrics.prom")
+
+    def calls(self):
+        with self._lock:
+            return list(self._calls)
+
+    def clear(self):
+        with self._lock:
+            self._calls.clear()
+            self._totals.clear()
+
+    def summary(self):
+        """최근 기록 기준 (엔드포인트, 모델)별 호출 수 / 오류 / 지연 시간 백분위수 / 시간 비중 / 사용량 (전체 시간이 긴 순)"""
+        groups = defaultdict(list)
+        for call in self.calls():
+            groups[(call["endpoint"], call["model"] or "")].append(call)
+        total_time = sum(call["latency"] or 0.0 for calls in groups.values() for call in calls) or 1.0
+
+        rows = []
+        for (endpoint, model), calls in groups.items():
+            latencies = sorted(call["latency"] for call in calls if call["latency"] is not None)
+            ttfts = sorted(call["ttft"] for call in calls if call["ttft"] is not None)
+            row = {
+                "endpoint": endpoint,
+                "model": model,
+                "requests": len(calls),
+                "errors": sum(1 for call in calls if call["error"]),
+                "retries": sum(1 for call in calls if call["retry"]),
+                "p50": _percentile(latencies, 0.5),
+                "p95": _percentile(latencies, 0.95),
+                "p99": _percentile(latencies, 0.99),
+                "max": latencies[-1] if latencies else None,
+                "ttft_p50": _percentile(ttfts, 0.5),
+                "ttft_p95": _percentile(ttfts, 0.95),
+                "total_time": sum(latencies),
+                "time_share": sum(latencies) / total_time,
+            }
+            for field in ("request_bytes", "response_bytes", *USAGE_FIELDS):
+                row[field] = sum(call[field] or 0 for call in calls)
+            rows.append(row)
+        return sorted(rows, key=lambda row: row["total_time"], reverse=True)
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 형식 (카운터는 누적, 지연 시간 백분위수는 최근 window 기준)"""
+        with self._lock:
+            totals = {key: dict(value) for key, value in self._totals.items()}
+            calls = list(self._calls)
+
+        latencies = defaultdict(list)
+        ttfts = defaultdict(list)
+        for call in calls:
+            key = (call["endpoint"], call["model"] or "")
+            if call["latency"] is not None:
+                latencies[key].append(call["latency"])
+            if call["ttft"] is not None:
+                ttfts[key].append(call["ttft"])
+
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{suffix}{{{label_text}}} {value}")
+
+        def labels(key, **extra):
+            return {"endpoint": key[0], "model": key[1], **extra}
+
+        def summary_samples(values, total_sum, count):
+            samples = []
+            for key, observed in values.items():
+                ordered = sorted(observed)
+                samples += [("", labels(key, quantile=str(q)), _percentile(ordered, q)) for q in QUANTILES]
+            samples += [("_sum", labels(key), totals[key][total_sum]) for key in totals if totals[key][count]]
+            samples += [("_count", labels(key), totals[key][count]) for key in totals if totals[key][count]]
+            return samples
+
+        metric("upstage_requests_total", "counter", "Upstage API 호출 수 (재시도 포함)",
+               [("", labels(key), value["requests"]) for key, value in totals.items()])
+        metric("upstage_request_errors_total", "counter", "오류로 끝난 호출 수",
+               [("", labels(key), value["errors"]) for key, value in totals.items()])
+        metric("upstage_request_retries_total", "counter", "재시도 호출 수",
+               [("", labels(key), value["retries"]) for key, value in totals.items()])
+        metric("upstage_request_duration_seconds", "summary", "호출 지연 시간",
+               summary_samples(latencies, "latency", "requests"))
+        metric("upstage_time_to_first_token_seconds", "summary", "스트리밍 첫 토큰까지 시간",
+               summary_samples(ttfts, "ttft", "streams"))
+        metric("upstage_tokens_total", "counter", "토큰 사용량",
+               [("", labels(key, type=field.removesuffix("_tokens")), value[field])
+                for key, value in totals.items() for field in USAGE_FIELDS[:-1]])
+        metric("upstage_pages_total", "counter", "처리한 문서 페이지 수",
+               [("", labels(key), value["pages"]) for key, value in totals.items()])
+        metric("upstage_request_bytes_total", "counter", "요청 본문 크기",
+               [("", labels(key), value["request_bytes"]) for key, value in totals.items()])
+        metric("upstage_response_bytes_total", "counter", "응답 본문 크기",
+               [("", labels(key), value["response_bytes"]) for key, value in totals.items()])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # node_exporter textfile collector 등이 쓰다 만 파일을 읽지 않도록 교체 방식으로 저장
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def enable_export(self, directory=DEFAULT_EXPORT_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self.export_dir = directory
+        self.write_prometheus(directory / "metrics.prom")
+
+    def disable_export(self):
+        with self._lock:
+            self.export_dir = None
+
+    def to_span(self, call):
+        """OTLP JSON 형식 span (gen_ai / http 시맨틱 컨벤션 속성)"""
+        start_ns = int(call["start"] * 1e9)
+        attributes = {
+            "gen_ai.system": "upstage",
+            "gen_ai.request.model": call["model"],
+            "gen_ai.usage.input_tokens": call["input_tokens"],
+            "gen_ai.usage.output_tokens": call["output_tokens"],
+            "gen_ai.usage.reasoning_tokens": call["reasoning_tokens"],
+            "gen_ai.usage.cached_tokens": call["cached_tokens"],
+            "upstage.pages": call["pages"],
+            "upstage.stream": call["stream"],
+            "upstage.retry": call["retry"],
+            "http.request.body.size": call["request_bytes"],
+            "http.response.body.size": call["response_bytes"],
+            "http.response.status_code": call["status"],
+            "error.type": call["error"],
+        }
+        span = {
+            # 호출마다 독립된 루트 span
+            "traceId": secrets.token_hex(16),
+            "spanId": secrets.token_hex(8),
+            "name": call["endpoint"],
+            "kind": 3,  # SPAN_KIND_CLIENT
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int((call["latency"] or 0.0) * 1e9)),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None],
+            "status": {"code": 2, "message": call["error"]} if call["error"] else {"code": 1},
+        }
+        if call["ttft"] is not None:
+            span["events"] = [{"name": "first_token", "timeUnixNano": str(start_ns + int(call["ttft"] * 1e9))}]
+        return span
+
+    def _write_span(self, directory, call):
+        # 한 줄에 ExportTraceServiceRequest 하나 (OpenTelemetry Collector otlpjsonfile receiver 형식)
+        line = json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "upstage-hands-on"}}]},
+                "scopeSpans": [{"scope": {"name": "shared.instrumentation"}, "spans": [self.to_span(call)]}],
+            }]
+        }, ensure_ascii=False)
+        with self._lock:
+            with open(directory / "spans.jsonl", "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+@st.cache_resource
+def get_metrics():
+    # 프로세스 전체에서 하나의 레지스트리 공유 (HTTP 클라이언트, ChatUpstage 콜백, 임베딩이 함께 기록)
+    return MetricsRegistry()
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def render_metrics_sidebar():
+    """사이드바에 엔드포인트 / 모델별 API 호출 지표 표시 (전체 시간이 긴 순), 파일 내보내기 설정"""
+    metrics = get_metrics()
+    with st.sidebar.expander("📈 API 호출 지표", expanded=False):
+        summary = metrics.summary()
+        if not summary:
+            st.caption("아직 호출 기록이 없습니다.")
+        for row in summary:
+            usage = []
+            if row["input_tokens"] or row["output_tokens"]:
+                usage.append(f"토큰 {row['input_tokens']:,} / {row['output_tokens']:,}")
+            if row["reasoning_tokens"]:
+                usage.append(f"추론 {row['reasoning_tokens']:,}")
+            if row["cached_tokens"]:
+                usage.append(f"캐시 {row['cached_tokens']:,}")
+            if row["pages"]:
+                usage.append(f"{row['pages']:,}페이지")
+            usage.append(f"↑{_format_bytes(row['request_bytes'])} ↓{_format_bytes(row['response_bytes'])}")
+            st.caption(
+                f"`{row['endpoint']}`{' · ' + row['model'] if row['model'] else ''} · {row['requests']}회 "
+                f"(오류 {row['errors']}, 재시도 {row['retries']}) · 시간 비중 {row['time_share']:.0%}  \n"
+                f"p50 {row['p50']:.2f}s · p95 {row['p95']:.2f}s · p99 {row['p99']:.2f}s"
+                + (f" · TTFT p50 {row['ttft_p50']:.2f}s" if row["ttft_p50"] is not None else "")
+                + "  \n" + " · ".join(usage)
+            )
+
+        if st.checkbox("파일로 내보내기", value=metrics.export_dir is not None,
+                       help=f"호출마다 OpenTelemetry span(OTLP JSON)을 spans.jsonl에 추가하고 Prometheus 텍스트를 metrics.prom에 갱신합니다 ({DEFAULT_EXPORT_DIR})"):
+            if metrics.export_dir is None:
+                metrics.enable_export()
+        elif metrics.export_dir is not None:
+            metrics.disable_export()
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Prometheus", metrics.to_prometheus(), file_name="metrics.prom", mime="text/plain", use_container_width=True)
+        with col2:
+            if st.button("기록 비우기", disabled=not summary, use_container_width=True):
+                metrics.clear()
+                st.rerun()
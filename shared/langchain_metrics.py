@@ -0,0 +1,83 @@
+import json
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+
+from shared.instrumentation import CHAT_ENDPOINT, EMBEDDINGS_ENDPOINT, track
+
+# LangChain 객체(ChatUpstage, UpstageEmbeddings)용 계측
+# (REST만 쓰는 앱이 langchain-core 없이 shared.instrumentation을 쓸 수 있도록 분리)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """ChatUpstage 호출(invoke / stream / astream)을 자동으로 기록하는 LangChain 콜백
+
+    - 요청 크기: 메시지 + 호출 파라미터를 JSON으로 직렬화한 크기 (근사치)
+    - 스트리밍이면 내용이 있는 첫 청크 시점을 TTFT로 기록
+    - 중간에 끊은 스트림은 error="cancelled"로 기록
+    """
+
+    # 비동기 호출에서도 스레드 풀로 넘기지 않고 바로 실행 (기록은 잠금으로 보호)
+    run_inline = True
+
+    def __init__(self):
+        self._calls = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, invocation_params=None, metadata=None, **kwargs):
+        params = invocation_params or {}
+        model = params.get("model") or params.get("model_name") or (metadata or {}).get("ls_model_name")
+        payload = {
+            "messages": [{"role": message.type, "content": message.content} for message in messages[0]],
+            **{key: value for key, value in params.items() if key not in ("_type", "stop")},
+        }
+        request_bytes = len(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"))
+        self._calls[run_id] = track(CHAT_ENDPOINT, model, request_bytes=request_bytes)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        call = self._calls.get(run_id)
+        if call and token:
+            call.first_token()
+
+    def _finish(self, run_id, response, error=None):
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        generation = response.generations[0][0] if response and response.generations and response.generations[0] else None
+        message = getattr(generation, "message", None)
+        if message is not None:
+            content = message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+            tool_calls = json.dumps(getattr(message, "tool_calls", None) or [], ensure_ascii=False, default=str)
+            call.set(response_bytes=len(content.encode("utf-8")) + (len(tool_calls) if tool_calls != "[]" else 0))
+            call.set_usage(getattr(message, "usage_metadata", None) or (message.response_metadata or {}).get("token_usage"))
+        call.finish(error=error)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, response)
+
+    def on_llm_error(self, error, *, run_id, response=None, **kwargs):
+        cancelled = isinstance(error, (GeneratorExit, KeyboardInterrupt)) or type(error).__name__ == "CancelledError"
+        self._finish(run_id, response, error="cancelled" if cancelled else type(error).__name__)
+
+
+class TrackedEmbeddings(Embeddings):
+    """UpstageEmbeddings 호출을 기록하는 래퍼 (Chroma 등에 그대로 넘길 수 있음)
+
+    응답 크기는 벡터 차원 x 4바이트(float32)로 추정
+    """
+
+    def __init__(self, embeddings, model):
+        self.embeddings = embeddings
+        self.model = model
+
+    def _embed(self, texts, embed):
+        request_bytes = sum(len(text.encode("utf-8")) for text in texts)
+        with track(EMBEDDINGS_ENDPOINT, self.model, request_bytes=request_bytes) as call:
+            vectors = embed()
+            call.set(response_bytes=sum(len(vector) for vector in vectors) * 4)
+        return vectors
+
+    def embed_documents(self, texts):
+        return self._embed(texts, lambda: self.embeddings.embed_documents(texts))
+
+    def embed_query(self, text):
+        return self._embed([text], lambda: [self.embeddings.embed_query(text)])[0]
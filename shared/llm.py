@@ -0,0 +1,30 @@
+import hashlib
+import json
+
+import streamlit as st
+from langchain_upstage import ChatUpstage
+
+from shared.langchain_metrics import MetricsCallbackHandler
+
+
+def _api_key_hash(api_key):
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _chat_model(api_key_hash, model, client_config, _api_key):
+    # _api_key는 캐시 키에서 제외 (키 원문 대신 해시로 구분)
+    # 모든 호출의 지연 시간 / TTFT / 토큰 사용량을 shared.instrumentation에 기록
+    return ChatUpstage(api_key=_api_key, model=model, callbacks=[MetricsCallbackHandler()], **json.loads(client_config))
+
+
+def get_chat_model(api_key, model, client_config=None, **call_params):
+    """(API Key 해시, 모델, 클라이언트 설정)별로 하나만 만들어 재사용하는 ChatUpstage
+
+    - client_config: 클라이언트 생성 시에만 정할 수 있는 설정 (timeout, max_retries 등)
+    - call_params: temperature 같은 샘플링 파라미터와 response_format, tools 등 요청별 파라미터.
+      클라이언트를 새로 만들지 않고 .bind()로 호출 시점에 적용 (None 값은 제외)
+    """
+    llm = _chat_model(_api_key_hash(api_key), model, json.dumps(client_config or {}, sort_keys=True), api_key)
+    call_params = {key: value for key, value in call_params.items() if value is not None}
+    return llm.bind(**call_params) if call_params else llm
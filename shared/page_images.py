@@ -0,0 +1,111 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
+
+PDF_EXTENSIONS = {"pdf"}
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "bmp"}
+
+
+class PageImageProvider:
+    """문서의 페이지 이미지를 필요할 때만 래스터화하는 provider
+
+    - PDF는 임시 파일로 한 번만 저장한 뒤 convert_from_path(first_page=n, last_page=n)로 요청된 페이지만 변환
+    - 변환된 페이지는 (페이지, DPI) 단위로 최대 max_cached_pages개까지 LRU 캐싱
+    - 썸네일 DPI와 확대 DPI를 따로 지정
+    - source는 바이트 또는 파일 객체 (업로드 파일 객체를 넘기면 별도 복사본을 만들지 않음)
+    """
+
+    def __init__(self, source, file_ext, thumbnail_dpi=72, zoom_dpi=150, max_cached_pages=6):
+        self.source = source
+        self.file_ext = file_ext.lower()
+        self.thumbnail_dpi = thumbnail_dpi
+        self.zoom_dpi = zoom_dpi
+        self.max_cached_pages = max_cached_pages
+        self._page_count = None
+        self._pdf_path = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def supported(self):
+        return self.file_ext in PDF_EXTENSIONS or self.file_ext in IMAGE_EXTENSIONS
+
+    def _open_source(self):
+        if hasattr(self.source, "read"):
+            self.source.seek(0)
+            return self.source
+        return io.BytesIO(self.source)
+
+    def _spooled_pdf(self):
+        # poppler는 파일 경로로 읽으므로 PDF를 임시 파일로 한 번만 저장
+        if self._pdf_path is None:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+                shutil.copyfileobj(self._open_source(), tmp_file)
+                self._pdf_path = tmp_file.name
+        return self._pdf_path
+
+    @property
+    def page_count(self):
+        if self._page_count is None:
+            if self.file_ext in PDF_EXTENSIONS:
+                self._page_count = int(pdfinfo_from_path(self._spooled_pdf())["Pages"])
+            elif self.file_ext in IMAGE_EXTENSIONS:
+                self._page_count = 1
+            else:
+                self._page_count = 0
+        return self._page_count
+
+    def get_page(self, page_num, zoom=False):
+        """1부터 시작하는 페이지 번호의 PIL 이미지 반환 (없으면 None)"""
+        if not self.supported or page_num < 1 or page_num > self.page_count:
+            return None
+
+        dpi = self.zoom_dpi if zoom else self.thumbnail_dpi
+        key = (page_num, dpi)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        image = self._render(page_num, dpi)
+
+        with self._lock:
+            self._cache[key] = image
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cached_pages:
+                self._cache.popitem(last=False)
+        return image
+
+    def _render(self, page_num, dpi):
+        if self.file_ext in PDF_EXTENSIONS:
+            return convert_from_path(self._spooled_pdf(), dpi=dpi, first_page=page_num, last_page=page_num)[0]
+
+        image = Image.open(self._open_source())
+        image.load()
+        # 이미지 파일은 원본을 zoom DPI 기준으로 보고 썸네일은 비율만큼 축소
+        if dpi < self.zoom_dpi:
+            scale = dpi / self.zoom_dpi
+            image.thumbnail((max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        self.clear()
+        if self._pdf_path:
+            os.unlink(self._pdf_path)
+            self._pdf_path = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except OSError:
+            pass
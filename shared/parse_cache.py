@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 캐시 저장 위치 (환경 변수로 변경 가능)
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("UPSTAGE_CACHE_DIR", Path(tempfile.gettempdir()) / "upstage-hands-on-cache")
+)
+
+
+def normalize_options(options):
+    """API 옵션 dict를 캐시 키 계산용으로 정규화"""
+    normalized = {}
+    for key, value in options.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = str(value).lower()
+        elif isinstance(value, (list, tuple, set)):
+            value = sorted(str(v) for v in value)
+        elif isinstance(value, str):
+            value = value.strip()
+            # "['html']" 처럼 문자열로 직렬화된 리스트도 같은 키가 되도록 처리
+            if value.startswith("[") and value.endswith("]"):
+                try:
+                    value = sorted(str(v) for v in json.loads(value.replace("'", '"')))
+                except json.JSONDecodeError:
+                    pass
+        normalized[key] = value
+    return normalized
+
+
+def make_cache_key(source, options):
+    """파일 바이트(또는 파일 객체) + 정규화된 옵션의 SHA-256 해시
+
+    파일 객체는 청크 단위로 읽어서 해시 (전체 복사본을 만들지 않음)
+    """
+    digest = hashlib.sha256()
+    if hasattr(source, "read"):
+        source.seek(0)
+        for block in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(block)
+        source.seek(0)
+    else:
+        digest.update(source)
+    digest.update(b"\0")
+    digest.update(json.dumps(normalize_options(options), sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """API 응답을 JSON 파일로 저장하는 디스크 캐시 (크기 제한 LRU + TTL)
+
+    - 파일의 mtime = 저장 시각 (TTL 판정), atime = 마지막 조회 시각 (LRU 판정)
+    - hits / misses 카운터는 프로세스 단위로 유지
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, namespace="document-parse",
+                 max_bytes=500 * 1024 * 1024, ttl_seconds=7 * 24 * 3600):
+        self.cache_dir = Path(cache_dir) / namespace
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        with self._lock:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+
+            if self.ttl_seconds and time.time() - stat.st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                self.misses += 1
+                return None
+
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                # 손상된 항목은 버리고 miss 처리
+                path.unlink(missing_ok=True)
+                self.misses += 1
+                return None
+
+            # 조회 시각 갱신 (저장 시각은 유지)
+            os.utime(path, (time.time(), stat.st_mtime))
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        with self._lock:
+            # 임시 파일에 쓴 뒤 교체해서 읽는 쪽이 절반만 쓰인 파일을 보지 않도록 함
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def get_or_compute(self, key, compute, bypass=False):
+        """캐시 조회 후 없으면 compute() 실행 결과를 저장. (값, 캐시 적중 여부) 반환
+
+        bypass=True이면 캐시를 읽지 않고 새로 계산한 값으로 덮어씀
+        """
+        if not bypass:
+            value = self.get(key)
+            if value is not None:
+                return value, True
+        value = compute()
+        self.set(key, value)
+        return value, False
+
+    def _entries(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _evict(self):
+        now = time.time()
+        entries = []
+        total = 0
+        for path, stat in self._entries():
+            if self.ttl_seconds and now - stat.st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((path, stat))
+            total += stat.st_size
+
+        # 가장 오래 조회되지 않은 항목부터 삭제
+        entries.sort(key=lambda item: item[1].st_atime)
+        for path, stat in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+
+    def clear(self):
+        with self._lock:
+            for path, _ in self._entries():
+                path.unlink(missing_ok=True)
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(stat.st_size for _, stat in entries),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """스레드 간 공유하는 토큰 버킷 rate limiter
+
+    rate: 초당 허용 요청 수, burst: 한 번에 몰아서 보낼 수 있는 최대 요청 수
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_take(self, tokens):
+        # 토큰을 가져가면 0, 부족하면 기다려야 할 시간(초) 반환 (burst보다 큰 요청은 burst만큼만 기다림)
+        tokens = min(tokens, self.burst)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """토큰이 생길 때까지 대기"""
+        while True:
+            wait = self._try_take(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """이벤트 루프를 막지 않고 토큰이 생길 때까지 대기"""
+        while True:
+            wait = self._try_take(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def adjust(self, tokens):
+        """예약한 양과 실제 사용량의 차이를 반영 (양수면 추가 차감, 음수면 반환)"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens - tokens)
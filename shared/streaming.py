@@ -0,0 +1,164 @@
+import time
+
+import streamlit as st
+
+
+class StreamRenderer:
+    """스트리밍 토큰을 버퍼에 모아 두고 일정 간격으로만 placeholder에 다시 그리는 렌더러
+
+    - fps: 초당 최대 갱신 횟수 (매 청크마다 전체 문자열을 다시 그리지 않음)
+    - every_tokens: 지정하면 이 개수만큼 청크가 쌓여도 갱신 (fps와 둘 중 먼저 도달한 쪽)
+    - close(): 커서 없이 최종 내용을 한 번 그리고 전체 텍스트 반환
+    """
+
+    def __init__(self, placeholder, fps=10, every_tokens=None, cursor="▌"):
+        self.placeholder = placeholder
+        self.interval = 1 / fps if fps else 0
+        self.every_tokens = every_tokens
+        self.cursor = cursor
+        self._text = ""
+        self._pending = []
+        self._last_render = 0.0
+        self.renders = 0
+
+    @property
+    def text(self):
+        if self._pending:
+            self._text += "".join(self._pending)
+            self._pending = []
+        return self._text
+
+    def write(self, content):
+        if not content or not isinstance(content, str):
+            return
+        self._pending.append(content)
+        now = time.monotonic()
+        if now - self._last_render >= self.interval or (
+            self.every_tokens and len(self._pending) >= self.every_tokens
+        ):
+            self._render(self.text + self.cursor)
+            self._last_render = now
+
+    def _render(self, text):
+        self.placeholder.markdown(text)
+        self.renders += 1
+
+    def close(self):
+        text = self.text
+        self._render(text)
+        return text
+
+
+class StreamAccumulator:
+    """스트림 청크를 받는 즉시 합산하고 청크 객체는 보관하지 않는 누적기
+
+    - 텍스트, 청크 수, 마지막 메타데이터(response_metadata가 있는 청크), usage를 유지
+    - renderer(StreamRenderer)를 넘기면 텍스트는 renderer 버퍼에만 쌓고 화면 갱신도 맡김
+    - stats(): 첫 토큰까지 시간(TTFT), 전체 시간, 초당 토큰 수, 토큰 사용량(캐시된 입력 / 추론 토큰 포함)
+    - invoke 응답도 add()로 한 번 넣으면 같은 형식으로 통계를 낼 수 있음
+    - 함수 호출처럼 여러 라운드에 걸친 응답은 add_response()로 넣으면 usage를 라운드별로 합산
+    """
+
+    def __init__(self, renderer=None):
+        self.renderer = renderer
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.chunks = 0
+        self.content_chunks = 0
+        self.content_chars = 0
+        self.responses = 0
+        self.response = None
+        self.usage = None
+        self._parts = []
+
+    def add(self, chunk):
+        """청크를 누적하고 청크의 텍스트 반환"""
+        now = time.perf_counter()
+        self.chunks += 1
+        self.finished_at = now
+        content = chunk.content if isinstance(chunk.content, str) else ""
+        if content:
+            if self.first_token_at is None:
+                self.first_token_at = now
+            self.content_chunks += 1
+            self.content_chars += len(content)
+            if self.renderer:
+                self.renderer.write(content)
+            else:
+                self._parts.append(content)
+        if getattr(chunk, "response_metadata", None):
+            self.response = chunk
+        if getattr(chunk, "usage_metadata", None):
+            self.usage = chunk.usage_metadata
+        return content
+
+    def add_response(self, response):
+        """완성된 응답 하나(invoke 결과 또는 합친 스트림)를 누적. usage는 이전 라운드와 합산"""
+        previous = self.usage
+        content = self.add(response)
+        self.responses += 1
+        if previous and getattr(response, "usage_metadata", None):
+            self.usage = _sum_usage(previous, response.usage_metadata)
+        return content
+
+    @property
+    def text(self):
+        if self.renderer:
+            return self.renderer.text
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def close(self):
+        """renderer가 있으면 최종 렌더링 후 전체 텍스트 반환"""
+        return self.renderer.close() if self.renderer else self.text
+
+    def stats(self):
+        end = self.finished_at or time.perf_counter()
+        usage = self.usage or {}
+        ttft = self.first_token_at - self.started if self.first_token_at else None
+        # usage가 없으면 내용이 있는 청크 수를 출력 토큰 수로 추정
+        output_tokens = usage.get("output_tokens") or self.content_chunks
+        # invoke처럼 한 번에 받은 응답(함수 호출 라운드 포함)은 전체 시간 기준
+        streamed = self.chunks > 1 and self.chunks > self.responses
+        generation_time = end - (self.first_token_at or self.started) if streamed else end - self.started
+        return {
+            "ttft": ttft,
+            "total": end - self.started,
+            "tokens_per_sec": output_tokens / generation_time if generation_time > 0 else None,
+            "chunks": self.chunks,
+            "input_tokens": usage.get("input_tokens"),
+            "output_tokens": usage.get("output_tokens"),
+            # 제공자 프롬프트 캐시에서 읽은 입력 토큰 (token_usage.prompt_tokens_details.cached_tokens)
+            "cached_tokens": (usage.get("input_token_details") or {}).get("cache_read"),
+            # completion_tokens_details.reasoning_tokens
+            "reasoning_tokens": (usage.get("output_token_details") or {}).get("reasoning"),
+        }
+
+
+def _sum_usage(total, usage):
+    # usage_metadata의 토큰 수를 합산 (input_token_details 등 중첩 dict 포함)
+    merged = dict(total)
+    for key, value in usage.items():
+        if isinstance(value, dict):
+            merged[key] = _sum_usage(merged.get(key) or {}, value)
+        elif isinstance(value, (int, float)):
+            merged[key] = (merged.get(key) or 0) + value
+        else:
+            merged[key] = value
+    return merged
+
+
+def render_stream_stats(stats):
+    """응답 지연 시간 / 처리량 / 토큰 사용량 표시"""
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("첫 토큰 (TTFT)", f"{stats['ttft']:.2f}s" if stats["ttft"] is not None else "-")
+    col2.metric("전체 시간", f"{stats['total']:.2f}s")
+    col3.metric("토큰/초", f"{stats['tokens_per_sec']:.1f}" if stats["tokens_per_sec"] else "-")
+    if stats["output_tokens"] is not None:
+        col4.metric("토큰 (입력/출력)", f"{stats['input_tokens'] or 0:,} / {stats['output_tokens']:,}")
+    else:
+        col4.metric("청크 수", f"{stats['chunks']:,}")
+    if stats.get("cached_tokens") and stats["input_tokens"]:
+        st.caption(f"💾 캐시된 입력 토큰: {stats['cached_tokens']:,} / {stats['input_tokens']:,} ({stats['cached_tokens'] / stats['input_tokens']:.0%})")
@@ -0,0 +1,19 @@
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+TESTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = TESTS_DIR.parent
+sys.path[:0] = [str(ROOT_DIR), str(ROOT_DIR / "01_chat_completions"), str(ROOT_DIR / "02_document_digitization")]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # 모듈이 import 시점에 캐시 디렉토리를 읽으므로 테스트 모듈을 불러오기 전에 임시 디렉토리로 지정
+    os.environ["UPSTAGE_CACHE_DIR"] = tempfile.mkdtemp(prefix="upstage-tests-")
+    # Streamlit 캐시(get_metrics 등)를 스크립트 밖에서 쓸 때 나오는 경고 숨김
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
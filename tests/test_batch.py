@@ -0,0 +1,67 @@
+"""02_document_digitization/batch.py: 업로드 펼치기와 일괄 처리 결과 zip"""
+import gc
+import io
+import os
+import zipfile
+
+import pytest
+
+from batch import BatchArchive, expand_uploads
+
+RESULT = {"elements": [{"id": 0, "page": 1, "content": {"markdown": "본문"}}]}
+
+
+def upload(name, data=b"data"):
+    uploaded = io.BytesIO(data)
+    uploaded.name = name
+    return uploaded
+
+
+def make_zip(name, members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for member, data in members:
+            archive.writestr(member, data)
+    return upload(name, buffer.getvalue())
+
+
+@pytest.mark.filterwarnings("ignore:Duplicate name")
+def test_expand_uploads_disambiguates_duplicate_names():
+    uploads = [
+        upload("a.pdf", b"1"),
+        upload("a.pdf", b"2"),
+        make_zip("scans.zip", [("a.pdf", b"3"), ("dir/a.pdf", b"4"), ("a.pdf", b"5"), ("notes.txt", b""), ("__MACOSX/a.pdf", b"")]),
+        make_zip("scans.zip", [("a.pdf", b"6")]),
+    ]
+    items = expand_uploads(uploads)
+    names = [name for name, _ in items]
+    assert names == [
+        "a.pdf", "a (2).pdf",
+        "scans.zip/a.pdf", "scans.zip/dir/a.pdf", "scans.zip/a (2).pdf",
+        "scans (2).zip/a.pdf",
+    ]
+    documents = [opener() for _, opener in items]
+    assert [doc.getvalue() if hasattr(doc, "getvalue") else doc for doc in documents] == [b"1", b"2", b"3", b"4", b"5", b"6"]
+
+
+def test_batch_archive_created_lazily_and_removed_on_close():
+    archive = BatchArchive("markdown")
+    assert archive.path is None
+    archive.add("a.pdf", RESULT)
+    archive.add("scans.zip/a (2).pdf", RESULT)
+    path = archive.path
+    with zipfile.ZipFile(path) as f:
+        assert sorted(f.namelist()) == ["a.pdf.json", "a.pdf.md", "scans.zip/a (2).pdf.json", "scans.zip/a (2).pdf.md"]
+    archive.close()
+    assert archive.path is None and not os.path.exists(path)
+    archive.close()
+
+
+def test_batch_archive_removed_when_released():
+    # 세션이 끝나 session_state가 정리되면 임시 zip도 삭제
+    archive = BatchArchive("markdown")
+    archive.add("a.pdf", RESULT)
+    path = archive.path
+    del archive
+    gc.collect()
+    assert not os.path.exists(path)
@@ -0,0 +1,121 @@
+"""01_chat_completions/batch_eval.py: 평가 데이터 로드, 결과 기록과 이어서 실행"""
+import asyncio
+import json
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from batch_eval import BatchResults, load_prompts, run_batch
+
+
+class FakeChatModel:
+    """astream만 흉내 내는 모델. fail에 있는 user는 오류, 호출된 user를 기록"""
+
+    def __init__(self, delay=0.0, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+
+    async def astream(self, messages, **kwargs):
+        user = messages[-1][1]
+        self.calls.append(user)
+        await asyncio.sleep(self.delay)
+        if user in self.fail:
+            raise RuntimeError("API 오류")
+        yield AIMessageChunk(content=f"답: {user}")
+        yield AIMessageChunk(content="", usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15})
+
+
+def make_prompts(rows):
+    return [{"id": f"q{idx}", "system": "", "user": f"질문 {idx}"} for idx in range(rows)]
+
+
+def test_load_prompts_jsonl_and_csv():
+    jsonl = '{"user": "a"}\n\n{"id": "x", "user": "b", "system": "s"}\n'
+    assert load_prompts("eval.jsonl", jsonl.encode("utf-8"), "기본") == [
+        {"id": "1", "system": "기본", "user": "a"},
+        {"id": "x", "system": "s", "user": "b"},
+    ]
+    csv_text = "﻿id,user,system\nr1,질문,\n"
+    assert load_prompts("eval.CSV", csv_text.encode("utf-8"), "기본") == [{"id": "r1", "system": "기본", "user": "질문"}]
+
+
+@pytest.mark.parametrize("name, text", [
+    ("eval.jsonl", '{"user": "a"}\n{"user": '),
+    ("eval.jsonl", '{"system": "s"}'),
+    ("eval.csv", "id,user\n1,a\n1,b\n"),
+])
+def test_load_prompts_errors(name, text):
+    with pytest.raises(ValueError):
+        load_prompts(name, text)
+
+
+def test_results_resume_from_truncated_file(tmp_path):
+    path = tmp_path / "run.jsonl"
+    results = BatchResults(path)
+    results.add({"id": "q0", "output": "a", "error": None})
+    results.add({"id": "q1", "output": "", "error": "API 오류"})
+    # 기록 도중 중단된 마지막 줄
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"id": "q2", "out')
+
+    resumed = BatchResults(path)
+    assert resumed.completed_ids() == {"q0"}
+    # 실패한 행을 다시 실행한 결과가 같은 id의 이전 결과를 대체
+    resumed.add({"id": "q1", "output": "b", "error": None})
+    resumed.add({"id": "q2", "output": "c", "error": None})
+
+    reloaded = BatchResults(path)
+    assert reloaded.completed_ids() == {"q0", "q1", "q2"}
+    prompts = [{"id": "q2"}, {"id": "q0"}, {"id": "q9"}, {"id": "q1"}]
+    assert [row["output"] for row in reloaded.rows(prompts)] == ["c", "a", "b"]
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[-1])["id"] == "q2" and json.loads(lines[-2])["id"] == "q1"
+
+
+def test_results_reset(tmp_path):
+    results = BatchResults(tmp_path / "run.jsonl")
+    results.add({"id": "q0", "error": None})
+    results.reset()
+    assert results.rows() == [] and not results.path.exists()
+
+
+def test_run_batch_records_rows(tmp_path):
+    llm = FakeChatModel(fail={"질문 1"})
+    results = BatchResults(tmp_path / "run.jsonl")
+    rows = {row["id"]: row for row in run_batch(llm, make_prompts(3), results, concurrency=2)}
+    assert rows["q0"]["output"] == "답: 질문 0"
+    assert (rows["q0"]["input_tokens"], rows["q0"]["output_tokens"]) == (10, 5)
+    assert rows["q0"]["latency"] is not None and rows["q0"]["error"] is None
+    assert rows["q1"]["error"] == "API 오류"
+    assert results.completed_ids() == {"q0", "q2"}
+
+
+def test_run_batch_resumes_only_unfinished_rows(tmp_path):
+    path = tmp_path / "run.jsonl"
+    prompts = make_prompts(20)
+    llm = FakeChatModel(delay=0.01, fail={"질문 3"})
+    rows = run_batch(llm, prompts, BatchResults(path), concurrency=4)
+    for idx, _ in enumerate(rows, 1):
+        if idx == 8:
+            break
+    rows.close()
+    # 닫은 뒤에는 취소된 요청이 더 기록되지 않음
+    finished = BatchResults(path).rows()
+    assert len(finished) == 8
+
+    llm = FakeChatModel()
+    resumed = list(run_batch(llm, prompts, BatchResults(path), concurrency=4))
+    done = {row["id"] for row in finished if not row["error"]}
+    assert sorted(llm.calls) == sorted(prompt["user"] for prompt in prompts if prompt["id"] not in done)
+    assert len(resumed) == 20 - len(done)
+    assert BatchResults(path).completed_ids() == {prompt["id"] for prompt in prompts}
+
+
+def test_run_batch_nothing_pending(tmp_path):
+    results = BatchResults(tmp_path / "run.jsonl")
+    for prompt in make_prompts(2):
+        results.add({**prompt, "error": None})
+    llm = FakeChatModel()
+    assert list(run_batch(llm, make_prompts(2), results)) == []
+    assert llm.calls == []
@@ -0,0 +1,148 @@
+"""02_document_digitization/cli.py: 입력 수집과 최신 결과 건너뛰기"""
+import os
+
+import pytest
+
+import cli
+
+RESULT = {
+    "elements": [{"id": 0, "page": 1, "category": "paragraph", "content": {"markdown": "본문", "html": "<p>본문</p>"}}],
+    "usage": {"pages": 1},
+}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """API 대신 고정 결과를 돌려주고 처리한 파일명을 기록"""
+    processed = []
+
+    def fake_process_document(api_key, filename, document, data, **kwargs):
+        processed.append(filename)
+        return RESULT
+
+    monkeypatch.setattr(cli, "process_document", fake_process_document)
+    return processed
+
+
+def write(path, data=b"%PDF-1.4"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def test_collect_inputs_directory_uses_relative_names(tmp_path):
+    write(tmp_path / "docs" / "a.pdf")
+    write(tmp_path / "docs" / "sub" / "a.pdf")
+    write(tmp_path / "docs" / "notes.txt")
+    names = [name for name, _ in cli.collect_inputs([str(tmp_path / "docs")])]
+    assert names == ["a.pdf", "sub/a.pdf"]
+
+
+def test_collect_inputs_glob_keeps_same_basenames(tmp_path):
+    write(tmp_path / "scans" / "2023" / "report.pdf")
+    write(tmp_path / "scans" / "2024" / "report.pdf")
+    inputs = cli.collect_inputs([str(tmp_path / "scans" / "*" / "report.pdf")])
+    assert [name for name, _ in inputs] == ["2023/report.pdf", "2024/report.pdf"]
+
+
+def test_collect_inputs_glob_skips_unsupported_files(tmp_path):
+    # 이전 실행의 출력(JSON, manifest)이나 메모 파일은 glob에 걸려도 보내지 않음
+    write(tmp_path / "docs" / "a.pdf")
+    write(tmp_path / "docs" / "notes.txt")
+    write(tmp_path / "docs" / "out" / "a.json")
+    write(tmp_path / "docs" / "out" / "a.pdf.manifest.json")
+    write(tmp_path / "docs" / "sub" / "scan.PNG")
+    names = [name for name, _ in cli.collect_inputs([str(tmp_path / "docs" / "**" / "*")])]
+    assert names == ["a.pdf", "sub/scan.PNG"]
+
+
+def test_collect_inputs_explicit_file_is_kept(tmp_path):
+    path = write(tmp_path / "notes.txt")
+    assert cli.collect_inputs([str(path)]) == [("notes.txt", path)]
+
+
+def test_collect_inputs_same_file_twice_is_not_a_collision(tmp_path):
+    path = write(tmp_path / "a.pdf")
+    assert cli.collect_inputs([str(path), str(tmp_path / "*.pdf")]) == [("a.pdf", path)]
+
+
+def test_collect_inputs_collision_raises(tmp_path):
+    write(tmp_path / "x" / "a.pdf")
+    write(tmp_path / "y" / "a.pdf")
+    with pytest.raises(ValueError):
+        cli.collect_inputs([str(tmp_path / "x"), str(tmp_path / "y")])
+
+
+def test_main_collision_exits_without_processing(tmp_path, calls):
+    write(tmp_path / "x" / "a.pdf")
+    write(tmp_path / "y" / "a.pdf")
+    assert cli.main([str(tmp_path / "x"), str(tmp_path / "y"), "-o", str(tmp_path / "out"), "--api-key", "k"]) == 2
+    assert calls == []
+
+
+def run(tmp_path, *extra):
+    return cli.main([str(tmp_path / "docs"), "-o", str(tmp_path / "out"), "--api-key", "k", "--rate", "1000", *extra])
+
+
+def test_main_skips_up_to_date_outputs(tmp_path, calls):
+    write(tmp_path / "docs" / "a.pdf")
+    write(tmp_path / "docs" / "sub" / "a.pdf")
+    assert run(tmp_path) == 0
+    assert sorted(calls) == ["a.pdf", "a.pdf"]
+    assert (tmp_path / "out" / "sub" / "a.pdf.md").exists()
+
+    calls.clear()
+    assert run(tmp_path) == 0
+    assert calls == []
+
+
+@pytest.mark.parametrize("extra", [["--format", "html"], ["--jsonl"], ["--gzip"], ["--compact"], ["--mode", "enhanced"]])
+def test_main_reprocesses_when_options_change(tmp_path, calls, extra):
+    write(tmp_path / "docs" / "a.pdf")
+    run(tmp_path)
+    calls.clear()
+    run(tmp_path, *extra)
+    assert calls == ["a.pdf"]
+    calls.clear()
+    run(tmp_path, *extra)
+    assert calls == []
+
+
+def test_main_reprocesses_when_output_missing(tmp_path, calls):
+    write(tmp_path / "docs" / "a.pdf")
+    run(tmp_path)
+    (tmp_path / "out" / "a.pdf.md").unlink()
+    calls.clear()
+    run(tmp_path)
+    assert calls == ["a.pdf"]
+
+
+def test_main_reprocesses_when_input_is_newer(tmp_path, calls):
+    path = write(tmp_path / "docs" / "a.pdf")
+    run(tmp_path)
+    manifest = cli.manifest_path(tmp_path / "out", "a.pdf")
+    os.utime(path, (manifest.stat().st_mtime + 10, manifest.stat().st_mtime + 10))
+    calls.clear()
+    run(tmp_path)
+    assert calls == ["a.pdf"]
+
+
+def test_main_skips_when_text_output_was_empty(tmp_path, calls):
+    # 텍스트 내용이 없어 만들지 않은 형식은 다음 실행에서 "없는 출력"으로 보지 않음
+    write(tmp_path / "docs" / "a.pdf")
+    run(tmp_path, "--format", "text")
+    assert not (tmp_path / "out" / "a.pdf.txt").exists()
+    calls.clear()
+    run(tmp_path, "--format", "text")
+    assert calls == []
+
+
+def test_main_failed_file_is_retried(tmp_path, monkeypatch):
+    write(tmp_path / "docs" / "a.pdf")
+
+    def failing(*args, **kwargs):
+        raise RuntimeError("API 오류")
+
+    monkeypatch.setattr(cli, "process_document", failing)
+    assert run(tmp_path) == 1
+    assert not cli.manifest_path(tmp_path / "out", "a.pdf").exists()
@@ -0,0 +1,93 @@
+"""02_document_digitization/crops.py: base64 crop 분리 / 복원"""
+import base64
+import copy
+import io
+import json
+
+import pytest
+from PIL import Image
+
+from crops import ElementCropStore
+from export import ResultExporter
+
+
+def png_base64(width):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, 10), "white").save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def make_result():
+    return {
+        "elements": [
+            {"id": 0, "page": 1, "category": "table", "base64_encoding": png_base64(10)},
+            {"id": 1, "page": 1, "category": "paragraph", "content": {"html": "<p>x</p>"}},
+            {"id": 2, "page": 2, "category": "figure", "base64_encoding": png_base64(20)},
+        ],
+        "usage": {"pages": 2},
+    }
+
+
+@pytest.fixture(params=[True, False], ids=["spill", "memory"])
+def store(request):
+    store = ElementCropStore(spill=request.param, max_decoded=1)
+    yield store
+    store.close()
+
+
+def test_ingest_strips_base64(store):
+    result = store.ingest(make_result())
+    assert not any("base64_encoding" in elem for elem in result["elements"])
+    assert len(store) == 2 and store.has(0) and store.has(2) and not store.has(1)
+
+
+def test_restore_returns_original_without_touching_result(store):
+    original = make_result()
+    result = store.ingest(copy.deepcopy(original))
+    stripped = copy.deepcopy(result)
+    assert store.restore(result) == original
+    # 화면용 결과에는 다시 base64를 붙이지 않음
+    assert result == stripped
+
+
+def test_restore_without_crops_is_identity():
+    store = ElementCropStore()
+    result = {"elements": [{"id": 0}]}
+    assert store.restore(store.ingest(result)) is result
+
+
+def test_restore_elements_without_id():
+    # id가 없는 응답은 순서(idx)를 id로 사용
+    store = ElementCropStore(spill=False)
+    original = {"elements": [{"category": "table", "base64_encoding": png_base64(5)}, {"category": "paragraph"}]}
+    result = store.ingest(copy.deepcopy(original))
+    # 순서 키는 store 안에만 두고 결과(내보내는 JSON, 캐시)에는 id를 추가하지 않음
+    assert not any("id" in elem for elem in result["elements"])
+    assert store.element_key(result["elements"][0]) == 0
+    assert store.element_key(result["elements"][1]) is None
+    assert store.restore(result) == original
+
+
+def test_get_image_decodes_on_demand_with_lru_bound(store):
+    store.ingest(make_result())
+    assert store.get_image(0).size == (10, 10)
+    assert store.get_image(2).size == (20, 10)
+    assert list(store._decoded) == [2]
+
+
+def test_json_export_restores_crops(store):
+    original = make_result()
+    exporter = ResultExporter(store.ingest(copy.deepcopy(original)), prepare=store.restore)
+    try:
+        assert json.loads(exporter.read("json")) == original
+    finally:
+        exporter.close()
+
+
+def test_close_removes_spill_dir():
+    store = ElementCropStore(spill=True)
+    store.ingest(make_result())
+    spill_dir = store.spill_dir
+    assert spill_dir.exists()
+    store.close()
+    assert not spill_dir.exists()
@@ -0,0 +1,114 @@
+"""shared/document_parse.py: PDF 페이지 범위 분할과 청크 결과 병합"""
+import io
+import time
+
+from pypdf import PdfReader, PdfWriter
+
+from shared import document_parse
+from shared.document_parse import merge_results, parse_document_in_chunks, run_ocr_by_page, split_pdf
+from shared.parse_cache import ParseCache
+
+
+def make_pdf(pages):
+    writer = PdfWriter()
+    for idx in range(pages):
+        # 페이지마다 크기를 다르게 해서 분할 후에도 어떤 페이지인지 구분
+        writer.add_blank_page(100 + idx, 100)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def chunk_result(pages, per_page=2, html=None):
+    """청크 기준 페이지 번호(1부터)와 id(0부터)로 된 Document Parse 응답"""
+    elements = [
+        {"id": idx * per_page + n, "page": idx + 1, "category": "paragraph", "content": {"html": f"p{idx + 1}-{n}"}}
+        for idx in range(pages) for n in range(per_page)
+    ]
+    return {"api": "2.0", "model": "document-parse", "elements": elements,
+            "content": {"html": html or "", "markdown": ""}, "usage": {"pages": pages}}
+
+
+def test_split_pdf_page_ranges():
+    document = make_pdf(25)
+    chunks = split_pdf(document, 10)
+    assert [start for start, _ in chunks] == [1, 11, 21]
+    widths = [[int(page.mediabox.width) for page in PdfReader(io.BytesIO(data)).pages] for _, data in chunks]
+    assert widths == [list(range(100, 110)), list(range(110, 120)), list(range(120, 125))]
+
+
+def test_split_pdf_accepts_file_object():
+    document = io.BytesIO(make_pdf(3))
+    document.read()
+    assert [start for start, _ in split_pdf(document, 2)] == [1, 3]
+
+
+def test_merge_results_reoffsets_pages_and_ids():
+    merged = merge_results([(1, chunk_result(10, html="A")), (11, chunk_result(10, html="B")), (21, chunk_result(5))])
+    elements = merged["elements"]
+    assert [elem["id"] for elem in elements] == list(range(50))
+    assert [elem["page"] for elem in elements] == [page for page in range(1, 26) for _ in range(2)]
+    # 내용은 그대로 두고 페이지 / id만 보정
+    assert elements[20]["content"]["html"] == "p1-0" and elements[20]["page"] == 11
+    assert merged["usage"]["pages"] == 25
+    assert merged["content"] == {"html": "A\nB"}
+    assert (merged["api"], merged["model"]) == ("2.0", "document-parse")
+
+
+def test_merge_results_does_not_mutate_chunks():
+    chunk = chunk_result(2)
+    merge_results([(1, chunk_result(2)), (3, chunk)])
+    assert [elem["page"] for elem in chunk["elements"]] == [1, 1, 2, 2]
+
+
+def test_merge_results_elements_without_page():
+    merged = merge_results([(1, {"elements": [{"id": 7}]}), (4, {"elements": [{"id": 7}]})])
+    assert [(elem["id"], elem["page"]) for elem in merged["elements"]] == [(0, 1), (1, 4)]
+
+
+def test_parse_in_chunks_merges_in_page_order(monkeypatch):
+    # 늦게 시작한 청크가 먼저 끝나도 페이지 순서대로 병합
+    def fake_parse_document(api_key, filename, document, data, max_retries=3):
+        pages = len(PdfReader(io.BytesIO(document)).pages)
+        time.sleep(0.05 if filename.endswith("_p1.pdf") else 0)
+        return chunk_result(pages, per_page=1)
+
+    monkeypatch.setattr(document_parse, "parse_document", fake_parse_document)
+    progress = []
+    result = parse_document_in_chunks(
+        "key", "report.pdf", make_pdf(7), {}, pages_per_chunk=3, max_workers=3,
+        on_progress=lambda done, total: progress.append((done, total))
+    )
+    assert [elem["page"] for elem in result["elements"]] == list(range(1, 8))
+    assert [elem["id"] for elem in result["elements"]] == list(range(7))
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+def ocr_result(pages):
+    return {"apiVersion": "1.1", "modelVersion": "ocr", "numBilledPages": pages, "text": "",
+            "pages": [{"id": idx, "text": f"page {idx + 1}", "words": []} for idx in range(pages)],
+            "metadata": {"pages": [{"page": idx + 1} for idx in range(pages)]}}
+
+
+def test_ocr_by_page_caches_non_pdf_as_whole_document(monkeypatch, tmp_path):
+    # PPTX 등은 페이지로 나눌 수 없으므로 응답 페이지 수와 무관하게 통째로 캐싱
+    calls = []
+
+    def fake_run_ocr(api_key, filename, document, data, max_retries=None):
+        calls.append(filename)
+        return ocr_result(3)
+
+    monkeypatch.setattr(document_parse, "run_ocr", fake_run_ocr)
+    cache = ParseCache(cache_dir=tmp_path, namespace="ocr")
+    first, stats = run_ocr_by_page("key", "slides.pptx", b"pptx-bytes", {"model": "ocr"}, cache)
+    assert stats == {"cached": 0, "sent": 3}
+    assert [page["text"] for page in first["pages"]] == ["page 1", "page 2", "page 3"]
+
+    second, stats = run_ocr_by_page("key", "slides.pptx", io.BytesIO(b"pptx-bytes"), {"model": "ocr"}, cache)
+    assert stats == {"cached": 3, "sent": 0}
+    assert second == first
+    assert calls == ["slides.pptx"]
+
+    _, stats = run_ocr_by_page("key", "slides.pptx", b"pptx-bytes", {"model": "ocr"}, cache, bypass=True)
+    assert stats == {"cached": 0, "sent": 3}
+    assert len(calls) == 2
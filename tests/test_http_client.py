@@ -0,0 +1,69 @@
+"""shared/http_client.py: 호출 지표의 엔드포인트 이름"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+from shared import document_parse
+from shared.http_client import UpstageHTTPClient
+from shared.instrumentation import get_metrics
+
+
+def fake_response(payload, status=200):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode("utf-8")
+    response.request = requests.Request("GET", "http://mock").prepare()
+    return response
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """요청 URL만 기록하고 고정 응답을 돌려주는 HTTP 클라이언트"""
+    client = UpstageHTTPClient(max_retries=0)
+    client.urls = []
+
+    def request(method, url, **kwargs):
+        client.urls.append(url)
+        if "/requests/" in url:
+            return fake_response({"status": "completed", "batches": [
+                {"start_page": 1, "end_page": 1, "download_url": f"https://storage.example.com/{url[-8:]}/0?sig=abc"},
+            ]})
+        return fake_response({"elements": [{"id": 0, "page": 1}], "usage": {"pages": 1}})
+
+    monkeypatch.setattr(client.session, "request", request)
+    monkeypatch.setattr(document_parse, "get_http_client", lambda: client)
+    get_metrics().clear()
+    yield client
+    get_metrics().clear()
+
+
+def test_default_endpoint_is_method_and_path(client):
+    # 응답을 변수에 담지 않고 바로 파싱해도 usage가 기록되어야 함
+    assert client.get("https://api.upstage.ai/v1/document-ai/ocr?x=1").json()["usage"] == {"pages": 1}
+    [call] = get_metrics().calls()
+    assert call["endpoint"] == "GET /v1/document-ai/ocr"
+    assert call["pages"] == 1 and call["status"] == 200
+
+
+def test_async_parse_uses_route_templates(client):
+    parser = document_parse.DocumentParseClient("key")
+    for request_id in ("req-0001", "req-0002"):
+        parser.parse("a.pdf", b"", {}, request_id=request_id)
+    # 요청마다 다른 URL이어도 지표 이름은 두 가지뿐
+    assert len(set(client.urls)) == 4
+    endpoints = [call["endpoint"] for call in get_metrics().calls()]
+    assert set(endpoints) == {document_parse.REQUEST_STATUS_ENDPOINT, document_parse.DOWNLOAD_ENDPOINT}
+    assert len(endpoints) == 4
+
+
+def test_rest_modules_do_not_need_langchain():
+    # 02 / 03 앱과 CLI는 langchain-core 없이 설치되므로 REST 경로에서 import하지 않아야 함
+    code = (
+        "import sys; sys.modules['langchain_core'] = None; sys.modules['langchain_upstage'] = None; "
+        "import shared.http_client, shared.document_parse, shared.instrumentation"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent, check=True)
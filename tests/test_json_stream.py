@@ -0,0 +1,131 @@
+"""01_chat_completions/json_stream.py: 스트리밍 JSON 파서와 조기 스키마 검증"""
+import json
+
+import pytest
+
+from json_stream import IncrementalJSONParser, StructuredOutputMonitor
+
+
+def parse_prefix(text):
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser
+
+
+@pytest.mark.parametrize("prefix, value, completed", [
+    ("", None, 0),
+    ('{', {}, 0),
+    ('{"na', {}, 0),
+    ('{"name"', {}, 0),
+    ('{"name": "Up', {}, 0),
+    ('{"name": "Upstage"', {"name": "Upstage"}, 1),
+    ('{"name": "Upstage", "n": 12', {"name": "Upstage"}, 1),
+    ('{"name": "Upstage", "n": 12,', {"name": "Upstage", "n": 12}, 2),
+    ('{"items": [1, [true, nu', {"items": [1, [True]]}, 2),
+    ('{"items": [1, [true, null]', {"items": [1, [True, None]]}, 4),
+    ('{"items": []}', {"items": []}, 2),
+])
+def test_parser_prefix_states(prefix, value, completed):
+    # 진행 중인 문자열 / 숫자 / 리터럴은 빠지고 열린 객체 / 배열은 부분 트리에 포함
+    parser = parse_prefix(prefix)
+    assert parser.error is None
+    assert parser.value == value
+    assert parser.completed == completed
+    assert parser.done is (prefix.endswith("}") and completed > 0)
+
+
+def test_parser_chunk_boundaries_do_not_matter():
+    document = {"text": "따옴표 \" 와 \\n 이스케이프 é", "num": -12.5e3, "flags": [True, False, None], "nested": {"a": []}}
+    text = json.dumps(document, ensure_ascii=False)
+    for size in (1, 2, 3, 7):
+        parser = IncrementalJSONParser()
+        for start in range(0, len(text), size):
+            assert parser.feed(text[start:start + size]) is None
+        assert parser.finish() is None
+        assert parser.value == document
+
+
+def test_parser_top_level_number_finishes_at_end():
+    parser = parse_prefix("42")
+    assert not parser.done and parser.value is None
+    assert parser.finish() is None and parser.value == 42
+
+
+def test_parser_code_fence():
+    parser = parse_prefix('```json\n{"a": 1}\n```\n')
+    assert parser.finish() is None and parser.value == {"a": 1}
+
+
+@pytest.mark.parametrize("text", ['{"a" 1}', '{"a": 1]', "[1 2]", '{"a": tru}', '{"a": 1} x', "{'a': 1}"])
+def test_parser_syntax_errors(text):
+    parser = IncrementalJSONParser()
+    assert parser.feed(text) or parser.finish()
+
+
+def test_parser_unfinished_input():
+    parser = parse_prefix('{"a": [1, 2')
+    assert parser.error is None
+    assert parser.finish() == "JSON이 끝나지 않았습니다."
+
+
+def test_parser_is_open():
+    parser = parse_prefix('{"done": [1], "open": [2')
+    assert parser.is_open(parser.value)
+    assert parser.is_open(parser.value["open"])
+    assert not parser.is_open(parser.value["done"])
+
+
+jsonschema = pytest.importorskip("jsonschema")
+
+
+def stream(schema, document):
+    """한 글자씩 넣으면서 처음 보고된 위반과 그때까지 받은 글자 수 반환"""
+    monitor = StructuredOutputMonitor(jsonschema.Draft202012Validator(schema), interval=0)
+    for ch in json.dumps(document, ensure_ascii=False):
+        violation = monitor.feed(ch)
+        if violation:
+            return violation, monitor.parser.chars
+    return monitor.finish(), monitor.parser.chars
+
+
+@pytest.mark.parametrize("schema, document", [
+    # 객체 / 배열 전체에 대한 enum / const는 닫히기 전까지 판단하지 않음
+    ({"enum": [{"a": 1, "b": 2}]}, {"a": 1, "b": 2}),
+    ({"type": "object", "properties": {"point": {"const": {"x": 1, "y": 2}}}}, {"point": {"x": 1, "y": 2}}),
+    ({"type": "array", "items": {"enum": [[1, 2], [3]]}}, [[1, 2], [3]]),
+    # $ref로 참조한 하위 스키마의 const
+    ({"$defs": {"origin": {"const": {"x": 0, "y": 0}}}, "properties": {"p": {"$ref": "#/$defs/origin"}}},
+     {"p": {"x": 0, "y": 0}}),
+    # if 조건 필드(kind)가 뒤에 오는 경우
+    ({"if": {"properties": {"kind": {"const": "num"}}, "required": ["kind"]},
+      "then": {"properties": {"value": {"type": "number"}}},
+      "else": {"properties": {"value": {"type": "string"}}}},
+     {"value": 3, "kind": "num"}),
+    ({"dependentSchemas": {"unit": {"properties": {"value": {"type": "number"}}}}},
+     {"value": "3", "extra": {"unit": None}}),
+    # 마지막 항목이 아직 열려 있을 때 빈 객체끼리 중복으로 보지 않음
+    ({"type": "array", "uniqueItems": True}, [{}, {"a": 1}]),
+    ({"type": "object", "unevaluatedProperties": False,
+      "if": {"required": ["kind"]}, "then": {"properties": {"kind": True, "size": True}}},
+     {"size": 1, "kind": "x"}),
+])
+def test_valid_stream_is_not_aborted(schema, document):
+    assert stream(schema, document) == (None, len(json.dumps(document, ensure_ascii=False)))
+
+
+@pytest.mark.parametrize("schema, document, path", [
+    ({"type": "object", "properties": {"age": {"type": "integer"}}}, {"age": "열", "name": "x" * 50}, "age"),
+    ({"type": "object", "additionalProperties": False, "properties": {"a": {}}}, {"b": 1, "a": "x" * 50}, ""),
+    ({"type": "object", "properties": {"p": {"const": {"x": 1}}}}, {"p": {"x": 2}, "rest": "x" * 50}, "p"),
+    ({"type": "array", "maxItems": 1}, [1, 2, "x" * 50], ""),
+])
+def test_final_violation_aborts_early(schema, document, path):
+    violation, received = stream(schema, document)
+    assert violation and violation.startswith(f"스키마 위반: {path}: " if path else "스키마 위반: ")
+    assert received < len(json.dumps(document, ensure_ascii=False)) - 50
+
+
+def test_deferred_violation_reported_at_finish():
+    schema = {"type": "object", "required": ["a"], "properties": {"p": {"const": {"x": 1}}}}
+    violation, _ = stream(schema, {"p": {"x": 1}})
+    assert violation and "'a' is a required property" in violation
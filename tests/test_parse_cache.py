@@ -0,0 +1,103 @@
+"""shared/parse_cache.py: 캐시 키, TTL, 크기 제한 LRU"""
+import io
+import json
+import os
+import time
+
+import pytest
+
+from shared.parse_cache import ParseCache, make_cache_key
+
+VALUE = {"elements": [{"id": 0, "content": {"html": "x" * 100}}]}
+ENTRY_BYTES = len(json.dumps(VALUE))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(cache_dir=tmp_path, max_bytes=ENTRY_BYTES * 3, ttl_seconds=60)
+
+
+def age(cache, key, stored=0, accessed=0):
+    """항목의 저장 시각(mtime) / 조회 시각(atime)을 지금보다 N초 전으로 설정"""
+    now = time.time()
+    os.utime(cache._path(key), (now - accessed, now - stored))
+
+
+def test_cache_key_same_for_equivalent_options():
+    data = b"%PDF-1.4 document"
+    key = make_cache_key(data, {"output_formats": "['html', 'text']", "ocr": True, "base64_encoding": None})
+    assert key == make_cache_key(io.BytesIO(data), {"ocr": "true", "output_formats": ["text", "html"]})
+    assert key != make_cache_key(data, {"output_formats": "['html']", "ocr": True})
+    assert key != make_cache_key(data + b" ", {"output_formats": "['html', 'text']", "ocr": True})
+
+
+def test_cache_key_rewinds_file_object():
+    document = io.BytesIO(b"abc")
+    document.read(1)
+    make_cache_key(document, {})
+    assert document.tell() == 0
+
+
+def test_get_set_and_counters(cache):
+    assert cache.get("a") is None
+    cache.set("a", VALUE)
+    assert cache.get("a") == VALUE
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_ttl_expires_by_store_time_not_access_time(cache):
+    cache.set("a", VALUE)
+    age(cache, "a", stored=30, accessed=0)
+    assert cache.get("a") == VALUE
+    # 조회해도 저장 시각은 그대로 유지되어 TTL이 연장되지 않음
+    age(cache, "a", stored=61, accessed=0)
+    assert cache.get("a") is None
+    assert not cache._path("a").exists()
+
+
+def test_expired_entries_removed_on_set(cache):
+    cache.set("old", VALUE)
+    age(cache, "old", stored=120, accessed=120)
+    cache.set("new", VALUE)
+    assert not cache._path("old").exists()
+    assert cache._path("new").exists()
+
+
+def test_lru_evicts_least_recently_read(cache):
+    for idx, key in enumerate(["a", "b", "c"]):
+        cache.set(key, VALUE)
+        age(cache, key, stored=10, accessed=10 - idx)
+    # a를 조회하면 가장 최근에 쓴 항목이 되고, 그 다음 오래된 b가 먼저 삭제됨
+    assert cache.get("a") == VALUE
+    cache.set("d", VALUE)
+    assert [key for key in "abcd" if cache._path(key).exists()] == ["a", "c", "d"]
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_corrupt_entry_is_a_miss(cache):
+    cache._path("a").write_text("{", encoding="utf-8")
+    assert cache.get("a") is None
+    assert not cache._path("a").exists()
+
+
+def test_get_or_compute_and_bypass(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    assert cache.get_or_compute("a", compute) == ({"n": 1}, False)
+    assert cache.get_or_compute("a", compute) == ({"n": 1}, True)
+    # bypass는 읽지 않고 새 값으로 덮어씀
+    assert cache.get_or_compute("a", compute, bypass=True) == ({"n": 2}, False)
+    assert cache.get("a") == {"n": 2}
+
+
+def test_clear(cache):
+    cache.set("a", VALUE)
+    cache.get("a")
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "entries": 0, "bytes": 0, "max_bytes": cache.max_bytes}
@@ -0,0 +1,56 @@
+"""02_document_digitization/pipeline.py: 캐시 확인 후에만 rate limiter 토큰 사용"""
+import pytest
+
+import pipeline
+from shared import document_parse
+from shared.parse_cache import ParseCache
+
+OCR_RESULT = {"numBilledPages": 1, "text": "본문", "pages": [{"id": 0, "text": "본문", "words": []}],
+              "metadata": {"pages": [{"page": 1}]}}
+PARSE_RESULT = {"elements": [], "usage": {"pages": 1}}
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    calls = []
+
+    def fake_run_ocr(api_key, filename, document, data, max_retries=None):
+        calls.append("ocr")
+        return OCR_RESULT
+
+    def fake_parse_document(api_key, filename, document, data, max_retries=3):
+        calls.append("parse")
+        return PARSE_RESULT
+
+    monkeypatch.setattr(document_parse, "run_ocr", fake_run_ocr)
+    monkeypatch.setattr(pipeline, "run_ocr", fake_run_ocr)
+    monkeypatch.setattr(pipeline, "parse_document", fake_parse_document)
+    return calls
+
+
+@pytest.mark.parametrize("data, cache_arg", [
+    (pipeline.build_ocr_data(), "ocr_cache"),
+    (pipeline.build_parse_data(), "parse_cache"),
+])
+def test_cached_rerun_does_not_acquire(tmp_path, fake_api, data, cache_arg):
+    cache = ParseCache(cache_dir=tmp_path, namespace=cache_arg)
+    limiter = CountingLimiter()
+    for _ in range(3):
+        pipeline.process_document("key", "scan.png", b"image-bytes", data, limiter=limiter, **{cache_arg: cache})
+    assert len(fake_api) == 1
+    assert limiter.acquired == 1
+
+
+def test_ocr_without_cache_acquires_every_call(fake_api):
+    limiter = CountingLimiter()
+    for _ in range(2):
+        pipeline.process_document("key", "scan.png", b"image-bytes", pipeline.build_ocr_data(), limiter=limiter)
+    assert limiter.acquired == 2
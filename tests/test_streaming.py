@@ -0,0 +1,33 @@
+"""shared/streaming.py: 여러 라운드 응답의 usage 합산"""
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from shared.streaming import StreamAccumulator
+
+
+def usage(input_tokens, output_tokens, cached=0, reasoning=0):
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": cached},
+            "output_token_details": {"reasoning": reasoning}}
+
+
+def test_add_response_sums_usage_across_tool_rounds():
+    stream = StreamAccumulator()
+    stream.add_response(AIMessage(content="", usage_metadata=usage(100, 20, cached=50),
+                                  response_metadata={"finish_reason": "tool_calls"}))
+    stream.add_response(AIMessage(content="최종 답변", usage_metadata=usage(180, 40, reasoning=10),
+                                  response_metadata={"finish_reason": "stop"}))
+    stats = stream.stats()
+    assert (stats["input_tokens"], stats["output_tokens"]) == (280, 60)
+    assert (stats["cached_tokens"], stats["reasoning_tokens"]) == (50, 10)
+    assert stream.usage["total_tokens"] == 340
+    assert stream.response.response_metadata["finish_reason"] == "stop"
+
+
+def test_add_keeps_last_usage_for_stream_chunks():
+    # 스트림 청크는 usage가 마지막 청크에만 오므로 합산하지 않음
+    stream = StreamAccumulator()
+    stream.add(AIMessageChunk(content="안녕"))
+    stream.add(AIMessageChunk(content="하세요", usage_metadata=usage(10, 2)))
+    assert stream.stats()["output_tokens"] == 2
+    assert stream.text == "안녕하세요"